@@ -19,8 +19,11 @@ from utils import round_to_grid
 class geometry:
     """
     A specific path, shape, or text geometry. Base class for shared
-    items.
+    items. The geometries have slots instead of an instance dictionary
+    since a large layout has many of them.
     """
+    __slots__ = ("width", "height", "boundary")
+
     def __init__(self):
         """ By default, everything has no size. """
         self.width = 0
@@ -158,6 +161,8 @@ class instance(geometry):
     An instance of an instance/module with a specified location and
     rotation
     """
+    __slots__ = ("name", "mod", "gds", "rotate", "offset", "mirror")
+
     def __init__(self, name, mod, offset=[0, 0], mirror="R0", rotate=0):
         """Initializes an instance to represent a module"""
         geometry.__init__(self)
@@ -262,7 +267,9 @@ class instance(geometry):
         this instance location. """
 
         import copy
-        pin = copy.deepcopy(self.mod.get_pins(name))
+        # The order of the pin set depends on how it was built
+        # (e.g. loaded from the module cache) so sort the pins
+        pin = copy.deepcopy(sorted(self.mod.get_pins(name), key=lambda p: (p.lpp, p.rect)))
 
         new_pins = []
         for p in pin:
@@ -279,8 +286,56 @@ class instance(geometry):
         return "( inst: " + self.name + " @" + str(self.offset) + " mod=" + self.mod.name + " " + self.mirror + " R=" + str(self.rotate) + ")"
 
     
+class instance_array(geometry):
+    """
+    A regular array of instances of a module that all have the same
+    mirror and rotation. It is written as a single GDS array reference
+    instead of a reference per instance. The instances are still used
+    for the netlist and the pins.
+    """
+    __slots__ = ("name", "insts", "mod", "offset", "mirror", "rotate",
+                 "columns", "rows", "column_pitch", "row_pitch")
+
+    def __init__(self, insts, columns, rows, column_pitch, row_pitch):
+        """ The instances are in row major order starting at the lower left one. """
+        geometry.__init__(self)
+        self.name = "instance_array"
+        self.insts = insts
+        self.mod = insts[0].mod
+        self.offset = insts[0].offset
+        self.mirror = insts[0].mirror
+        self.rotate = insts[0].rotate
+        self.columns = columns
+        self.rows = rows
+        self.column_pitch = column_pitch
+        self.row_pitch = row_pitch
+
+    def gds_write_file(self, new_layout):
+        """Recursively writes the module and then the array reference"""
+        debug.info(4, "writing instance array: " + str(self))
+        self.mod.gds_write_file(self.insts[0].gds)
+        new_layout.addArrayInstance(self.insts[0].gds,
+                                    self.mod.name,
+                                    offsetInMicrons=self.offset,
+                                    mirror=self.mirror,
+                                    rotate=self.rotate,
+                                    columns=self.columns,
+                                    rows=self.rows,
+                                    columnPitchInMicrons=self.column_pitch,
+                                    rowPitchInMicrons=self.row_pitch)
+
+    def __str__(self):
+        """ override print function output """
+        return "( inst array: " + str(self.columns) + "x" + str(self.rows) + " @" + str(self.offset) + " mod=" + self.mod.name + " " + self.mirror + " R=" + str(self.rotate) + ")"
+
+    def __repr__(self):
+        """ override print function output """
+        return self.__str__()
+
+
 class path(geometry):
     """Represents a Path"""
+    __slots__ = ("name", "layerNumber", "layerPurpose", "coordinates", "path_width")
 
     def __init__(self, lpp, coordinates, path_width):
         """Initializes a path for the specified layer"""
@@ -319,6 +374,7 @@ class path(geometry):
 
 class label(geometry):
     """Represents a text label"""
+    __slots__ = ("name", "text", "layerNumber", "layerPurpose", "offset", "zoom", "size")
 
     def __init__(self, text, lpp, offset, zoom=-1):
         """Initializes a text label for specified layer"""
@@ -363,6 +419,7 @@ class label(geometry):
 
 class rectangle(geometry):
     """Represents a rectangular shape"""
+    __slots__ = ("name", "layerNumber", "layerPurpose", "offset", "size")
 
     def __init__(self, lpp, offset, width, height):
         """Initializes a rectangular shape for specified layer"""
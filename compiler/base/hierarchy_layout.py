@@ -38,6 +38,7 @@ class layout():
         self.bounding_box = None
         self.insts = []      # Holds module/cell layout instances
         self.objs = []       # Holds all other objects (labels, geometries, etc)
+        self.inst_arrays = [] # Holds lists of instances to write as GDS arrays
         self.pin_map = {}    # Holds name->pin_layout map for all pins
         self.visited = []    # List of modules we have already visited
         self.is_library_cell = False # Flag for library cells
@@ -207,6 +208,73 @@ class layout():
         # debug.info(4, "instance list: " + ",".join(x.name for x in self.insts))
         return self.insts[-1]
 
+    def add_inst_array(self, insts):
+        """
+        Write the instances of a regular array as GDS array references.
+        The instances with the same module and orientation that fill
+        a regular grid become one array reference and any others are
+        written as separate references. The grid is found when the GDS
+        is written, so this may be called before the instances are placed.
+        """
+        self.inst_arrays.append(list(insts))
+
+    def get_inst_arrays(self, gds_layout):
+        """ The geometry.instance_array of every regular grid of the instance arrays. """
+        arrays = []
+        arrayed = set()
+        for insts in self.inst_arrays:
+            groups = {}
+            for inst in insts:
+                if id(inst) not in arrayed:
+                    groups.setdefault((id(inst.mod), inst.mirror, inst.rotate), []).append(inst)
+            for group in groups.values():
+                array = self.get_inst_grid(group, gds_layout)
+                if array:
+                    arrays.append(array)
+                    arrayed.update(id(inst) for inst in group)
+        return arrays
+
+    def get_inst_grid(self, insts, gds_layout):
+        """
+        Return a geometry.instance_array of instances if they fill
+        a regular grid in layout units or None if they don't.
+        """
+        if len(insts) < 2:
+            return None
+        grid = {}
+        for inst in insts:
+            grid[gds_layout.userUnits(inst.offset.x), gds_layout.userUnits(inst.offset.y)] = inst
+        xs = sorted(set(x for (x, y) in grid))
+        ys = sorted(set(y for (x, y) in grid))
+        # Overlapping instances or holes in the grid
+        if len(grid) != len(insts) or len(xs) * len(ys) != len(insts):
+            return None
+        # The GDS COLROW record has 16 bit counts
+        if len(xs) > 32767 or len(ys) > 32767:
+            return None
+
+        pitches = []
+        for coords in [xs, ys]:
+            pitch = 0
+            if len(coords) > 1:
+                pitch = coords[1] - coords[0]
+            if any(coords[i] != coords[0] + i * pitch for i in range(len(coords))):
+                return None
+            pitches.append(pitch)
+
+        grid_insts = [grid[x, y] for y in ys for x in xs]
+        column_pitch = vector(0, 0)
+        if len(xs) > 1:
+            column_pitch = vector(grid_insts[1].offset.x - grid_insts[0].offset.x, 0)
+        row_pitch = vector(0, 0)
+        if len(ys) > 1:
+            row_pitch = vector(0, grid_insts[len(xs)].offset.y - grid_insts[0].offset.y)
+        # The pitch must be exact so that every instance is where it was placed
+        if gds_layout.userUnits(column_pitch.x) != pitches[0] or gds_layout.userUnits(row_pitch.y) != pitches[1]:
+            return None
+
+        return geometry.instance_array(grid_insts, len(xs), len(ys), column_pitch, row_pitch)
+
     def get_inst(self, name):
         """ Retrieve an instance by name """
         for inst in self.insts:
@@ -680,6 +748,20 @@ class layout():
             debug.info(3, "Creating layout structure {}".format(self.name))
             self.gds = gdsMill.VlsiLayout(name=self.name, units=GDS["unit"])
 
+    def restore_cached(self, name):
+        """
+        Prepare a generated module that was loaded from the module cache.
+        It gets the name that the factory assigned in this run and a new
+        layout structure, and the instances use the layout structures of
+        the modules that the factory resolved them to.
+        """
+        self.name = name
+        self.visited = []
+        if self.gds and not self.is_library_cell:
+            self.gds = gdsMill.VlsiLayout(name=self.name, units=GDS["unit"])
+        for inst in self.insts:
+            inst.gds = inst.mod.gds
+
     def print_gds(self, gds_file=None):
         """Print the gds file (not the vlsi class) to the terminal """
         if not gds_file:
@@ -698,12 +780,19 @@ class layout():
         # Visited means that we already prepared self.gds for this subtree
         if self.name in self.visited:
             return
+        inst_arrays = self.get_inst_arrays(gds_layout)
+        arrayed = set(id(inst) for array in inst_arrays for inst in array.insts)
         for i in self.insts:
+            if id(i) not in arrayed:
+                i.gds_write_file(gds_layout)
+        for i in inst_arrays:
             i.gds_write_file(gds_layout)
         for i in self.objs:
             i.gds_write_file(gds_layout)
+        # The order of the pin sets depends on how they were built
+        # (e.g. loaded from the module cache) so sort the pins
         for pin_name in self.pin_map.keys():
-            for pin in self.pin_map[pin_name]:
+            for pin in sorted(self.pin_map[pin_name], key=lambda p: (p.lpp, p.rect)):
                 pin.gds_write_file(gds_layout)
 
         # If it's not a premade cell
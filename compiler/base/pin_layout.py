@@ -10,6 +10,16 @@ from tech import GDS, drc
 from vector import vector
 from tech import layer, layer_indices
 import math
+# The purposes of pin shapes and labels if they differ from the drawing
+# layers. They are looked up once since a failed import is slow.
+try:
+    from tech import pin_purpose
+except ImportError:
+    pin_purpose = None
+try:
+    from tech import label_purpose
+except ImportError:
+    label_purpose = None
 
 
 class pin_layout:
@@ -17,6 +27,7 @@ class pin_layout:
     A class to represent a rectangular design pin. It is limited to a
     single shape.
     """
+    __slots__ = ("name", "_rect", "_layer", "lpp", "_hash")
 
     def __init__(self, name, rect, layer_name_pp):
         self.name = name
@@ -370,17 +381,15 @@ class pin_layout:
                    + str(self.width()) + "x"
                    + str(self.height()) + " @ " + str(self.ll()))
         (layer_num, purpose) = layer[self.layer]
-        try:
-            from tech import pin_purpose
-        except ImportError:
-            pin_purpose = purpose
-        try:
-            from tech import label_purpose
-        except ImportError:
-            label_purpose = purpose
-        
+        shape_purpose = purpose
+        if pin_purpose != None:
+            shape_purpose = pin_purpose
+        text_purpose = purpose
+        if label_purpose != None:
+            text_purpose = label_purpose
+
         newLayout.addBox(layerNumber=layer_num,
-                         purposeNumber=pin_purpose,
+                         purposeNumber=shape_purpose,
                          offsetInMicrons=self.ll(),
                          width=self.width(),
                          height=self.height(),
@@ -390,7 +399,7 @@ class pin_layout:
         # imported into Magic.
         newLayout.addText(text=self.name,
                           layerNumber=layer_num,
-                          purposeNumber=label_purpose,
+                          purposeNumber=text_purpose,
                           offsetInMicrons=self.center(),
                           magnification=GDS["zoom"],
                           rotate=None)
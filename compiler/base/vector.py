@@ -8,8 +8,9 @@
 import debug
 import math
 import tech
+from operator import itemgetter
 
-class vector():
+class vector(tuple):
     """
     This is the vector class to represent the coordinate
     vector. It makes the coordinate operations easy and short
@@ -17,18 +18,32 @@ class vector():
     It needs to override several operators to support
     concise vector operations, output, and other more complex
     data structures like lists.
+    A vector is an immutable (x, y) tuple of floats without an instance
+    dictionary, so it is small and cheap to create, hash and index.
+    The operations return new vectors.
     """
-    def __init__(self, x, y=0):
+    __slots__ = ()
+
+    def __new__(cls, x, y=0):
         """ init function support two init method"""
         # will take single input as a coordinate
-        if isinstance(x, (list,tuple,vector)):
-            self.x = float(x[0])
-            self.y = float(x[1])
+        if isinstance(x, (list,tuple)):
+            return tuple.__new__(cls, (float(x[0]), float(x[1])))
         #will take two inputs as the values of a coordinate
-        else:
-            self.x = float(x)
-            self.y = float(y)
-        self._hash = hash((self.x,self.y))
+        return tuple.__new__(cls, (float(x), float(y)))
+
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
+
+    def __getnewargs__(self):
+        """ The arguments to create a copy (for pickle) """
+        return (self[0], self[1])
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __str__(self):
         """ override print function output """
@@ -38,37 +53,12 @@ class vector():
         """ override print function output """
         return "v["+str(self.x)+","+str(self.y)+"]"
 
-    def __setitem__(self, index, value):
-        """ 
-        override setitem function 
-        can set value by vector[index]=value
-        """
-        if index==0:
-            self.x=float(value)
-        elif index==1:
-            self.y=float(value)
-        else:
-            self.x=float(value[0])
-            self.y=float(value[1])
-            
-    def __getitem__(self, index):
-        """
-        override getitem function 
-        can get value by value=vector[index]
-        """
-        if index==0:
-            return self.x
-        elif index==1:
-            return self.y
-        else:
-            return self                
-
     def __add__(self, other):
         """
         Override + function (left add)
         Can add by vector(x1,y1)+vector(x2,y2)
         """
-        return vector(self.x + other[0], self.y + other[1])
+        return vector(self[0] + other[0], self[1] + other[1])
 
 
     def __radd__(self, other):
@@ -84,26 +74,26 @@ class vector():
         """
         Override - function (left)
         """
-        return vector(self.x - other[0], self.y - other[1])
+        return vector(self[0] - other[0], self[1] - other[1])
 
     def __rsub__(self, other):
         """
         Override - function (right)
         """
-        return vector(other[0]- self.x, other[1] - self.y)
+        return vector(other[0]- self[0], other[1] - self[1])
 
-    def __hash__(self):
+    def __mul__(self, other):
         """
-        Override - function (hash)
-        Note: This assumes that you DON'T CHANGE THE VECTOR or it will
-        break things.
+        A vector is not repeated like a tuple (use scale)
         """
-        return self._hash
+        return NotImplemented
+
+    __rmul__ = __mul__
 
     def snap_to_grid(self):
-        self.x = self.snap_offset_to_grid(self.x)
-        self.y = self.snap_offset_to_grid(self.y)
-        return self
+        """ Return a copy of the vector on the grid """
+        return vector(self.snap_offset_to_grid(self[0]),
+                      self.snap_offset_to_grid(self[1]))
 
     def snap_offset_to_grid(self, offset):
         """
@@ -152,16 +142,6 @@ class vector():
         return vector(int(round(self.x)),int(round(self.y)))
     
     
-    def __eq__(self, other):
-        """Override the default Equals behavior"""
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
-        return False
-
-    def __ne__(self, other):
-        """Override the default non-equality behavior"""
-        return not self.__eq__(other)
-
     def max(self, other):
         """ Max of both values """
         return vector(max(self.x,other.x),max(self.y,other.y))
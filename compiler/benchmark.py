@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+"""
+Report the run time and the peak memory of building an SRAM and
+writing its netlist and layout, without characterization or DRC/LVS.
+Use it to compare the compiler performance between versions:
+
+benchmark.py example_configs/giant_config_scn4m_subm.py
+"""
+
+import sys
+import time
+import resource
+import globals as g
+
+(OPTS, args) = g.parse_args()
+
+# Check that we are left with a single configuration file as argument.
+if len(args) != 1:
+    print(g.USAGE)
+    sys.exit(2)
+
+import debug
+
+g.init_openram(config_file=args[0], is_unit_test=False)
+g.setup_bitcell()
+# Only the layout and netlist are measured
+OPTS.check_lvsdrc = False
+OPTS.analytical_delay = True
+
+from sram_config import sram_config
+c = sram_config(word_size=OPTS.word_size,
+                num_words=OPTS.num_words,
+                write_size=OPTS.write_size,
+                num_banks=OPTS.num_banks,
+                words_per_row=OPTS.words_per_row,
+                num_spare_rows=OPTS.num_spare_rows,
+                num_spare_cols=OPTS.num_spare_cols)
+
+from sram import sram
+start_time = time.time()
+s = sram(sram_config=c,
+         name=OPTS.output_name)
+build_time = time.time() - start_time
+
+start_time = time.time()
+s.sp_write(OPTS.output_path + s.name + ".sp")
+s.gds_write(OPTS.output_path + s.name + ".gds")
+write_time = time.time() - start_time
+
+# The maximum resident set size is in kilobytes on Linux
+peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+debug.print_raw("Benchmark {0}: build {1:.1f}s write {2:.1f}s peak memory {3:.0f}MB".format(OPTS.output_name,
+                                                                                           build_time,
+                                                                                           write_time,
+                                                                                           peak_memory))
+
+g.end_openram()
@@ -13,6 +13,7 @@ from .lib import *
 from .delay import *
 from .setup_hold import *
 from .functional import *
+from .sram_model import *
 from .simulation import *
 from .measurements import *
 from .model_check import *
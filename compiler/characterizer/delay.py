@@ -46,6 +46,9 @@ class delay(simulation):
         self.targ_read_ports = []
         self.targ_write_ports = []
         self.period = 0
+        # Loads swept in a single simulation and the sweep point results are read from
+        self.sweep_loads = None
+        self.sweep_index = None
         if self.write_size:
             self.num_wmasks = int(self.word_size / self.write_size)
         else:
@@ -426,9 +429,14 @@ class delay(simulation):
         self.stim.inst_model(pins=self.pins,
                              model_name=self.sram.name)
         self.sf.write("\n* SRAM output loads\n")
+        if self.sweep_loads:
+            self.stim.gen_sweep_param("load_cap", [load*1e-15 for load in self.sweep_loads])
+            load_cap = self.stim.get_param_expr("load_cap")
+        else:
+            load_cap = "{0}f".format(self.load)
         for port in self.read_ports:
             for i in range(self.word_size):
-                self.sf.write("CD{0}{1} {2}{0}_{1} 0 {3}f\n".format(port,i,self.dout_name,self.load))
+                self.sf.write("CD{0}{1} {2}{0}_{1} 0 {3}\n".format(port,i,self.dout_name,load_cap))
         
 
     def write_delay_stimulus(self):
@@ -776,7 +784,7 @@ class delay(simulation):
             debug.info(2, "Checking write values for port {}".format(port))            
             write_port_dict = {}
             for measure in self.write_lib_meas:
-                write_port_dict[measure.name] = measure.retrieve_measure(port=port)
+                write_port_dict[measure.name] = measure.retrieve_measure(port=port, sweep_index=self.sweep_index)
 
             if not check_dict_values_is_float(write_port_dict):
                 debug.error("Failed to Measure Write Port Values:\n\t\t{0}".format(write_port_dict),1) 
@@ -799,7 +807,7 @@ class delay(simulation):
             # Check timing for read ports. Power is only checked if it was read correctly
             read_port_dict = {}
             for measure in self.read_lib_meas:
-                read_port_dict[measure.name] = measure.retrieve_measure(port=port)
+                read_port_dict[measure.name] = measure.retrieve_measure(port=port, sweep_index=self.sweep_index)
                 
             if not self.check_valid_delays(read_port_dict):
                 return (False,{})
@@ -814,7 +822,7 @@ class delay(simulation):
     def check_sen_measure(self, port):
         """Checks that the sen occurred within a half-period"""
         
-        sen_val = self.sen_meas.retrieve_measure(port=port)
+        sen_val = self.sen_meas.retrieve_measure(port=port, sweep_index=self.sweep_index)
         debug.info(2,"s_en delay={}ns".format(sen_val))
         if self.sen_meas.meta_add_delay:
             max_delay = self.period/2
@@ -832,7 +840,7 @@ class delay(simulation):
         bl_vals = {}
         br_vals = {}
         for meas in self.bitline_volt_meas:
-            val = meas.retrieve_measure(port=port)
+            val = meas.retrieve_measure(port=port, sweep_index=self.sweep_index)
             if self.bl_name == meas.targ_name_no_port:
                 bl_vals[meas.meta_str] = val
             elif self.br_name == meas.targ_name_no_port: 
@@ -843,7 +851,7 @@ class delay(simulation):
         dout_success = True
         bl_success = False
         for meas in self.dout_volt_meas:
-            val = meas.retrieve_measure(port=port)
+            val = meas.retrieve_measure(port=port, sweep_index=self.sweep_index)
             debug.info(2,"{}={}".format(meas.name, val))
             debug.check(type(val)==float, "Error retrieving numeric measurement: {0} {1}".format(meas.name,val))
 
@@ -872,7 +880,7 @@ class delay(simulation):
         success = False
         for polarity, meas_list in bit_measures.items():
             for meas in meas_list:
-                val = meas.retrieve_measure(port=port)
+                val = meas.retrieve_measure(port=port, sweep_index=self.sweep_index)
                 debug.info(2,"{}={}".format(meas.name, val))
                 if type(val) != float:
                     continue
@@ -977,9 +985,10 @@ class delay(simulation):
         
         feasible_period = ub_period = self.period
         lb_period = 0.0
-        target_period = 0.5 * (ub_period + lb_period)
+        # Warm start the first port from the analytical model
+        target_period = self.estimate_min_period()
         
-        # Find the minimum period for all ports. Start at one port and perform binary search then use that delay as a starting position.
+        # Find the minimum period for all ports. Start at one port and perform the search then use that delay as a starting position.
         # For testing purposes, only checks read ports.
         for port in self.read_ports:
             target_period = self.find_min_period_one_port(feasible_delays, port, lb_period, ub_period, target_period)
@@ -996,43 +1005,92 @@ class delay(simulation):
         """
         Searches for the smallest period with output delays being within 5% of 
         long period. For the current logic to characterize multiport, bounds are required as an input.
+        Each round simulates num_threads candidate periods concurrently which shrinks the
+        bracket by a factor of num_threads+1 (a binary search for a single thread).
+        The first round is centered on target_period when it is inside the bracket.
         """
 
-        # previous_period = ub_period = self.period
-        # ub_period = self.period
-        # lb_period = 0.0
-        # target_period = 0.5 * (ub_period + lb_period)
-        
-        # Binary search algorithm to find the min period (max frequency) of input port
+        num_candidates = max(1, OPTS.num_threads)
         time_out = 25
         # Write ports are assumed non-critical to timing, so the first available is used
         self.targ_write_ports = [self.write_ports[0]]
         self.targ_read_ports = [port]
+        if target_period == None or not (lb_period <= target_period < ub_period):
+            target_period = 0.5 * (ub_period + lb_period)
+        candidates = self.get_centered_candidate_periods(target_period, lb_period, ub_period, num_candidates)
         while True:
             time_out -= 1
             if (time_out <= 0):
                 debug.error("Timed out, could not converge on minimum period.",2)
 
-            self.period = target_period
-            debug.info(1, "MinPeriod Search Port {3}: {0}ns (ub: {1} lb: {2})".format(target_period,
+            debug.info(1, "MinPeriod Search Port {3}: {0}ns (ub: {1} lb: {2})".format(candidates,
                                                                                       ub_period,
                                                                                       lb_period,
                                                                                       port))
 
-            if self.try_period(feasible_delays):
-                ub_period = target_period
-            else:
-                lb_period = target_period
+            # ub_period is always feasible. lb_period is the largest failing period below it.
+            passed = self.try_periods(candidates, feasible_delays)
+            for (period, success) in zip(candidates, passed):
+                if success:
+                    ub_period = min(ub_period, period)
+            for (period, success) in zip(candidates, passed):
+                if not success and period < ub_period:
+                    lb_period = max(lb_period, period)
 
             if relative_compare(ub_period, lb_period, error_tolerance=0.05):
-                # ub_period is always feasible.
+                self.period = ub_period
                 return ub_period
                 
-            # Update target
-            target_period = 0.5 * (ub_period + lb_period)
-            # key=input("press return to continue")
+            # Update targets by splitting the bracket evenly
+            step = (ub_period - lb_period) / (num_candidates + 1)
+            candidates = [lb_period + step * (i + 1) for i in range(num_candidates)]
+
+    def get_centered_candidate_periods(self, target_period, lb_period, ub_period, num_candidates):
+        """
+        Candidate periods for the first search round spaced by the 5% convergence tolerance
+        around a target period and clipped to the [lb_period, ub_period) bracket.
+        """
+
+        step = 0.05 * target_period
+        candidates = set()
+        for i in range(num_candidates):
+            period = target_period + step * (i - (num_candidates - 1) / 2)
+            if lb_period <= period < ub_period:
+                candidates.add(period)
+        if len(candidates) == 0:
+            candidates.add(target_period)
+        return sorted(candidates)
+
+    def try_periods(self, periods, feasible_delays):
+        """
+        Simulates each period with its own stimulus and output files (concurrently if
+        num_threads>1) and returns whether each of them works.
+        """
+
+        return parallel_map(self.try_candidate_period, [(period, feasible_delays) for period in periods], "min_period")
+
+    def try_candidate_period(self, period, feasible_delays):
+        """ Sets the period and checks it with try_period. """
+
+        self.period = period
+        return self.try_period(feasible_delays)
+
+    def estimate_min_period(self):
+        """
+        Estimate of the minimum period (double the read delay) from the analytical model
+        for the current load and slew. Returns None if the model cannot be evaluated.
+        """
+
+        try:
+            bl_path = self.get_analytical_bl_path(self.read_ports[0])
+            total_delay = self.sum_delays(self.graph.get_timing(bl_path, self.corner, self.slew, self.load))
+        except (IndexError, KeyError, AssertionError):
+            debug.info(1, "Could not estimate the minimum period with the analytical model.")
+            return None
+        estimate = 2 * total_delay.delay / 1e3
+        debug.info(1, "Analytical minimum period estimate: {0}ns".format(estimate))
+        return estimate
 
-        
     def try_period(self, feasible_delays):
         """ 
         This tries to simulate a period and checks if the result
@@ -1101,12 +1159,14 @@ class delay(simulation):
         if OPTS.trim_netlist:
             self.trim_sp_file = "{}reduced.sp".format(OPTS.openram_temp)
             self.trimsp=trim_spice(self.sp_file, self.trim_sp_file)
-            self.trimsp.set_configuration(self.num_banks,
-                                          self.num_rows,
-                                          self.num_cols,
+            self.trimsp.set_configuration(self.sram.num_banks,
+                                          self.sram.num_rows,
+                                          self.sram.num_cols,
                                           self.word_size,
-                                          self.num_spare_rows)
-            self.trimsp.trim(self.probe_address,self.probe_data)
+                                          self.num_spare_rows,
+                                          (self.sram.bitcell.width, self.sram.bitcell.height))
+            # The inverse address is also accessed by the test cycles
+            self.trimsp.trim(self.probe_address,self.probe_data,[self.calculate_inverse_address()])
         else:
             # The non-reduced netlist file when it is disabled
             self.trim_sp_file = "{}sram.sp".format(OPTS.openram_temp)
@@ -1175,23 +1235,65 @@ class delay(simulation):
         # Set the target simulation ports to all available ports. This make sims slower but failed sims exit anyways.        
         self.targ_read_ports = self.read_ports
         self.targ_write_ports = self.write_ports
-        for slew in slews:
-            for load in loads:
-                self.set_load_slew(load,slew)
-                # Find the delay, dynamic power, and leakage power of the trimmed array.
-                (success, delay_results) = self.run_delay_simulation()
-                debug.check(success,"Couldn't run a simulation. slew={0} load={1}\n".format(self.slew,self.load))
-                debug.info(1, "Simulation Passed: Port {0} slew={1} load={2}".format("All", self.slew,self.load))
-                # The results has a dict for every port but dicts can be empty (e.g. ports were not targeted).
-                for port in self.all_ports:
-                    for mname,value in delay_results[port].items():
-                        if "power" in mname:
-                            # Subtract partial array leakage and add full array leakage for the power measures
-                            measure_data[port][mname].append(value + leakage_offset)
-                        else:
-                            measure_data[port][mname].append(value)
+        # The points are independent, so each is simulated with its own stimulus and
+        # output files (concurrently if num_threads>1). Up to num_sweep_points loads
+        # share a single simulator invocation. Results keep the slew-major order.
+        sweep_size = max(1, OPTS.num_sweep_points)
+        load_sweeps = [(slew, loads[i:i+sweep_size]) for slew in slews for i in range(0, len(loads), sweep_size)]
+        sweep_results = parallel_map(self.simulate_load_sweep, load_sweeps, "load_slew")
+        load_slew_points = [(load, slew) for (slew, sweep_loads) in load_sweeps for load in sweep_loads]
+        point_results = [result for results in sweep_results for result in results]
+        for ((load, slew), (success, delay_results)) in zip(load_slew_points, point_results):
+            debug.check(success,"Couldn't run a simulation. slew={0} load={1}\n".format(slew,load))
+            debug.info(1, "Simulation Passed: Port {0} slew={1} load={2}".format("All", slew,load))
+            # The results has a dict for every port but dicts can be empty (e.g. ports were not targeted).
+            for port in self.all_ports:
+                for mname,value in delay_results[port].items():
+                    if "power" in mname:
+                        # Subtract partial array leakage and add full array leakage for the power measures
+                        measure_data[port][mname].append(value + leakage_offset)
+                    else:
+                        measure_data[port][mname].append(value)
         return measure_data
-    
+
+    def simulate_load_sweep(self, slew, loads):
+        """
+        Find the delay, dynamic power, and leakage power of the trimmed array for
+        the loads at one slew. Returns the run_delay_simulation() result of each load.
+        """
+
+        if len(loads) == 1:
+            self.set_load_slew(loads[0],slew)
+            return [self.run_delay_simulation()]
+
+        self.set_load_slew(max(loads),slew)
+        return self.run_delay_sweep(loads)
+
+    def run_delay_sweep(self, loads):
+        """
+        Simulates all loads in a single simulator invocation (.ALTER or a
+        .control loop) and checks the measurements of each sweep point.
+        """
+
+        debug.check(self.period > 0, "Target simulation period non-positive") 
+
+        self.sweep_loads = loads
+        try:
+            self.write_delay_stimulus()
+        finally:
+            self.sweep_loads = None
+
+        self.stim.run_sim()
+
+        results = []
+        for (sweep_index, load) in enumerate(loads):
+            # The load is only used for reporting here
+            self.load = load
+            self.sweep_index = sweep_index
+            results.append(self.check_measurements())
+        self.sweep_index = None
+        return results
+
     def calculate_inverse_address(self):
         """Determine dummy test address based on probe address and column mux size."""
         
@@ -1359,13 +1461,7 @@ class delay(simulation):
         self.set_internal_spice_names()
         self.create_measurement_names()
         
-        port = self.read_ports[0]
-        self.graph.get_all_paths('{}{}'.format("clk", port), 
-                                 '{}{}_{}'.format(self.dout_name, port, self.probe_data))
-        
-        # Select the path with the bitline (bl)
-        bl_name,br_name = self.get_bl_name(self.graph.all_paths, port)
-        bl_path = [path for path in self.graph.all_paths if bl_name in path][0]
+        bl_path = self.get_analytical_bl_path(self.read_ports[0])
         
         # Set delay/power for slews and loads
         port_data = self.get_empty_measure_data_dict()
@@ -1403,6 +1499,16 @@ class delay(simulation):
         
         return (sram_data,port_data)        
 
+    def get_analytical_bl_path(self, port):
+        """Returns the timing graph path from the clock to the probed data output through the bitline (bl)"""
+
+        self.graph.get_all_paths('{}{}'.format("clk", port), 
+                                 '{}{}_{}'.format(self.dout_name, port, self.probe_data))
+        
+        # Select the path with the bitline (bl)
+        bl_name,br_name = self.get_bl_name(self.graph.all_paths, port)
+        return [path for path in self.graph.all_paths if bl_name in path][0]
+
     def analytical_power(self, slews, loads):
         """Get the dynamic and leakage power from the SRAM"""
         
@@ -8,14 +8,20 @@
 import collections
 import debug
 import random
+import re
+import numpy as np
 from .stimuli import *
 from .charutils import *
 from globals import OPTS
 from .simulation import simulation
+from .sram_model import sram_model
 # from .delay import delay
 import graph_util
 from sram_factory import factory
 
+# The dout measurement names: v<dout port>_<bit>ck<check>
+dout_measure_re = re.compile(r"v(\w+)_(\d+)ck(\d+)$")
+
 
 class functional(simulation):
     """
@@ -26,9 +32,13 @@ class functional(simulation):
     def __init__(self, sram, spfile, corner):
         simulation.__init__(self, sram, spfile, corner)
         
-        # Seed the characterizer with a constant seed for unit tests
+        # Seed the characterizer with a constant seed for unit tests. The stimulus
+        # has its own generator so that the shards do not change the random
+        # numbers of the rest of the run.
         if OPTS.is_unit_test:
-            random.seed(12345)
+            self.rng = random.Random(12345)
+        else:
+            self.rng = random.Random()
 
         if self.write_size:
             self.num_wmasks = int(self.word_size / self.write_size)
@@ -50,16 +60,31 @@ class functional(simulation):
         
         # Number of checks can be changed
         self.num_cycles = 15
+        self.reset_sequence()
+
+    def reset_sequence(self):
+        """ Clear the operations and checks of the stimulus. """
+        self.set_stimulus_variables()
         # This is to have ordered keys for random selection
         self.stored_words = collections.OrderedDict()
+        # Words that are set with initial conditions on the bitcells
+        self.preloaded_words = collections.OrderedDict()
         self.read_check = []
         self.read_results = []
+        self.check = 0
+        # The cycles with read checks that the behavioral model finds
+        self.check_cycles = []
 
     def run(self, feasible_period=None):
         if feasible_period: #period defaults to tech.py feasible period otherwise.
             self.period = feasible_period
+        if OPTS.num_functional_shards > 1:
+            return self.run_shards(OPTS.num_functional_shards)
         # Generate a random sequence of reads and writes
         self.create_random_memory_sequence()
+        (success, error) = self.check_sequence()
+        if not success:
+            return (0, error)
     
         # Run SPICE simulation
         self.write_functional_stimulus()
@@ -73,6 +98,163 @@ class functional(simulation):
         # Check read values with written values. If the values do not match, return an error.
         return self.check_stim_results()
 
+    def run_shards(self, num_shards):
+        """
+        Split the cycles into independent segments that each start from their own
+        seed and preloaded memory contents. The segments are simulated in separate
+        scratch directories (concurrently if num_threads>1) and pass if all of them pass.
+        """
+        shard_list = self.get_shards(num_shards)
+        num_shards = len(shard_list)
+
+        (total_cycles, rng) = (self.num_cycles, self.rng)
+        results = parallel_map(self.run_shard, shard_list, "functional")
+        # Serial shards run in this process so restore its state
+        (self.num_cycles, self.rng) = (total_cycles, rng)
+        self.reset_sequence()
+
+        errors = []
+        for ((shard, seed, num_cycles), (success, error)) in zip(shard_list, results):
+            if not success:
+                errors.append("Shard {0} (seed {1}, {2} cycles): {3}".format(shard, seed, num_cycles, error))
+        debug.info(1, "{0} of {1} functional shards passed.".format(num_shards - len(errors), num_shards))
+
+        if len(errors) > 0:
+            return (0, "\n".join(errors))
+        return (1, "SUCCESS")
+
+    def get_shards(self, num_shards):
+        """ The (shard, seed, number of cycles) of every segment of the cycles. """
+        num_shards = min(num_shards, self.num_cycles)
+        shard_list = []
+        for shard in range(num_shards):
+            num_cycles = self.num_cycles // num_shards + int(shard < self.num_cycles % num_shards)
+            shard_list.append((shard, self.rng.randint(0, 2**31 - 1), num_cycles))
+        return shard_list
+
+    def create_shard_sequence(self, seed, num_cycles):
+        """ Generate the preloaded words and the stimulus of a segment from its seed. """
+        self.rng = random.Random(seed)
+        self.num_cycles = num_cycles
+        self.reset_sequence()
+
+        self.preload_memory(num_cycles)
+        self.create_random_memory_sequence()
+
+    def run_shard(self, shard, seed, num_cycles):
+        """ Simulate one segment of a sharded functional test. """
+        debug.info(2, "Functional shard {0} with seed {1} and {2} cycles".format(shard, seed, num_cycles))
+        self.create_shard_sequence(seed, num_cycles)
+        (success, error) = self.check_sequence()
+        if not success:
+            return (0, error)
+        if len(self.check_cycles) == 0:
+            debug.info(2, "Functional shard {0} has no reads to check and is not simulated.".format(shard))
+            return (1, "SUCCESS")
+
+        self.write_functional_stimulus()
+        self.stim.run_sim()
+
+        (success, error) = self.read_stim_results()
+        if not success:
+            return (0, error)
+        return self.check_stim_results()
+
+    def preload_memory(self, num_words):
+        """
+        Generate random words at random addresses which are stored in the bitcells
+        with initial conditions so that reads can check them without writing first.
+        """
+        self.preloaded_words = collections.OrderedDict()
+        # Spare columns are not muxed so the words of a row share their bits
+        spare_bits = {}
+        for i in range(num_words):
+            addr = self.gen_addr()
+            word = self.gen_data()
+            if self.num_spare_cols:
+                row = int(addr, 2) >> self.sram.col_addr_size
+                # The word string has the spare bits first
+                word = spare_bits.setdefault(row, word[:self.num_spare_cols]) + word[self.num_spare_cols:]
+            self.preloaded_words[addr] = word
+        self.stored_words.update(self.preloaded_words)
+
+    def write_preloaded_words(self):
+        """ Write the initial conditions of the bitcells of the preloaded words. """
+        self.sf.write("\n* Preloaded memory contents\n")
+        for (addr, word) in self.preloaded_words.items():
+            # The low address bits select the column of a word
+            addr_value = int(addr, 2)
+            row = addr_value >> self.sram.col_addr_size
+            col_address = addr_value & (self.words_per_row - 1)
+            # The word string has the MSB first
+            for (bit, value) in enumerate(reversed(word)):
+                if bit < self.word_size:
+                    col = self.words_per_row * bit + col_address
+                else:
+                    # Spare columns are after the data columns and not muxed
+                    col = self.words_per_row * self.word_size + bit - self.word_size
+                (q_name, qbar_name) = self.get_bit_name(row, col)
+                if value == "1":
+                    (q_voltage, qbar_voltage) = (self.vdd_voltage, self.gnd_voltage)
+                else:
+                    (q_voltage, qbar_voltage) = (self.gnd_voltage, self.vdd_voltage)
+                self.stim.gen_ic(q_name, q_voltage)
+                self.stim.gen_ic(qbar_name, qbar_voltage)
+
+    def get_cycle_ops(self, cycle):
+        """ The operations of all the ports in a cycle of the stimulus for the sram_model. """
+        ops = {}
+        for port in self.all_ports:
+            if self.csb_values[port][cycle]:
+                continue
+            addr = int(self.addr_value[port][cycle], 2)
+            if port not in self.write_ports or (port in self.readwrite_ports and self.web_values[port][cycle]):
+                ops[port] = ("read", addr)
+                continue
+            wmask = None
+            if self.num_wmasks:
+                wmask = int(self.wmask_value[port][cycle], 2)
+            spare_wen = None
+            if self.num_spare_cols:
+                spare_wen = int(self.spare_wen_value[port][cycle], 2)
+            ops[port] = ("write", addr, int(self.data_value[port][cycle], 2), wmask, spare_wen)
+        return ops
+
+    def check_sequence(self):
+        """
+        Run the stimulus through the behavioral model before simulating it and check
+        that it has no port conflicts and that the expected value of every read check
+        is the value the model reads. The cycles with read checks are saved so that
+        the simulation can stop after the last one.
+        """
+        model = sram_model(self.sram)
+        for (addr, word) in self.preloaded_words.items():
+            model.preload(int(addr, 2), int(word, 2))
+
+        errors = []
+        results = []
+        checks = iter(self.read_check)
+        for cycle in range(len(self.cycle_times)):
+            (douts, conflicts) = model.cycle(self.get_cycle_ops(cycle))
+            results.append((douts, conflicts))
+            errors.extend(conflicts)
+            # The read checks are in the order of the cycles and ports
+            for port in sorted(douts.keys()):
+                (value, known) = douts[port]
+                (word, dout_port, eo_period, check) = next(checks)
+                if known != model.word_mask or int(word, 2) != value:
+                    errors.append("Cycle {0}: expected {1} value {2} does not match model value {3:0{4}b} with known bits {5:0{4}b}".format(cycle,
+                                                                                                                                             dout_port,
+                                                                                                                                             word,
+                                                                                                                                             value,
+                                                                                                                                             model.num_bits,
+                                                                                                                                             known))
+        if len(errors) > 0:
+            return (0, "FAILED: invalid stimulus\n" + "\n".join(errors))
+        self.check_cycles = model.get_check_cycles(results)
+        debug.info(2, "Stimulus matches the behavioral model.")
+        return (1, "SUCCESS")
+
     def check_lengths(self):
         """ Do a bunch of assertions. """
 
@@ -106,8 +288,13 @@ class functional(simulation):
         self.add_noop_all_ports(comment)
 
         # 1. Write all the write ports first to seed a bunch of locations.
+        # Two ports cannot write to the same address.
+        w_addrs = []
         for port in self.write_ports:
             addr = self.gen_addr()
+            while addr in w_addrs:
+                addr = self.gen_addr()
+            w_addrs.append(addr)
             word = self.gen_data()
             comment = self.gen_cycle_comment("write", word, addr, "1" * self.num_wmasks, port, self.t_current)
             self.add_write_one_port(comment, addr, word, "1" * self.num_wmasks, port)
@@ -141,20 +328,22 @@ class functional(simulation):
         # write masks (if applicable)
         for i in range(self.num_cycles):
             w_addrs = []
+            r_addrs = []
             for port in self.all_ports:
                 if port in self.readwrite_ports:
-                    op = random.choice(rw_ops)
+                    op = self.rng.choice(rw_ops)
                 elif port in self.write_ports:
-                    op = random.choice(w_ops)
+                    op = self.rng.choice(w_ops)
                 else:
-                    op = random.choice(r_ops)
+                    op = self.rng.choice(r_ops)
                     
                 if op == "noop":
                     self.add_noop_one_port(port)
                 elif op == "write":
                     addr = self.gen_addr()
-                    # two ports cannot write to the same address
-                    if addr in w_addrs:
+                    # two ports cannot write to the same address and
+                    # an address that another port reads cannot be written
+                    if addr in w_addrs or addr in r_addrs:
                         self.add_noop_one_port(port)
                     else:
                         word = self.gen_data()
@@ -165,8 +354,9 @@ class functional(simulation):
                 elif op == "partial_write":
                     # write only to a word that's been written to
                     (addr, old_word) = self.get_data()
-                    # two ports cannot write to the same address
-                    if addr in w_addrs:
+                    # two ports cannot write to the same address and
+                    # an address that another port reads cannot be written
+                    if addr in w_addrs or addr in r_addrs:
                         self.add_noop_one_port(port)
                     else:
                         word = self.gen_data()
@@ -177,7 +367,7 @@ class functional(simulation):
                         self.stored_words[addr] = new_word
                         w_addrs.append(addr)
                 else:
-                    (addr, word) = random.choice(list(self.stored_words.items()))
+                    (addr, word) = self.rng.choice(list(self.stored_words.items()))
                     # The write driver is not sized sufficiently to drive through the two
                     # bitcell access transistors to the read port. So, for now, we do not allow
                     # a simultaneous write and read to the same address on different ports. This
@@ -188,6 +378,7 @@ class functional(simulation):
                         comment = self.gen_cycle_comment("read", word, addr, "0" * self.num_wmasks, port, self.t_current)
                         self.add_read_one_port(comment, addr, port)
                         self.add_read_check(word, port)
+                        r_addrs.append(addr)
                 
             self.cycle_times.append(self.t_current)
             self.t_current += self.period
@@ -221,43 +412,76 @@ class functional(simulation):
         self.check += 1
         
     def read_stim_results(self):
-        # Extract dout values from spice timing.lis
-        for (word, dout_port, eo_period, check) in self.read_check:
-            sp_read_value = ""
-            for bit in range(self.word_size + self.num_spare_cols):
-                value = parse_spice_list("timing", "v{0}.{1}ck{2}".format(dout_port.lower(), bit, check))
-                if value > self.v_high:
-                    sp_read_value = "1" + sp_read_value
-                elif value < self.v_low:
-                    sp_read_value = "0" + sp_read_value
-                else:
-                    error ="FAILED: {0}_{1} value {2} at time {3}n does not fall within noise margins <{4} or >{5}.".format(dout_port,
-                                                                                                                            bit,
-                                                                                                                            value,
-                                                                                                                            eo_period,
-                                                                                                                            self.v_low,
-                                                                                                                            self.v_high)
-                    return (0, error)
-                    
-            self.read_results.append([sp_read_value, dout_port, eo_period, check])                    
+        """
+        Extract all of the dout measurements in a single pass into a matrix with a
+        row per read check and a column per data bit and threshold them to logic values.
+        If any of the values do not fall within the noise margins, return the errors.
+        """
+        num_bits = self.word_size + self.num_spare_cols
+        check_rows = {check: row for (row, (word, dout_port, eo_period, check)) in enumerate(self.read_check)}
+        values = np.full((len(self.read_check), num_bits), np.nan)
+        for (name, value) in parse_spice_measurements("timing").items():
+            match = dout_measure_re.match(name)
+            if not match or type(value) != float:
+                continue
+            (bit, check) = (int(match.group(2)), int(match.group(3)))
+            if check in check_rows and bit < num_bits:
+                values[check_rows[check], bit] = value
+
+        # Failed measurements are NaN which is neither high nor low
+        high = values > self.v_high
+        low = values < self.v_low
+        self.read_bits = high
+        self.read_results = []
+        for (row, (word, dout_port, eo_period, check)) in enumerate(self.read_check):
+            # The bit strings have the MSB first
+            sp_read_value = "".join("1" if high[row, bit] else "0" if low[row, bit] else "X"
+                                    for bit in reversed(range(num_bits)))
+            self.read_results.append([sp_read_value, dout_port, eo_period, check])
+
+        errors = []
+        for (row, bit) in np.argwhere(~(high | low)):
+            (word, dout_port, eo_period, check) = self.read_check[row]
+            error = "FAILED: {0}_{1} value {2} at time {3}n does not fall within noise margins <{4} or >{5}.".format(dout_port,
+                                                                                                                    bit,
+                                                                                                                    values[row, bit],
+                                                                                                                    eo_period,
+                                                                                                                    self.v_low,
+                                                                                                                    self.v_high)
+            errors.append(error)
+        if len(errors) > 0:
+            return (0, "\n".join(errors))
         return (1, "SUCCESS")
-        
+
     def check_stim_results(self):
-        for i in range(len(self.read_check)):
-            if self.read_check[i][0] != self.read_results[i][0]:
-                error = "FAILED: {0} value {1} does not match written value {2} read during cycle {3} at time {4}n".format(self.read_results[i][1],
-                                                                                                                           self.read_results[i][0],
-                                                                                                                           self.read_check[i][0],
-                                                                                                                           int((self.read_results[i][2]-self.period)/self.period),
-                                                                                                                           self.read_results[i][2])
-                return(0, error)
-        return(1, "SUCCESS")
+        """
+        Compare the read values with the written values of all the read checks at once.
+        Each check that does not match is reported with the bits that differ.
+        """
+        num_bits = self.word_size + self.num_spare_cols
+        expected = np.array([[word[num_bits - 1 - bit] == "1" for bit in range(num_bits)]
+                             for (word, dout_port, eo_period, check) in self.read_check], dtype=bool)
+        mismatches = self.read_bits != expected.reshape(self.read_bits.shape)
+
+        errors = []
+        for row in np.flatnonzero(mismatches.any(axis=1)):
+            (read_value, dout_port, eo_period, check) = self.read_results[row]
+            error = "FAILED: {0} value {1} does not match written value {2} read during cycle {3} at time {4}n (bits {5})".format(dout_port,
+                                                                                                                                 read_value,
+                                                                                                                                 self.read_check[row][0],
+                                                                                                                                 int((eo_period - self.period) / self.period),
+                                                                                                                                 eo_period,
+                                                                                                                                 np.flatnonzero(mismatches[row]).tolist())
+            errors.append(error)
+        if len(errors) > 0:
+            return (0, "\n".join(errors))
+        return (1, "SUCCESS")
 
     def gen_wmask(self):
         wmask = ""
         # generate a random wmask
         for bit in range(self.num_wmasks):
-            rand = random.randint(0, 1)
+            rand = self.rng.randint(0, 1)
             wmask += str(rand)
         # prevent the wmask from having all bits on or off (this is not a partial write)
         all_zeroes = True
@@ -268,10 +492,10 @@ class functional(simulation):
             elif wmask[bit]=="1":
                 all_zeroes = False
         if all_zeroes:
-            index = random.randint(0, self.num_wmasks - 1)
+            index = self.rng.randint(0, self.num_wmasks - 1)
             wmask = wmask[:index] + "1" + wmask[index + 1:]
         elif all_ones:
-            index = random.randint(0, self.num_wmasks - 1)
+            index = self.rng.randint(0, self.num_wmasks - 1)
             wmask = wmask[:index] + "0" + wmask[index + 1:]
         # wmask must be reversed since a python list goes right to left and sram bits go left to right.
         return wmask[::-1]
@@ -279,10 +503,10 @@ class functional(simulation):
     def gen_data(self):
         """ Generates a random word to write. """
         if not self.num_spare_cols:
-            random_value = random.randint(0, (2 ** self.word_size) - 1)
+            random_value = self.rng.randint(0, (2 ** self.word_size) - 1)
         else:
-            random_value1 = random.randint(0, (2 ** self.word_size) - 1)
-            random_value2 = random.randint(0, (2 ** self.num_spare_cols) - 1)
+            random_value1 = self.rng.randint(0, (2 ** self.word_size) - 1)
+            random_value2 = self.rng.randint(0, (2 ** self.num_spare_cols) - 1)
             random_value = random_value1 + random_value2
         data_bits = self.convert_to_bin(random_value, False)
         return data_bits
@@ -290,16 +514,16 @@ class functional(simulation):
     def gen_addr(self):
         """ Generates a random address value to write to. """
         if self.num_spare_rows==0:
-            random_value = random.randint(0, (2 ** self.addr_size) - 1)
+            random_value = self.rng.randint(0, (2 ** self.addr_size) - 1)
         else:
-            random_value = random.randint(0, ((2 ** (self.addr_size - 1) - 1)) + (self.num_spare_rows * self.words_per_row))
+            random_value = self.rng.randint(0, ((2 ** (self.addr_size - 1) - 1)) + (self.num_spare_rows * self.words_per_row))
         addr_bits = self.convert_to_bin(random_value, True)
         return addr_bits
         
     def get_data(self):
         """ Gets an available address and corresponding word. """
         # Used for write masks since they should be writing to previously written addresses
-        addr = random.choice(list(self.stored_words.keys()))
+        addr = self.rng.choice(list(self.stored_words.keys()))
         word = self.stored_words[addr]
         return (addr, word)
         
@@ -342,6 +566,9 @@ class functional(simulation):
                 sig_name="{0}{1}_{2} ".format(self.dout_name, port, bit)
                 self.sf.write("CD{0}{1} {2} 0 {3}f\n".format(port, bit, sig_name, self.load))
 
+        if self.preloaded_words:
+            self.write_preloaded_words()
+
         # Write important signals to stim file
         self.sf.write("\n\n* Important signals for debug\n")
         self.sf.write("* bl: {}\n".format(self.bl_name))
@@ -417,9 +644,20 @@ class functional(simulation):
                                          t_intital=t_intital,
                                          t_final=t_final)
         
-        self.stim.write_control(self.cycle_times[-1] + self.period)
+        self.stim.write_control(self.get_end_time())
         self.sf.close()
 
+    def get_end_time(self):
+        """
+        The end of the simulation. The cycles after the one that measures the
+        last read check do not change any checked value so they are not simulated.
+        """
+        if len(self.check_cycles) == 0:
+            return self.cycle_times[-1] + self.period
+        # A read is measured at the start of the next cycle
+        last_cycle = min(self.check_cycles[-1] + 1, len(self.cycle_times) - 1)
+        return self.cycle_times[last_cycle] + self.period
+
     # FIXME: refactor to share with delay.py
     def add_graph_exclusions(self):
         """Exclude portions of SRAM from timing graph which are not relevant"""
@@ -463,9 +701,9 @@ class functional(simulation):
         self.q_name, self.qbar_name = self.get_bit_name()
         debug.info(2, "q name={}\nqbar name={}".format(self.q_name, self.qbar_name))
         
-    def get_bit_name(self):
-        """ Get a bit cell name """
-        (cell_name, cell_inst) = self.sram.get_cell_name(self.sram.name, 0, 0)
+    def get_bit_name(self, row=0, col=0):
+        """ Get the storage node names of a bit cell """
+        (cell_name, cell_inst) = self.sram.get_cell_name(self.sram.name, row, col)
         storage_names = cell_inst.mod.get_storage_net_names()
         debug.check(len(storage_names) == 2, ("Only inverting/non-inverting storage nodes"
                                               "supported for characterization. Storage nets={}").format(storage_names))
@@ -96,9 +96,10 @@ class lib:
             corner_set.add((max_process, nom_supply, nom_temperature))
 
         # Enforce that nominal corner is the first to be characterized
+        # and keep the remaining corners in a deterministic order
         self.add_corner(*nom_corner)
         corner_set.remove(nom_corner)
-        for corner_tuple in corner_set:
+        for corner_tuple in sorted(corner_set):
             self.add_corner(*corner_tuple)
 
     def add_corner(self, proc, volt, temp):
@@ -116,17 +117,46 @@ class lib:
         
     def characterize_corners(self):
         """ Characterize the list of corners. """
-        debug.info(1,"Characterizing corners: " + str(self.corners))        
-        for (self.corner,lib_name) in zip(self.corners,self.lib_files):
-            debug.info(1,"Corner: " + str(self.corner))
-            (self.process, self.voltage, self.temperature) = self.corner
-            self.lib = open(lib_name, "w")
-            debug.info(1,"Writing to {0}".format(lib_name))
-            self.corner_name = lib_name.replace(self.out_dir,"").replace(".lib","")
-            self.characterize()
-            self.lib.close()
-            self.parse_info(self.corner,lib_name)
-    
+        debug.info(1,"Characterizing corners: " + str(self.corners))
+        # The setup/hold times are only found for the nominal (first) corner
+        # and are shared by all corners, so find them before splitting up the work.
+        self.corner = self.corners[0]
+        self.compute_setup_hold()
+
+        # Each corner is simulated in its own scratch directory (and process if num_threads>1)
+        corner_args = list(zip(self.corners, self.lib_files))
+        datasheet_rows = parallel_map(self.characterize_corner, corner_args, "corner")
+
+        # Merge the datasheet rows in corner order regardless of completion order
+        datasheet = open(OPTS.openram_temp + '/datasheet.info', 'a+')
+        for row in datasheet_rows:
+            datasheet.write(row)
+        datasheet.close()
+
+        cache.print_stats()
+
+    def characterize_corner(self, corner, lib_name):
+        """ Characterize a single corner and return its datasheet.info row. """
+        datasheet_name = OPTS.openram_temp + '/datasheet.info'
+        if os.path.exists(datasheet_name):
+            os.remove(datasheet_name)
+
+        self.corner = corner
+        debug.info(1,"Corner: " + str(self.corner))
+        (self.process, self.voltage, self.temperature) = self.corner
+        self.lib = open(lib_name, "w")
+        debug.info(1,"Writing to {0}".format(lib_name))
+        self.corner_name = lib_name.replace(self.out_dir,"").replace(".lib","")
+        self.characterize()
+        self.lib.close()
+        self.parse_info(self.corner,lib_name)
+
+        # parse_info writes to the datasheet.info of the scratch directory
+        datasheet = open(datasheet_name, 'r')
+        row = datasheet.read()
+        datasheet.close()
+        return row
+
     def characterize(self):
         """ Characterize the current corner. """
 
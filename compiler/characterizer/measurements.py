@@ -36,12 +36,12 @@ class spice_measurement(ABC):
         measure_vals = self.get_measure_values(*input_tuple)
         measure_func(stim_obj, *measure_vals)
     
-    def retrieve_measure(self, port=None):
+    def retrieve_measure(self, port=None, sweep_index=None):
         self.port_error_check(port)
         if port != None:
-            value = parse_spice_list("timing", "{0}{1}".format(self.name.lower(), port)) 
+            value = parse_spice_list("timing", "{0}{1}".format(self.name.lower(), port), sweep_index) 
         else:
-            value = parse_spice_list("timing", "{0}".format(self.name.lower())) 
+            value = parse_spice_list("timing", "{0}".format(self.name.lower()), sweep_index) 
         if type(value)!=float or self.measure_scale == None: 
             return value
         else:
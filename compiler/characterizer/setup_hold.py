@@ -17,7 +17,7 @@ from globals import OPTS
 class setup_hold():
     """
     Functions to calculate the setup and hold times of the SRAM
-    (Bisection Methodology)
+    (Bisection Methodology, optionally with several target times per simulation)
     """
 
     def __init__(self, corner):
@@ -39,8 +39,11 @@ class setup_hold():
         self.gnd_voltage = 0
 
 
-    def write_stimulus(self, mode, target_time, correct_value):
-        """Creates a stimulus file for SRAM setup/hold time calculation"""
+    def write_stimulus(self, mode, target_times, correct_value):
+        """
+        Creates a stimulus file for SRAM setup/hold time calculation.
+        Multiple target times are swept within the single simulation.
+        """
 
         # creates and opens the stimulus file for writing
         temp_stim = OPTS.openram_temp + "stim.sp"
@@ -49,6 +52,12 @@ class setup_hold():
 
         self.write_header(correct_value)
 
+        if len(target_times) == 1:
+            target_time = target_times[0]
+        else:
+            self.stim.gen_sweep_param("target_time", target_times)
+            target_time = "target_time"
+
         # instantiate the master-slave d-flip-flop
         self.sf.write("\n* Instantiation of the Master-Slave D-flip-flop\n")
         self.stim.inst_model(pins=self.pins,
@@ -100,7 +109,7 @@ class setup_hold():
         self.stim.gen_pwl(sig_name="data",
                           clk_times=[0, self.period, target_time],
                           data_values=[init_value, start_value, end_value],
-                          period=target_time,
+                          period=self.period,
                           slew=self.constrained_input_slew,
                           setup=0)        
 
@@ -190,7 +199,7 @@ class setup_hold():
 
         # Initial check if reference feasible bound time passes for correct_value, if not, we can't start the search!
         self.write_stimulus(mode=mode, 
-                            target_time=feasible_bound, 
+                            target_times=[feasible_bound], 
                             correct_value=correct_value)
         self.stim.run_sim()
         ideal_clk_to_q = convert_to_float(parse_spice_list("timing", "clk2q_delay"))
@@ -212,34 +221,32 @@ class setup_hold():
                                                                                        2*self.period))
         #raw_input("Press Enter to continue...")
             
+        # Every simulation sweeps evenly spaced target times between the bounds.
+        # A single target time is a bisection.
+        num_targets = max(1, OPTS.num_sweep_points)
         while True:
-            target_time = (feasible_bound + infeasible_bound)/2
+            step = (infeasible_bound - feasible_bound)/(num_targets + 1)
+            target_times = [feasible_bound + step*(i+1) for i in range(num_targets)]
             self.write_stimulus(mode=mode, 
-                                target_time=target_time, 
+                                target_times=target_times, 
                                 correct_value=correct_value)
 
-            debug.info(2,"{0} value: {1} Target time: {2} Infeasible: {3} Feasible: {4}".format(mode,
-                                                                                                correct_value,
-                                                                                                target_time,
-                                                                                                infeasible_bound,
-                                                                                                feasible_bound))
+            debug.info(2,"{0} value: {1} Target times: {2} Infeasible: {3} Feasible: {4}".format(mode,
+                                                                                                 correct_value,
+                                                                                                 target_times,
+                                                                                                 infeasible_bound,
+                                                                                                 feasible_bound))
 
 
             self.stim.run_sim()
-            clk_to_q = convert_to_float(parse_spice_list("timing", "clk2q_delay"))
-            setuphold_time = convert_to_float(parse_spice_list("timing", "setup_hold_time"))
-            if type(clk_to_q)==float and (clk_to_q<1.1*ideal_clk_to_q) and type(setuphold_time)==float:
-                if mode == "SETUP": # SETUP is clk-din, not din-clk
-                    setuphold_time *= -1e9
-                else:
-                    setuphold_time *= 1e9
-
-                debug.info(2,"PASS Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
+            # Target times move toward the infeasible bound, so the first failure ends the search
+            for (sweep_index, target_time) in enumerate(target_times):
+                setuphold_time = self.check_setuphold_time(mode, ideal_clk_to_q, sweep_index)
+                if setuphold_time == None:
+                    infeasible_bound = target_time
+                    break
                 passing_setuphold_time = setuphold_time
                 feasible_bound = target_time
-            else:
-                debug.info(2,"FAIL Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
-                infeasible_bound = target_time
 
             #raw_input("Press Enter to continue...")
             if relative_compare(feasible_bound, infeasible_bound, error_tolerance=0.001):
@@ -251,6 +258,26 @@ class setup_hold():
         return passing_setuphold_time
 
 
+    def check_setuphold_time(self, mode, ideal_clk_to_q, sweep_index):
+        """
+        Checks the result of a sweep point and returns its setup/hold time (in ns)
+        or None if the flop did not capture the data.
+        """
+        clk_to_q = convert_to_float(parse_spice_list("timing", "clk2q_delay", sweep_index))
+        setuphold_time = convert_to_float(parse_spice_list("timing", "setup_hold_time", sweep_index))
+        if type(clk_to_q)==float and (clk_to_q<1.1*ideal_clk_to_q) and type(setuphold_time)==float:
+            if mode == "SETUP": # SETUP is clk-din, not din-clk
+                setuphold_time *= -1e9
+            else:
+                setuphold_time *= 1e9
+
+            debug.info(2,"PASS Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
+            return setuphold_time
+        else:
+            debug.info(2,"FAIL Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
+            return None
+
+
     def setup_LH_time(self):
         """Calculates the setup time for low-to-high transition for a DFF
         """
@@ -0,0 +1,194 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import os
+import re
+import shutil
+import hashlib
+import debug
+from globals import OPTS
+
+
+class sim_cache():
+    """
+    A persistent on-disk cache of simulator output files.
+    Entries are keyed by a content hash of the stimulus file, every file it
+    (recursively) includes and the simulator that is used, so byte-identical
+    simulations are only run once. The least recently used entries are
+    evicted when the cache grows over OPTS.sim_cache_size MB.
+    """
+
+    # The file name of .include/.lib statements
+    include_re = re.compile(rb"^\s*\.(?:include|inc|lib)\s+['\"]?([^'\"\s]+)", re.IGNORECASE)
+
+    def __init__(self):
+        # Digests and included files of the included netlists/models indexed by (path, mtime, size)
+        self.file_contents = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """ Clear the hit/miss counters. """
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        return (self.hits, self.misses)
+
+    def add_stats(self, stats):
+        """ Add the counters of another process (e.g. a characterization worker). """
+        (hits, misses) = stats
+        self.hits += hits
+        self.misses += misses
+
+    def is_enabled(self):
+        return OPTS.sim_cache_path != ""
+
+    def print_stats(self):
+        """ Report the hit/miss statistics of this run. """
+        total = self.hits + self.misses
+        if not self.is_enabled() or total == 0:
+            return
+        debug.print_raw("Simulation cache: {0} hits, {1} misses ({2:.1f}% hit rate) in {3}".format(self.hits,
+                                                                                                   self.misses,
+                                                                                                   100.0 * self.hits / total,
+                                                                                                   OPTS.sim_cache_path))
+
+    def get_key(self, stim_file):
+        """ Hash the stimulus, its included netlists/models and the simulator. """
+        key = hashlib.sha256()
+        key.update(OPTS.spice_name.encode())
+        # The simulator executable stands in for its version
+        key.update(self.get_file_stamp(OPTS.spice_exe).encode())
+        # The stimulus is rewritten for every simulation (possibly with the same
+        # mtime and size) so it is hashed every time
+        key.update(self.get_file_digest(os.path.abspath(stim_file), set(), False).encode())
+        return key.hexdigest()
+
+    def get_file_stamp(self, filename):
+        try:
+            stat = os.stat(filename)
+        except (OSError, TypeError):
+            return ""
+        return "{0}:{1}".format(stat.st_mtime_ns, stat.st_size)
+
+    def get_file_digest(self, filename, visiting, memoize=True):
+        """
+        Hash of a spice file combined with the hashes of the files it includes.
+        The include paths themselves are left out so that the key does not depend
+        on the (per-run) temp directory. Only the hashes of the included files
+        are memoized.
+        """
+        (content_digest, included_files) = self.get_file_contents(filename, memoize)
+        digest = hashlib.sha256(content_digest.encode())
+        visiting.add(filename)
+        for included_file in included_files:
+            if included_file not in visiting:
+                digest.update(self.get_file_digest(included_file, visiting).encode())
+        visiting.remove(filename)
+        return digest.hexdigest()
+
+    def get_file_contents(self, filename, memoize=True):
+        """
+        Hash of a spice file without the paths of its .include/.lib statements and
+        the list of included files. If memoize is set, it is memoized by the file
+        mtime and size for the large netlists and models that don't change.
+        """
+        stamp = (filename, self.get_file_stamp(filename))
+        if memoize and stamp in self.file_contents:
+            return self.file_contents[stamp]
+
+        digest = hashlib.sha256()
+        included_files = []
+        try:
+            f = open(filename, "rb")
+        except IOError:
+            return ("missing", included_files)
+        for line in f:
+            match = self.include_re.match(line)
+            if match:
+                path = match.group(1).decode(errors="replace")
+                if not os.path.isabs(path):
+                    path = os.path.join(os.path.dirname(filename), path)
+                included_files.append(os.path.abspath(path))
+                line = line[:match.start(1)] + line[match.end(1):]
+            digest.update(line)
+        f.close()
+
+        contents = (digest.hexdigest(), included_files)
+        if memoize:
+            self.file_contents[stamp] = contents
+        return contents
+
+    def get_entry_path(self, key):
+        return os.path.join(os.path.expanduser(OPTS.sim_cache_path), key)
+
+    def fetch(self, key, output_files):
+        """
+        Copy the cached output files of key into place.
+        Returns True on a cache hit.
+        """
+        entry_path = self.get_entry_path(key)
+        cached_files = [os.path.join(entry_path, os.path.basename(f)) for f in output_files]
+        if not all(os.path.isfile(f) for f in cached_files):
+            self.misses += 1
+            return False
+
+        for (cached_file, output_file) in zip(cached_files, output_files):
+            shutil.copyfile(cached_file, output_file)
+        # Mark as recently used for the LRU eviction
+        os.utime(entry_path)
+        self.hits += 1
+        debug.info(2, "Simulation cache hit: {}".format(key))
+        return True
+
+    def store(self, key, output_files):
+        """ Add the output files of a finished simulation to the cache. """
+        entry_path = self.get_entry_path(key)
+        if os.path.isdir(entry_path):
+            return
+
+        # Copy into a private directory first so concurrent workers never see partial entries
+        staging_path = "{0}.{1}.tmp".format(entry_path, os.getpid())
+        try:
+            os.makedirs(staging_path)
+            for output_file in output_files:
+                shutil.copyfile(output_file, os.path.join(staging_path, os.path.basename(output_file)))
+            os.rename(staging_path, entry_path)
+        except OSError as e:
+            debug.info(2, "Could not add simulation to cache: {}".format(e))
+            shutil.rmtree(staging_path, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache fits in OPTS.sim_cache_size MB. """
+        entries = []
+        total_size = 0
+        for name in os.listdir(os.path.expanduser(OPTS.sim_cache_path)):
+            entry_path = self.get_entry_path(name)
+            if name.endswith(".tmp") or not os.path.isdir(entry_path):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry_path, f)) for f in os.listdir(entry_path))
+                entries.append((os.path.getmtime(entry_path), size, entry_path))
+            except OSError:
+                # Removed by another process
+                continue
+            total_size += size
+
+        max_size = OPTS.sim_cache_size * 1024 * 1024
+        for (mtime, size, entry_path) in sorted(entries):
+            if total_size <= max_size:
+                break
+            debug.info(2, "Evicting simulation cache entry: {}".format(entry_path))
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
+
+
+# The cache shared by all simulations of this process
+cache = sim_cache()
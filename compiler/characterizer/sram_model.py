@@ -0,0 +1,163 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import debug
+from globals import OPTS
+
+
+class sram_model:
+    """
+    A cycle accurate behavioral model of an SRAM in Python. It has the same
+    behavior as the Verilog model of verilog_write: the inputs are registered
+    on the clock edge and the reads return the contents before the writes of
+    the cycle. Words are integers with the data bits in the low bits and the
+    spare column bits above them. Bits that were never written or that are
+    written or read by conflicting ports are unknown, so every word is kept
+    as a value and a mask of the known bits.
+    """
+
+    def __init__(self, sram_config, num_rw_ports=None, num_w_ports=None, num_r_ports=None):
+        self.word_size = sram_config.word_size
+        self.write_size = sram_config.write_size
+        self.addr_size = sram_config.addr_size
+        if not sram_config.num_spare_cols:
+            self.num_spare_cols = 0
+        else:
+            self.num_spare_cols = sram_config.num_spare_cols
+        if self.write_size:
+            self.num_wmasks = int(self.word_size / self.write_size)
+        else:
+            self.num_wmasks = 0
+
+        if num_rw_ports == None:
+            num_rw_ports = OPTS.num_rw_ports
+        if num_w_ports == None:
+            num_w_ports = OPTS.num_w_ports
+        if num_r_ports == None:
+            num_r_ports = OPTS.num_r_ports
+        # The same port order as design.create_port_names
+        self.all_ports = list(range(num_rw_ports + num_w_ports + num_r_ports))
+        self.readwrite_ports = self.all_ports[:num_rw_ports]
+        self.write_ports = self.all_ports[:num_rw_ports + num_w_ports]
+        self.read_ports = self.readwrite_ports + self.all_ports[num_rw_ports + num_w_ports:]
+
+        self.num_bits = self.word_size + self.num_spare_cols
+        self.word_mask = (1 << self.num_bits) - 1
+        self.data_mask = (1 << self.word_size) - 1
+        self.wmask_bits = self.get_wmask_bits()
+        self.reset()
+
+    def get_wmask_bits(self):
+        """ The data bits of every write mask value. """
+        if not self.num_wmasks:
+            return [self.data_mask]
+        bits = []
+        for wmask in range(1 << self.num_wmasks):
+            mask = 0
+            for i in range(self.num_wmasks):
+                if wmask & (1 << i):
+                    mask |= ((1 << self.write_size) - 1) << (i * self.write_size)
+            bits.append(mask)
+        return bits
+
+    def reset(self):
+        """ Forget the contents of the memory. """
+        num_words = 1 << self.addr_size
+        self.values = [0] * num_words
+        self.known = [0] * num_words
+        self.cycle_count = 0
+
+    def preload(self, addr, word):
+        """ Set the contents of a word without a write cycle. """
+        self.values[addr] = word & self.word_mask
+        self.known[addr] = self.word_mask
+
+    def read(self, addr):
+        """ The (value, known bits) of a word. """
+        return (self.values[addr], self.known[addr])
+
+    def get_write_bits(self, wmask, spare_wen):
+        """ The bits of a word that are written for a write mask and spare column enable. """
+        if wmask == None or not self.num_wmasks:
+            bits = self.data_mask
+        else:
+            bits = self.wmask_bits[wmask]
+        if spare_wen == None:
+            spare_wen = (1 << self.num_spare_cols) - 1
+        return bits | (spare_wen << self.word_size)
+
+    def cycle(self, ops):
+        """
+        Simulate one clock cycle. ops maps ports to ("read", addr) or
+        ("write", addr, data, wmask, spare_wen) where the wmask and
+        spare_wen may be None to write all bits. Ports that are not in
+        ops are idle.
+        Returns a dictionary of the (value, known bits) output of every
+        read and the list of conflict messages. Conflicting writes to the
+        same address leave the written bits unknown and a read of an
+        address that another port writes returns unknown bits.
+        """
+        conflicts = []
+        writes = {}
+        for (port, op) in ops.items():
+            if op[0] == "write":
+                debug.check(port in self.write_ports, "Cannot write on read port {0}.".format(port))
+                (addr, data, wmask, spare_wen) = op[1:]
+                bits = self.get_write_bits(wmask, spare_wen)
+                if addr in writes:
+                    (other_port, other_data, other_bits, unknown) = writes[addr]
+                    conflicts.append("Cycle {0}: ports {1} and {2} write addr {3} simultaneously.".format(self.cycle_count,
+                                                                                                           other_port,
+                                                                                                           port,
+                                                                                                           addr))
+                    # The bits that both ports drive are unknown
+                    writes[addr] = (other_port,
+                                    (other_data & ~bits) | (data & bits),
+                                    other_bits | bits,
+                                    unknown | (other_bits & bits))
+                else:
+                    writes[addr] = (port, data, bits, 0)
+            elif op[0] != "read":
+                debug.error("Unknown operation {0} on port {1}.".format(op[0], port), 1)
+
+        douts = {}
+        for (port, op) in ops.items():
+            if op[0] != "read":
+                continue
+            debug.check(port in self.read_ports, "Cannot read on write port {0}.".format(port))
+            addr = op[1]
+            (value, known) = (self.values[addr], self.known[addr])
+            if addr in writes:
+                conflicts.append("Cycle {0}: port {1} reads addr {2} while port {3} writes it.".format(self.cycle_count,
+                                                                                                       port,
+                                                                                                       addr,
+                                                                                                       writes[addr][0]))
+                known = 0
+            douts[port] = (value, known)
+
+        for (addr, (port, data, bits, unknown)) in writes.items():
+            self.values[addr] = (self.values[addr] & ~bits) | (data & bits)
+            self.known[addr] = (self.known[addr] | bits) & ~unknown
+
+        self.cycle_count += 1
+        return (douts, conflicts)
+
+    def run(self, cycles):
+        """ Simulate a list of cycle ops and return the list of their (douts, conflicts). """
+        return [self.cycle(ops) for ops in cycles]
+
+    def get_check_cycles(self, results):
+        """
+        The indices of the cycles with a read of known bits. These are the
+        cycles that are worth simulating in SPICE since the other cycles
+        only change the contents that the later reads check.
+        """
+        cycles = []
+        for (i, (douts, conflicts)) in enumerate(results):
+            if any(known for (value, known) in douts.values()):
+                cycles.append(i)
+        return cycles
@@ -18,6 +18,8 @@ import os
 import sys
 import numpy as np
 from globals import OPTS
+from .sim_cache import cache
+from .charutils import sweep_point_marker, clear_spice_output
 
 
 class stimuli():
@@ -41,6 +43,9 @@ class stimuli():
         self.device_models = tech.spice["fet_models"][self.process]
     
         self.sram_name = "Xsram"
+
+        # Optional (parameter name, values) swept within a single simulation
+        self.sweep = None
     
     def inst_sram(self, pins, inst_name):
         """ Function to instatiate an SRAM subckt. """
@@ -129,22 +134,50 @@ class stimuli():
         debug.check(len(clk_times)==len(data_values),"Clock and data value lengths don't match. {0} clock values, {1} data values for {2}".format(len(clk_times), len(data_values), sig_name))
     
         # shift signal times earlier for setup time
-        times = np.array(clk_times) - setup*period
         values = np.array(data_values) * self.voltage
         half_slew = 0.5 * slew
         self.sf.write("* (time, data): {}\n".format(list(zip(clk_times, data_values))))
         self.sf.write("V{0} {0} 0 PWL (0n {1}v ".format(sig_name, values[0]))
-        for i in range(1,len(times)):
-            self.sf.write("{0}n {1}v {2}n {3}v ".format(times[i]-half_slew,
-                                                        values[i-1],
-                                                        times[i]+half_slew,
-                                                        values[i]))
+        for i in range(1,len(clk_times)):
+            self.sf.write("{0} {1}v {2} {3}v ".format(self.get_pwl_time(clk_times[i], setup*period, -half_slew),
+                                                      values[i-1],
+                                                      self.get_pwl_time(clk_times[i], setup*period, half_slew),
+                                                      values[i]))
         self.sf.write(")\n")
 
+    def get_pwl_time(self, clk_time, shift, offset):
+        """
+        Returns a PWL time point for a clock time (in ns) moved earlier by shift and then by offset.
+        The clock time may also be the name of a (swept) parameter in ns.
+        """
+        if isinstance(clk_time, str):
+            return self.get_param_expr("({0}-{1}{2:+})*1e-9".format(clk_time, shift, offset))
+        return "{0}n".format((clk_time - shift) + offset)
+
+    def get_param_expr(self, expr):
+        """ Returns a parameter expression in the syntax of the simulator """
+        if OPTS.spice_name == "ngspice":
+            return "{{{0}}}".format(expr)
+        else:
+            return "'{0}'".format(expr)
+
+    def gen_sweep_param(self, param_name, values):
+        """
+        Generates a parameter which takes each of the values in turn within one
+        simulator invocation. Results of each sweep point are retrieved with the
+        sweep_index of parse_spice_list.
+        """
+        self.sweep = (param_name, values)
+        self.sf.write(".param {0}={1}\n".format(param_name, values[0]))
+
     def gen_constant(self, sig_name, v_val):
         """ Generates a constant signal with reference voltage and the voltage value """
         self.sf.write("V{0} {0} 0 DC {1}\n".format(sig_name, v_val))
 
+    def gen_ic(self, node_name, v_val):
+        """ Generates an initial condition for a node (used by the UIC transient) """
+        self.sf.write(".IC V({0})={1}\n".format(node_name, v_val))
+
     def get_inverse_voltage(self, value):
         if value > 0.5*self.voltage:
             return 0
@@ -223,7 +256,9 @@ class stimuli():
         timestep = 10 #ps, was 5ps but ngspice was complaining the timestep was too small in certain tests.
            
         # UIC is needed for ngspice to converge
-        self.sf.write(".TRAN {0}p {1}n UIC\n".format(timestep,end_time))
+        # A swept ngspice deck runs the transient from its control loop instead
+        if not (self.sweep and OPTS.spice_name == "ngspice"):
+            self.sf.write(".TRAN {0}p {1}n UIC\n".format(timestep,end_time))
         self.sf.write(".TEMP {}\n".format(self.temperature))
         if OPTS.spice_name == "ngspice":
             # ngspice sometimes has convergence problems if not using gear method
@@ -245,10 +280,35 @@ class stimuli():
             self.sf.write("*.probe V(*)\n")
             self.sf.write("*.plot V(*)\n")
 
+        if self.sweep:
+            self.write_sweep_control(timestep, end_time)
+
         # end the stimulus file
         self.sf.write(".end\n\n")
 
 
+    def write_sweep_control(self, timestep, end_time):
+        """
+        Re-run the transient for every value of the swept parameter. The measurements
+        of each run are written to the output one after another.
+        """
+        (param_name, values) = self.sweep
+        self.sf.write("\n* Sweep of {0} over {1} points\n".format(param_name, len(values)))
+        if OPTS.spice_name == "ngspice":
+            self.sf.write(".control\n")
+            self.sf.write("foreach sweep_value {}\n".format(" ".join(str(v) for v in values)))
+            self.sf.write("alterparam {0} = $sweep_value\n".format(param_name))
+            self.sf.write("reset\n")
+            self.sf.write("tran {0}p {1}n uic\n".format(timestep, end_time))
+            self.sf.write("echo {}\n".format(sweep_point_marker))
+            self.sf.write("end\n")
+            self.sf.write(".endc\n")
+        else:
+            # The deck itself is the first point
+            for (index, value) in enumerate(values[1:], 1):
+                self.sf.write(".ALTER sweep{}\n".format(index))
+                self.sf.write(".param {0}={1}\n".format(param_name, value))
+
     def write_include(self, circuit):
         """Writes include statements, inputs are lists of model files"""
 
@@ -284,6 +344,19 @@ class stimuli():
         import datetime
         start_time = datetime.datetime.now()
         debug.check(OPTS.spice_exe!="","No spice simulator has been found.")
+
+        # Reuse the output of a byte-identical earlier simulation if there is one
+        if OPTS.spice_name == "xa":
+            output_files = ["{0}xa.meas".format(OPTS.openram_temp)]
+        else:
+            output_files = ["{0}timing.lis".format(OPTS.openram_temp)]
+        # The parsed measurements of the previous simulation are stale
+        for output_file in output_files:
+            clear_spice_output(output_file)
+        if cache.is_enabled():
+            cache_key = cache.get_key(temp_stim)
+            if cache.fetch(cache_key, output_files):
+                return
     
         if OPTS.spice_name == "xa":
             # Output the xa configurations here. FIXME: Move this to write it once.
@@ -327,5 +400,7 @@ class stimuli():
             end_time = datetime.datetime.now()
             delta_time = round((end_time-start_time).total_seconds(),1)
             debug.info(2,"*** Spice: {} seconds".format(delta_time))
+            if cache.is_enabled():
+                cache.store(cache_key, output_files)
 
     
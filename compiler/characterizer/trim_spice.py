@@ -8,38 +8,157 @@
 import debug
 from math import log,ceil
 import re
+import gc
+from tech import spice, parameter, drc
+from globals import OPTS
+
+
+class subckt_def():
+    """
+    A parsed .SUBCKT of a spice netlist. Only the subcircuit instances are
+    parsed, all other lines are kept as they are.
+    """
+
+    def __init__(self, header):
+        tokens = header.split()
+        self.name = tokens[1]
+        self.ports = [token for token in tokens[2:] if "=" not in token]
+        self.header = header
+        self.footer = ".ENDS {}".format(self.name)
+        # Lines of the body (without the .SUBCKT/.ENDS lines)
+        self.lines = []
+        # (line index, connected nets, subckt name) of every X instance
+        self.insts = []
+
+    def parse_insts(self):
+        """ Parse the X instances once all lines were added. """
+        self.insts = []
+        for (index, line) in enumerate(self.lines):
+            if line[:1] not in ("X", "x"):
+                continue
+            tokens = line.split()
+            if "=" in line:
+                # Drop any parameters
+                tokens = [token for token in tokens if "=" not in token]
+            self.insts.append((index, tokens[1:-1], tokens[-1]))
+
 
 class trim_spice():
     """
-    A utility to trim redundant parts of an SRAM spice netlist. 
+    A utility to trim redundant parts of an SRAM spice netlist.
     Input is an SRAM spice file. Output is an equivalent netlist
     that works for a single address and range of data bits.
+    The netlist is parsed into its subcircuits and the cells of the
+    arrays that are not connected to the probed wordline and bitline
+    nets are replaced by lumped loads on the nets they connected to.
     """
 
+    # Port names of cells which connect to bitlines
+    bitline_port_regex = re.compile(r"b[lr]")
+    # Replica bitline nets which time the sense amp enable. Every cell on them is kept.
+    replica_net_regex = re.compile(r"rbl_b[lr](_\d+)?$")
+    supply_nets = ["vdd", "gnd", "0"]
+    # Resistance of the DC path that holds the nets of removed drivers
+    # at their inactive level (bitlines high and everything else low)
+    hold_resistance = "1G"
+
     def __init__(self, spfile, reduced_spfile):
         self.sp_file = spfile
-        self.reduced_spfile = reduced_spfile        
+        self.reduced_spfile = reduced_spfile
 
         debug.info(1,"Trimming non-critical cells to speed-up characterization: {}.".format(reduced_spfile))
-        
+
         # Load the file into a buffer for performance
         sp = open(self.sp_file, "r")
-        self.spice = sp.readlines()
+        # Join continuation lines
+        self.spice = sp.read().replace("\n+", " ").split("\n")
         sp.close()
-        for i in range(len(self.spice)):
-            self.spice[i] = self.spice[i].rstrip(" \n")
-        
 
-        self.sp_buffer = self.spice
+        self.without_gc(self.parse_subckts)
+        self.find_trimmed_subckts()
+
+    def without_gc(self, func, *args):
+        """
+        The millions of (non-cyclic) net lists of large arrays would trigger the
+        garbage collector over and over, so it is paused while they are processed.
+        """
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return func(*args)
+        finally:
+            if gc_enabled:
+                gc.enable()
 
-    def set_configuration(self, banks, rows, columns, word_size):
+    def parse_subckts(self):
+        """ Split the netlist into the top-level lines and its subcircuits. """
+        # Top-level lines and the names of the subckts in netlist order
+        self.netlist = []
+        self.subckts = {}
+        subckt = None
+        for line in self.spice:
+            line = line.rstrip()
+            keyword = line.split(None, 1)[0].upper() if line[:1] == "." else ""
+            if keyword == ".SUBCKT":
+                subckt = subckt_def(line)
+                self.subckts[subckt.name] = subckt
+                self.netlist.append(subckt)
+            elif keyword == ".ENDS" and subckt:
+                subckt.footer = line
+                subckt.parse_insts()
+                subckt = None
+            elif subckt:
+                subckt.lines.append(line)
+            else:
+                self.netlist.append(line)
+
+    def find_trimmed_subckts(self):
+        """
+        Find the subckts that are trimmed and the subckts that contain them.
+        Critical nets are only propagated through these.
+        """
+        # Array subcircuits which are trimmed by the connectivity of their cells.
+        # In the bitline arrays, a kept cell also keeps the cells on its other
+        # bitline nets (e.g. behind a column mux).
+        array_kinds = [(OPTS.bitcell_array, "bitcell"),
+                       ("dummy_array", "cell"),
+                       (OPTS.wordline_driver + "_array", "wordline"),
+                       (OPTS.precharge_array, "bitline"),
+                       (OPTS.column_mux_array, "bitline"),
+                       (OPTS.sense_amp_array, "bitline"),
+                       (OPTS.write_driver_array, "bitline")]
+        # Array names may have a numeric suffix
+        self.trimmed_subckts = {}
+        for name in self.subckts:
+            for (array_name, kind) in array_kinds:
+                if re.match(r"{}(_\d+)?$".format(array_name), name):
+                    self.trimmed_subckts[name] = kind
+
+        # Subckts that (transitively) instantiate a trimmed subckt
+        self.container_subckts = set()
+        changed = True
+        while changed:
+            changed = False
+            for subckt in self.subckts.values():
+                if subckt.name in self.container_subckts or subckt.name in self.trimmed_subckts:
+                    continue
+                for (index, nets, child) in subckt.insts:
+                    if child in self.trimmed_subckts or child in self.container_subckts:
+                        self.container_subckts.add(subckt.name)
+                        changed = True
+                        break
+
+    def set_configuration(self, banks, rows, columns, word_size, spare_rows=0, cell_size=(0, 0)):
         """ Set the configuration of SRAM sizes that we are simulating.
-        Need the: number of banks, number of rows in each bank, number of 
-        columns in each bank, and data word size."""
+        Need the: number of banks, number of rows in each bank, number of
+        columns in each bank, and data word size. The (width, height) of
+        the bitcell gives the wire length of each trimmed cell."""
         self.num_banks = banks
-        self.num_rows = rows        
+        self.num_rows = rows
         self.num_columns = columns
         self.word_size = word_size
+        self.num_spare_rows = spare_rows
+        self.cell_size = cell_size
 
         self.words_per_row = self.num_columns / self.word_size
         self.row_addr_size = ceil(log(self.num_rows, 2))
@@ -48,101 +167,259 @@ class trim_spice():
         self.addr_size = self.bank_addr_size + int(log(self.num_banks, 2))
 
 
-    def trim(self, address, data_bit):
+    def trim(self, address, data_bit, other_addresses=[]):
         """ Reduce the spice netlist but KEEP the given bits at the
-        address (and things that will add capacitive load!)"""
-
-        # Always start fresh if we do multiple reductions
-        self.sp_buffer = self.spice
+        address (and things that will add capacitive load!).
+        The wordlines of the other addresses (which must use the same
+        bitlines) are kept as well."""
 
         # Split up the address and convert to an int
-        wl_address = int(address[self.col_addr_size:],2)
+        wl_addresses = [int(addr[self.col_addr_size:],2) for addr in [address] + other_addresses]
         if self.col_addr_size>0:
             col_address = int(address[0:self.col_addr_size],2)
         else:
             col_address = 0
-        # 1. Keep cells in the bitcell array based on WL and BL
-        wl_name = "wl_{}".format(wl_address)
-        bl_name = "bl_{}".format(int(self.words_per_row*data_bit + col_address))
+        bl_address = int(self.words_per_row*data_bit + col_address)
+        wl_names = ["wl_{}".format(wl_address) for wl_address in wl_addresses]
+        bl_name = "bl_{}".format(bl_address)
 
-        # Prepend info about the trimming
-        addr_msg = "Keeping {} address".format(address)
-        self.sp_buffer.insert(0, "* "+addr_msg)
-        debug.info(1,addr_msg)
-        data_msg = "Keeping {} data bit".format(data_bit)
-        self.sp_buffer.insert(0, "* "+data_msg)
-        debug.info(1,data_msg)
+        # Info about the trimming
+        header = ["* WARNING: This is a TRIMMED NETLIST.",
+                  "* It should NOT be used for LVS!!"]
+        wl_msg = "Keeping {} (trimming other WLs)".format(", ".join(wl_names))
         bl_msg = "Keeping {} (trimming other BLs)".format(bl_name)
-        wl_msg = "Keeping {} (trimming other WLs)".format(wl_name)
-        self.sp_buffer.insert(0, "* "+bl_msg)
-        debug.info(1,bl_msg)
-        self.sp_buffer.insert(0, "* "+wl_msg)
-        debug.info(1,wl_msg)
-        self.sp_buffer.insert(0, "* It should NOT be used for LVS!!")
-        self.sp_buffer.insert(0, "* WARNING: This is a TRIMMED NETLIST.")
-        
-        
-        wl_regex = r"wl\d*_{}".format(wl_address)
-        bl_regex = r"bl\d*_{}".format(int(self.words_per_row*data_bit + col_address))
-        self.remove_insts("bitcell_array",[wl_regex,bl_regex])
-
-        # 2. Keep sense amps basd on BL
-        # FIXME: The bit lines are not indexed the same in sense_amp_array
-        #self.remove_insts("sense_amp_array",[bl_regex])
-
-        # 3. Keep column muxes basd on BL
-        self.remove_insts("column_mux_array",[bl_regex])
-        
-        # 4. Keep write driver based on DATA
-        data_regex = r"data_{}".format(data_bit)
-        self.remove_insts("write_driver_array",[data_regex])
-
-        # 5. Keep wordline driver based on WL
-        # Need to keep the gater too
-        #self.remove_insts("wordline_driver",wl_regex)
-        
-        # 6. Keep precharges based on BL
-        self.remove_insts("precharge_array",[bl_regex])
-        
-        # Everything else isn't worth removing. :)
-        
+        data_msg = "Keeping {} data bit".format(data_bit)
+        addr_msg = "Keeping {} address".format(address)
+        for msg in [wl_msg, bl_msg, data_msg, addr_msg]:
+            header.append("* "+msg)
+            debug.info(1,msg)
+
+        # 1. Find the nets connected to the probed WL and BL in every subckt
+        seed_regexes = [re.compile(r"wl\d*_{}$".format(wl_address)) for wl_address in wl_addresses]
+        seed_regexes.append(re.compile(r"b[lr]\d*_{}$".format(bl_address)))
+        self.find_critical_nets(seed_regexes)
+
+        # 2. Keep the cells connected to them in the bitcell, wordline driver, precharge,
+        # column mux, sense amp and write driver arrays. The others become lumped loads.
+        self.sp_buffer = header
+        for item in self.netlist:
+            if isinstance(item, subckt_def):
+                self.sp_buffer.extend(self.without_gc(self.write_subckt, item))
+            else:
+                self.sp_buffer.append(item)
+
         # Finally, write out the buffer as the new reduced file
         sp = open(self.reduced_spfile, "w")
         sp.write("\n".join(self.sp_buffer))
         sp.close()
 
-        
-    def remove_insts(self, subckt_name, keep_inst_list):
-        """This will remove all of the instances in the list from the named
-        subckt that DO NOT contain a term in the list.  It just does a
-        match of the line with a term so you can search for a single
-        net connection, the instance name, anything..
+    def find_critical_nets(self, seed_regexes):
         """
-        removed_insts = 0
-        #Expects keep_inst_list are regex patterns. Compile them here.
-        compiled_patterns = [re.compile(pattern) for pattern in keep_inst_list]
-        
-        start_name = ".SUBCKT {}".format(subckt_name)
-        end_name = ".ENDS {}".format(subckt_name)
-
-        in_subckt=False
-        new_buffer=[]
-        for line in self.sp_buffer:
-            if start_name in line:
-                new_buffer.append(line)
-                in_subckt=True
-            elif end_name in line:
-                new_buffer.append(line)
-                in_subckt=False
-            elif in_subckt:
-                removed_insts += 1
-                for pattern in compiled_patterns:
-                    if pattern.search(line) != None:
-                        new_buffer.append(line)
-                        removed_insts -= 1
-                        break
+        Marks the ports of the cell arrays that match the seeds as critical and
+        propagates them up and down the hierarchy (and through the kept cells of
+        the bitline arrays) until nothing changes.
+        """
+        self.critical_nets = {name: set() for name in self.subckts}
+        # Critical nets which were only found through a kept bitline array cell.
+        # These don't keep further cells in that array (e.g. the other inputs of a column mux).
+        self.through_nets = {name: set() for name in self.subckts}
+        for (name, kind) in self.trimmed_subckts.items():
+            if kind == "bitcell":
+                for port in self.subckts[name].ports:
+                    if any(regex.match(port) for regex in seed_regexes):
+                        self.critical_nets[name].add(port)
+        # The replica bitlines are propagated down into the arrays from the subckts that contain them
+        for name in self.container_subckts:
+            for port in self.subckts[name].ports:
+                if self.replica_net_regex.match(port):
+                    self.critical_nets[name].add(port)
+
+        changed = True
+        while changed:
+            changed = False
+            for subckt in self.subckts.values():
+                critical_nets = self.critical_nets[subckt.name]
+                if subckt.name in self.trimmed_subckts:
+                    if self.trimmed_subckts[subckt.name] == "bitline":
+                        changed |= self.propagate_bitline_nets(subckt)
+                    continue
+                if subckt.name not in self.container_subckts:
+                    continue
+                for (index, nets, child) in subckt.insts:
+                    if child not in self.trimmed_subckts and child not in self.container_subckts:
+                        continue
+                    child_critical_nets = self.critical_nets[child]
+                    for (port, net) in zip(self.subckts[child].ports, nets):
+                        if port in child_critical_nets and net not in critical_nets:
+                            critical_nets.add(net)
+                            changed = True
+                        elif net in critical_nets and port not in child_critical_nets:
+                            child_critical_nets.add(port)
+                            changed = True
+
+    def propagate_bitline_nets(self, subckt):
+        """ Kept cells of a bitline array make their other bitline nets critical. """
+        changed = False
+        critical_nets = self.critical_nets[subckt.name]
+        through_nets = self.through_nets[subckt.name]
+        keep_nets = self.get_keep_nets(subckt)
+        for (index, nets, child) in subckt.insts:
+            if keep_nets.isdisjoint(nets) or child not in self.subckts:
+                continue
+            for (port, net) in zip(self.subckts[child].ports, nets):
+                if net not in critical_nets and self.bitline_port_regex.match(port):
+                    critical_nets.add(net)
+                    through_nets.add(net)
+                    changed = True
+        return changed
+
+    def get_keep_nets(self, subckt):
+        """ The nets which keep the instances connected to them. """
+        return self.critical_nets[subckt.name] - self.through_nets[subckt.name]
+
+    def write_subckt(self, subckt):
+        """ Returns the lines of a subckt with the non-critical cells removed. """
+        lines = [subckt.header]
+        if subckt.name not in self.trimmed_subckts:
+            lines.extend(subckt.lines)
+            lines.append(subckt.footer)
+            return lines
+
+        keep_nets = self.get_keep_nets(subckt)
+        removed_lines = set()
+        removed_insts = []
+        # Nets that still connect to something outside of the removed cells
+        live_nets = set(subckt.ports)
+        for (index, nets, child) in subckt.insts:
+            if keep_nets.isdisjoint(nets):
+                removed_lines.add(index)
+                removed_insts.append((nets, child))
             else:
-                new_buffer.append(line)
+                live_nets.update(nets)
+        live_nets.difference_update(self.supply_nets)
+
+        # Lump the removed cells and their wires into an RC load of each live net
+        kind = self.trimmed_subckts[subckt.name]
+        net_loads = {}
+        for (nets, child) in removed_insts:
+            if child not in self.subckts:
+                continue
+            for (port, net, cap) in zip(self.subckts[child].ports, nets, self.get_port_caps(child)):
+                if net not in live_nets:
+                    continue
+                (length, width) = self.get_wire_size(kind, port)
+                loads = net_loads.setdefault(net, [0, 0])
+                loads[0] += cap + spice["wire_unit_c"] * length * width
+                if length > 0:
+                    loads[1] += spice["wire_unit_r"] * length / width
+
+        for (index, line) in enumerate(subckt.lines):
+            if index not in removed_lines:
+                lines.append(line)
+        if len(net_loads) > 0:
+            lines.append("* Lumped RC loads of the {} trimmed cells".format(len(removed_insts)))
+        for net in sorted(net_loads.keys()):
+            (cap, res) = net_loads[net]
+            load_net = net
+            if cap > 0 and res > 0:
+                # Half of the wire resistance gives the Elmore delay of the distributed wire
+                load_net = "{}_trim".format(net)
+                lines.append("Rtrim_{0} {0} {1} {2:.4f}".format(net, load_net, res / 2))
+            if cap > 0:
+                lines.append("Ctrim_{0} {1} 0 {2:.4f}f".format(net, load_net, cap))
+            # Removed drivers would leave the net floating
+            hold_net = self.get_hold_net(subckt, net)
+            if hold_net:
+                lines.append("Rhold_{0} {0} {1} {2}".format(net, hold_net, self.hold_resistance))
+        lines.append(subckt.footer)
+
+        debug.info(2, "Removed {} instances from {} subcircuit.".format(len(removed_insts), subckt.name))
+        return lines
+
+    def get_wire_size(self, kind, port):
+        """
+        The (length, width) in um of the wire that a trimmed cell adds to the net of a port.
+        Bitlines run over the height of the cells in the bitcell arrays and the
+        wordline drivers are stacked vertically. The other nets run across the cells.
+        """
+        (cell_width, cell_height) = self.cell_size
+        width = drc("minwidth_m1")
+        if self.bitline_port_regex.match(port):
+            if kind in ["bitcell", "cell"]:
+                return (cell_height, width)
+            return (0, width)
+        if kind == "wordline":
+            return (cell_height, width)
+        return (cell_width, width)
+
+    def get_hold_net(self, subckt, net):
+        """ The net that holds a trimmed net at its inactive level (or None). """
+        if self.bitline_port_regex.match(net):
+            # Bitlines are precharged
+            if "vdd" in subckt.ports:
+                return "vdd"
+            return None
+        return "0"
+
+    def get_port_caps(self, subckt_name):
+        """ The capacitance (in fF) of each port of a subckt. """
+        if not hasattr(self, "subckt_port_caps"):
+            self.subckt_port_caps = {}
+        if subckt_name not in self.subckt_port_caps:
+            self.subckt_port_caps[subckt_name] = [self.get_port_cap(subckt_name, port) for port in self.subckts[subckt_name].ports]
+        return self.subckt_port_caps[subckt_name]
+
+    def get_port_cap(self, subckt_name, port):
+        """
+        Estimate the capacitance (in fF) of a subckt port from the gate and
+        drain/source areas of the transistors connected to it.
+        """
+        if not hasattr(self, "port_caps"):
+            self.port_caps = {}
+        if (subckt_name, port) in self.port_caps:
+            return self.port_caps[(subckt_name, port)]
+        # Break (illegal) recursive definitions
+        self.port_caps[(subckt_name, port)] = 0
+
+        cap = 0
+        subckt = self.subckts[subckt_name]
+        for line in subckt.lines:
+            tokens = line.split()
+            if len(tokens) < 6 or tokens[0][0] not in "mM" or port not in tokens[1:4]:
+                continue
+            width = self.get_tx_width(tokens[6:])
+            (drain, gate, source) = tokens[1:4]
+            if gate == port:
+                cap += spice["min_tx_gate_c"] * width / parameter["min_tx_size"]
+            for net in [drain, source]:
+                if net == port:
+                    cap += spice["min_tx_drain_c"] * width / parameter["min_tx_size"]
+        for (index, nets, child) in subckt.insts:
+            if child not in self.subckts:
+                continue
+            for (child_port, net) in zip(self.subckts[child].ports, nets):
+                if net == port:
+                    cap += self.get_port_cap(child, child_port)
+
+        self.port_caps[(subckt_name, port)] = cap
+        return cap
+
+    def get_tx_width(self, params):
+        """ Transistor width (in um) from the w= parameter (and multiplier). """
+        width = parameter["min_tx_size"]
+        mult = 1
+        for param in params:
+            (name, sep, value) = param.partition("=")
+            if name.lower() == "w":
+                width = self.get_spice_value(value) * 1e6
+            elif name.lower() == "m":
+                mult = self.get_spice_value(value)
+        return width * mult
 
-        self.sp_buffer = new_buffer
-        debug.info(2, "Removed {} instances from {} subcircuit.".format(removed_insts, subckt_name))
+    def get_spice_value(self, value):
+        """ Convert a spice number with an optional unit (e.g. 0.8u). """
+        units = {"f": 1e-15, "p": 1e-12, "n": 1e-9, "u": 1e-6, "m": 1e-3}
+        match = re.match(r"([-+]?[\d.]+(?:e[-+]?\d+)?)([fpnum]?)", value.lower())
+        if match == None:
+            return 0
+        return float(match.group(1)) * units.get(match.group(2), 1)
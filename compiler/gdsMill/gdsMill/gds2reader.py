@@ -1,17 +1,36 @@
 #!/usr/bin/env python
 import struct
+import mmap
+import numpy as np
 from .gdsPrimitives import *
 
+#precompiled unpackers of the record fields
+recordHeaderUnpacker = struct.Struct(">H2s")
+unsignedShortUnpacker = struct.Struct(">H")
+shortUnpacker = struct.Struct(">h")
+intUnpacker = struct.Struct(">i")
+pointUnpacker = struct.Struct(">ii")
+
 class Gds2reader:
     """Class to read in a file in GDSII format and populate a layout class with it"""
     ## Based on info from http://www.rulabinsky.com/cavd/text/chapc.html
-    global offset
-    offset=0
+
+    #coordinate lists with more points than this are converted with numpy
+    bulkCoordinates = 64
 
     def __init__(self,layoutObject,debugToTerminal = 0):
         self.fileHandle = None
+        #the memory mapped file and the offset of the next record in it
+        self.data = None
+        self.dataSize = 0
+        self.offset = 0
+        #the offset of the first record of every structure indexed by name
+        self.structureOffsets = {}
         self.layoutObject = layoutObject
         self.debugToTerminal=debugToTerminal
+        #unpackers of the XY records indexed by the number of points
+        self.coordinateUnpackers = {}
+        self.ieeeDoubles = {}
 
           #do we dump debug data to the screen
 
@@ -25,6 +44,14 @@ class Gds2reader:
         return string
 
     def ieeeDoubleFromIbmData(self,ibmData):
+        #the same magnifications and angles are read many times
+        try:
+            return self.ieeeDoubles[ibmData]
+        except KeyError:
+            ieeeDouble = self.ieeeDoubles[ibmData] = self.convertIbmData(ibmData)
+            return ieeeDouble
+
+    def convertIbmData(self,ibmData):
        #the GDS double is in IBM 370 format like this:
        #(1)sign (7)exponent (56)mantissa
        #exponent is excess 64, mantissa has no implied 1
@@ -71,17 +98,87 @@ class Gds2reader:
         newFloat = struct.unpack('>d',asciiDouble)[0]
         print("Check:"+str(newFloat))
 
+    def openFile(self,fileName):
+        """Map a file to memory to read the records without copying them from the file."""
+        self.fileHandle = open(fileName,"rb")
+        self.data = mmap.mmap(self.fileHandle.fileno(),0,access=mmap.ACCESS_READ)
+        self.dataSize = len(self.data)
+        self.offset = 0
+        self.structureOffsets = {}
+
+    def closeFile(self):
+        self.data.close()
+        self.data = None
+        self.fileHandle.close()
+
     def readNextRecord(self):
-        global offset
-        recordLengthAscii = self.fileHandle.read(2) #first 2 bytes tell us the length of the record
-        if len(recordLengthAscii)==0:
+        offset = self.offset
+        if offset+4 > self.dataSize:
             return
-        recordLength = struct.unpack(">h",recordLengthAscii)  #gives us a tuple with a short int inside
-        offset_int = int(recordLength[0])  # extract length
-        offset += offset_int  # count offset
-	#print(offset)  #print out the record numbers for de-bugging
-        record = self.fileHandle.read(recordLength[0]-2) #read the rest of it (first 2 bytes were already read)
-        return record
+        #first 2 bytes tell us the length of the record
+        recordLength = unsignedShortUnpacker.unpack_from(self.data,offset)[0]
+        if recordLength < 4:
+            #the null padding after the end of the library
+            return
+        self.offset = offset+recordLength
+        return self.data[offset+2:self.offset]
+
+    def unpackCoordinates(self,record):
+        """The list of points of an XY record."""
+        numPoints = (len(record)-2)//8
+        if numPoints > self.bulkCoordinates:
+            points = np.frombuffer(record,dtype=">i4",offset=2).reshape(numPoints,2)
+            return list(zip(points[:,0].tolist(),points[:,1].tolist()))
+        try:
+            unpacker = self.coordinateUnpackers[numPoints]
+        except KeyError:
+            unpacker = self.coordinateUnpackers[numPoints] = struct.Struct(">{}i".format(2*numPoints))
+        values = unpacker.unpack_from(record,2)
+        return list(zip(values[0::2],values[1::2]))
+
+    def indexStructures(self):
+        """
+        Find the offset of every structure in one pass over the record headers.
+        The next record to read must be the first structure.
+        """
+        offset = self.offset
+        structureOffset = None
+        while offset+4 <= self.dataSize:
+            (recordLength,idBits) = recordHeaderUnpacker.unpack_from(self.data,offset)
+            if recordLength < 4:
+                break
+            if idBits==b'\x05\x02': #Begin structure
+                structureOffset = offset
+            elif idBits==b'\x06\x06': #Structure name
+                structName = self.stripNonASCII(self.data[offset+4:offset+recordLength])
+                self.structureOffsets[structName] = structureOffset
+            elif idBits==b'\x04\x00': #End of library
+                break
+            offset += recordLength
+        return self.structureOffsets
+
+    def getIndexedName(self,structName):
+        """Structure names are read with the NUL padding of odd length names, so pad the name to look it up."""
+        if structName not in self.structureOffsets and len(structName)%2 == 1:
+            return structName+"\x00"
+        return structName
+
+    def readStructure(self,structName):
+        """Read one structure of the indexed file and add it to the layout object."""
+        self.offset = self.structureOffsets[structName]
+        self.readNextStructure()
+        return self.layoutObject.structures[structName]
+
+    def readStructureTree(self,structName):
+        """Read a structure and the structures that it references that weren't read yet."""
+        names = [structName]
+        while names:
+            name = names.pop()
+            if name in self.layoutObject.structures or name not in self.structureOffsets:
+                continue
+            structure = self.readStructure(name)
+            names.extend(sref.sName for sref in structure.srefs)
+            names.extend(aref.aName for aref in structure.arefs)
 
     def readHeader(self):
         self.layoutObject.info.clear()
@@ -89,7 +186,7 @@ class Gds2reader:
         record = self.readNextRecord()
         idBits = record[0:2]
         if(idBits==b'\x00\x02' and len(record)==4):
-            gdsVersion = struct.unpack(">h",record[2:4])[0]
+            gdsVersion = shortUnpacker.unpack_from(record,2)[0]
             self.layoutObject.info["gdsVersion"]=gdsVersion
             if(self.debugToTerminal==1):
                 print("GDS II Version "+str(gdsVersion))
@@ -103,7 +200,7 @@ class Gds2reader:
             idBits = record[0:2]
             ## Modified Date
             if idBits==b'\x01\x02' and len(record)==26:
-                modYear = struct.unpack(">h",record[2:4])[0]
+                modYear = shortUnpacker.unpack_from(record,2)[0]
                 modMonth = struct.unpack(">h",record[4:6])[0]
                 modDay = struct.unpack(">h",record[6:8])[0]
                 modHour = struct.unpack(">h",record[8:10])[0]
@@ -182,35 +279,31 @@ class Gds2reader:
             record = self.readNextRecord()
             idBits = record[0:2]
             if(idBits==b'\x26\x01'):  #ELFLAGS
-                elementFlags = struct.unpack(">h",record[2:4])[0]
+                elementFlags = shortUnpacker.unpack_from(record,2)[0]
                 thisBoundary.elementFlags=elementFlags
                 if(self.debugToTerminal==1):
                     print("\t\tElement Flags: "+str(elementFlags))
             elif(idBits==b'\x2F\x03'):  #PLEX
-                plex = struct.unpack(">i",record[2:6])[0]
+                plex = intUnpacker.unpack_from(record,2)[0]
                 thisBoundary.plex=plex
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
             elif(idBits==b'\x0D\x02'):  #Layer
-                drawingLayer = struct.unpack(">h",record[2:4])[0]
+                drawingLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisBoundary.drawingLayer=drawingLayer
                 if drawingLayer not in self.layoutObject.layerNumbersInUse:
                     self.layoutObject.layerNumbersInUse += [drawingLayer]
                 if(self.debugToTerminal==1):
                     print("\t\tDrawing Layer: "+str(drawingLayer))
             elif(idBits==b'\x0E\x02'):  #Purpose DATATYPE
-                purposeLayer = struct.unpack(">h",record[2:4])[0]
+                purposeLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisBoundary.purposeLayer=purposeLayer
                 if(self.debugToTerminal==1):
                     print("\t\tPurpose Layer: "+str(purposeLayer))
             elif(idBits==b'\x10\x03'):  #XY Data Points
-                numDataPoints = len(record)-2  #packed as XY coordinates 4 bytes each
-                thisBoundary.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisBoundary.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
+                thisBoundary.coordinates=self.unpackCoordinates(record)
+                if(self.debugToTerminal==1):
+                    for (x,y) in thisBoundary.coordinates:
                         print("\t\t\tXY Point: "+str(x)+","+str(y))
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
@@ -227,50 +320,46 @@ class Gds2reader:
             record = self.readNextRecord()
             idBits = record[0:2]
             if(idBits==b'\x26\x01'):  #ELFLAGS
-                elementFlags = struct.unpack(">h",record[2:4])[0]
+                elementFlags = shortUnpacker.unpack_from(record,2)[0]
                 thisPath.elementFlags=elementFlags
                 if(self.debugToTerminal==1):
                     print("\t\tElement Flags: "+str(elementFlags))
             elif(idBits==b'\x2F\x03'):  #PLEX
-                plex = struct.unpack(">i",record[2:6])[0]
+                plex = intUnpacker.unpack_from(record,2)[0]
                 thisPath.plex=plex
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
             elif(idBits==b'\x0D\x02'):  #Layer
-                drawingLayer = struct.unpack(">h",record[2:4])[0]
+                drawingLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisPath.drawingLayer=drawingLayer
                 if drawingLayer not in self.layoutObject.layerNumbersInUse:
                     self.layoutObject.layerNumbersInUse += [drawingLayer]
                 if(self.debugToTerminal==1):
                     print("\t\t\tDrawing Layer: "+str(drawingLayer))
             elif(idBits==b'\x16\x02'):  #Purpose
-                purposeLayer = struct.unpack(">h",record[2:4])[0]
+                purposeLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisPath.purposeLayer=purposeLayer
                 if(self.debugToTerminal==1):
                     print("\t\tPurpose Layer: "+str(purposeLayer))
             elif(idBits==b'\x21\x02'):  #Path type
-                pathType = struct.unpack(">h",record[2:4])[0]
+                pathType = shortUnpacker.unpack_from(record,2)[0]
                 thisPath.pathType=pathType
                 if(self.debugToTerminal==1):
                     print("\t\t\tPath Type: "+str(pathType))
             elif(idBits==b'\x0E\x02'):  #Data type
-                dataType = struct.unpack(">h",record[2:4])[0]
+                dataType = shortUnpacker.unpack_from(record,2)[0]
                 thisPath.dataType=dataType
                 if(self.debugToTerminal==1):
                     print("\t\t\tData Type: "+str(dataType))
             elif(idBits==b'\x0F\x03'):  #Path width
-                pathWidth = struct.unpack(">i",record[2:6])[0]
+                pathWidth = intUnpacker.unpack_from(record,2)[0]
                 thisPath.pathWidth=pathWidth
                 if(self.debugToTerminal==1):
                     print("\t\t\tPath Width: "+str(pathWidth))
             elif(idBits==b'\x10\x03'):  #XY Data Points
-                numDataPoints = len(record)-2  #packed nas XY coordinates 4 bytes each
-                thisPath.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisPath.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
+                thisPath.coordinates=self.unpackCoordinates(record)
+                if(self.debugToTerminal==1):
+                    for (x,y) in thisPath.coordinates:
                         print("\t\t\tXY Point: "+str(x)+","+str(y))
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
@@ -287,12 +376,12 @@ class Gds2reader:
             record = self.readNextRecord()
             idBits = record[0:2]
             if(idBits==b'\x26\x01'):  #ELFLAGS
-                elementFlags = struct.unpack(">h",record[2:4])[0]
+                elementFlags = shortUnpacker.unpack_from(record,2)[0]
                 thisSref.elementFlags=elementFlags
                 if(self.debugToTerminal==1):
                     print("\t\tElement Flags: "+str(elementFlags))
             elif(idBits==b'\x2F\x03'):  #PLEX
-                plex = struct.unpack(">i",record[2:6])[0]
+                plex = intUnpacker.unpack_from(record,2)[0]
                 thisSref.plex=plex
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
@@ -302,7 +391,7 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\tReference Name:"+sName)
             elif(idBits==b'\x1A\x01'):  #Transformation
-                transFlags = struct.unpack(">H",record[2:4])[0]
+                transFlags = unsignedShortUnpacker.unpack_from(record,2)[0]
                 mirrorFlag = bool(transFlags&0x8000)   ##these flags are a bit sketchy
                 rotateFlag = bool(transFlags&0x0002)
                 magnifyFlag = bool(transFlags&0x0004)
@@ -323,8 +412,7 @@ class Gds2reader:
                     print("\t\t\tRotate Angle (CCW):"+str(rotateAngle))
             elif(idBits==b'\x10\x03'):  #XY Data Points
                 index=2
-                x=struct.unpack(">i",record[index:index+4])[0]
-                y=struct.unpack(">i",record[index+4:index+8])[0]
+                (x,y)=pointUnpacker.unpack_from(record,index)
                 thisSref.coordinates=(x,y)
                 if(self.debugToTerminal==1):
                     print("\t\t\tXY Point: "+str(x)+","+str(y))
@@ -343,22 +431,22 @@ class Gds2reader:
             record = self.readNextRecord()
             idBits = record[0:2]
             if(idBits==b'\x26\x01'):  #ELFLAGS
-                elementFlags = struct.unpack(">h",record[2:4])[0]
+                elementFlags = shortUnpacker.unpack_from(record,2)[0]
                 thisAref.elementFlags=elementFlags
                 if(self.debugToTerminal==1):
                     print("\t\tElement Flags: "+str(elementFlags))
             elif(idBits==b'\x2F\x03'):  #PLEX
-                plex = struct.unpack(">i",record[2:6])[0]
+                plex = intUnpacker.unpack_from(record,2)[0]
                 thisAref.plex=plex
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
             elif(idBits==b'\x12\x06'):  #Reference Name
-                aName = record[2::]
-                thisAref.aName=aName
+                aName = self.stripNonASCII(record[2::])
+                thisAref.aName=aName.rstrip()
                 if(self.debugToTerminal==1):
                     print("\t\tReference Name:"+aName)
             elif(idBits==b'\x1A\x01'):  #Transformation
-                transFlags = struct.unpack(">H",record[2:4])[0]
+                transFlags = unsignedShortUnpacker.unpack_from(record,2)[0]
                 mirrorFlag = bool(transFlags&0x8000)   ##these flags are a bit sketchy
                 rotateFlag = bool(transFlags&0x0002)
                 magnifyFlag = bool(transFlags&0x0004)
@@ -377,17 +465,21 @@ class Gds2reader:
                 thisAref.rotateAngle=rotateAngle
                 if(self.debugToTerminal==1):
                     print("\t\t\tRotate Angle (CCW):"+str(rotateAngle))
+            elif(idBits==b'\x13\x02'):  #COLROW
+                columns,rows=struct.unpack(">hh",record[2:6])
+                thisAref.columns=columns
+                thisAref.rows=rows
+                if(self.debugToTerminal==1):
+                    print("\t\t\tColumns: "+str(columns)+" Rows: "+str(rows))
             elif(idBits==b'\x10\x03'):  #XY Data Points
                 index=2
-                topLeftX=struct.unpack(">i",record[index:index+4])[0]
-                topLeftY=struct.unpack(">i",record[index+4:index+8])[0]
-                rightMostX=struct.unpack(">i",record[index+8:index+12])[0]
-                bottomMostY=struct.unpack(">i",record[index+12:index+16])[0]
-                thisAref.coordinates=[(topLeftX,topLeftY),(rightMostX,topLeftY),(topLeftX,bottomMostY)]
-                if(self.debugToTerminal==1):
-                    print("\t\t\tTop Left Point: "+str(topLeftX)+","+str(topLeftY))
-                    print("\t\t\t\tArray Width: "+str(rightMostX-topLeftX))
-                    print("\t\t\t\tArray Height: "+str(topLeftY-bottomMostY))
+                #the reference point, the point after the last column and the point after the last row
+                coordinates=struct.unpack(">6i",record[index:index+24])
+                thisAref.coordinates=[coordinates[0:2],coordinates[2:4],coordinates[4:6]]
+                if(self.debugToTerminal==1):
+                    print("\t\t\tReference Point: "+str(coordinates[0])+","+str(coordinates[1]))
+                    print("\t\t\t\tColumn Point: "+str(coordinates[2])+","+str(coordinates[3]))
+                    print("\t\t\t\tRow Point: "+str(coordinates[4])+","+str(coordinates[5]))
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
                     print("\t\t\tEndAref")
@@ -403,29 +495,29 @@ class Gds2reader:
             record = self.readNextRecord()
             idBits = record[0:2]
             if(idBits==b'\x26\x01'):  #ELFLAGS
-                elementFlags = struct.unpack(">h",record[2:4])[0]
+                elementFlags = shortUnpacker.unpack_from(record,2)[0]
                 thisText.elementFlags=elementFlags
                 if(self.debugToTerminal==1):
                     print("\t\tElement Flags: "+str(elementFlags))
             elif(idBits==b'\x2F\x03'):  #PLEX
-                plex = struct.unpack(">i",record[2:6])[0]
+                plex = intUnpacker.unpack_from(record,2)[0]
                 thisText.plex=plex
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
             elif(idBits==b'\x0D\x02'):  #Layer
-                drawingLayer = struct.unpack(">h",record[2:4])[0]
+                drawingLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisText.drawingLayer=drawingLayer
                 if drawingLayer not in self.layoutObject.layerNumbersInUse:
                     self.layoutObject.layerNumbersInUse += [drawingLayer]
                 if(self.debugToTerminal==1):
                     print("\t\tDrawing Layer: "+str(drawingLayer))
             elif(idBits==b'\x16\x02'):  #Purpose TEXTTYPE
-                purposeLayer = struct.unpack(">h",record[2:4])[0]
+                purposeLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisText.purposeLayer=purposeLayer
                 if(self.debugToTerminal==1):
                     print("\t\tPurpose Layer: "+str(purposeLayer))
             elif(idBits==b'\x1A\x01'):  #Transformation
-                transFlags = struct.unpack(">H",record[2:4])[0]
+                transFlags = unsignedShortUnpacker.unpack_from(record,2)[0]
                 mirrorFlag = bool(transFlags&0x8000)   ##these flags are a bit sketchy
                 rotateFlag = bool(transFlags&0x0002)
                 magnifyFlag = bool(transFlags&0x0004)
@@ -445,17 +537,17 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\t\tRotate Angle (CCW):"+str(rotateAngle))
             elif(idBits==b'\x21\x02'):  #Path type
-                pathType = struct.unpack(">h",record[2:4])[0]
+                pathType = shortUnpacker.unpack_from(record,2)[0]
                 thisText.pathType=pathType
                 if(self.debugToTerminal==1):
                     print("\t\t\tPath Type: "+str(pathType))
             elif(idBits==b'\x0F\x03'):  #Path width
-                pathWidth = struct.unpack(">i",record[2:6])[0]
+                pathWidth = intUnpacker.unpack_from(record,2)[0]
                 thisText.pathWidth=pathWidth
                 if(self.debugToTerminal==1):
                     print("\t\t\tPath Width: "+str(pathWidth))
             elif(idBits==b'\x1A\x01'):  #Text Presentation
-                presentationFlags = struct.unpack(">H",record[2:4])[0]
+                presentationFlags = unsignedShortUnpacker.unpack_from(record,2)[0]
                 font = (presentationFlags&0x0030)>>4   ##these flags are a bit sketchy
                 verticalFlags = (presentationFlags&0x000C)
                 horizontalFlags = (presentationFlags&0x0003)
@@ -482,8 +574,7 @@ class Gds2reader:
                         print("\t\t\tHorizontal: Right")
             elif(idBits==b'\x10\x03'):  #XY Data Points
                 index=2
-                x=struct.unpack(">i",record[index:index+4])[0]
-                y=struct.unpack(">i",record[index+4:index+8])[0]
+                (x,y)=pointUnpacker.unpack_from(record,index)
                 thisText.coordinates=[(x,y)]
                 if(self.debugToTerminal==1):
                     print("\t\t\tXY Point: "+str(x)+","+str(y))
@@ -508,35 +599,31 @@ class Gds2reader:
             record = self.readNextRecord()
             idBits = record[0:2]
             if(idBits==b'\x26\x01'):  #ELFLAGS
-                elementFlags = struct.unpack(">h",record[2:4])[0]
+                elementFlags = shortUnpacker.unpack_from(record,2)[0]
                 thisNode.elementFlags=elementFlags
                 if(self.debugToTerminal==1):
                     print("\t\tElement Flags: "+str(elementFlags))
             elif(idBits==b'\x2F\x03'):  #PLEX
-                plex = struct.unpack(">i",record[2:6])[0]
+                plex = intUnpacker.unpack_from(record,2)[0]
                 thisNode.plex=plex
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
             elif(idBits==b'\x0D\x02'):  #Layer
-                drawingLayer = struct.unpack(">h",record[2:4])[0]
+                drawingLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisNode.drawingLayer=drawingLayer
                 if drawingLayer not in self.layoutObject.layerNumbersInUse:
                     self.layoutObject.layerNumbersInUse += [drawingLayer]
                 if(self.debugToTerminal==1):
                     print("\t\tDrawing Layer: "+str(drawingLayer))
             elif(idBits==b'\x2A\x02'):  #Node Type
-                nodeType = struct.unpack(">h",record[2:4])[0]
+                nodeType = shortUnpacker.unpack_from(record,2)[0]
                 thisNode.nodeType=nodeType
                 if(self.debugToTerminal==1):
                     print("\t\tNode Type: "+str(nodeType))
             elif(idBits==b'\x10\x03'):  #XY Data Points
-                numDataPoints = len(record)-2  #packed as XY coordinates 4 bytes each
-                thisNode.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisNode.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
+                thisNode.coordinates=self.unpackCoordinates(record)
+                if(self.debugToTerminal==1):
+                    for (x,y) in thisNode.coordinates:
                         print("\t\t\tXY Point: "+str(x)+","+str(y))
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
@@ -559,35 +646,31 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\tElement Flags: "+str(elementFlags))
             elif(idBits==b'\x2F\x03'):  #PLEX
-                plex = struct.unpack(">i",record[2:6])[0]
+                plex = intUnpacker.unpack_from(record,2)[0]
                 thisBox.plex=plex
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
             elif(idBits==b'\x0D\x02'):  #Layer
-                drawingLayer = struct.unpack(">h",record[2:4])[0]
+                drawingLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisBox.drawingLayer=drawingLayer
                 if drawingLayer not in self.layoutObject.layerNumbersInUse:
                     self.layoutObject.layerNumbersInUse += [drawingLayer]
                 if(self.debugToTerminal==1):
                     print("\t\tDrawing Layer: "+str(drawingLayer))
             elif(idBits==b'\x16\x02'):  #Purpose TEXTYPE
-                purposeLayer = struct.unpack(">h",record[2:4])[0]
+                purposeLayer = shortUnpacker.unpack_from(record,2)[0]
                 thisBox.purposeLayer=purposeLayer
                 if(self.debugToTerminal==1):
                     print("\t\tPurpose Layer: "+str(purposeLayer))
             elif(idBits==b'\x2D\x00'):  #Box
-                boxValue = struct.unpack(">h",record[2:4])[0]
+                boxValue = shortUnpacker.unpack_from(record,2)[0]
                 thisBox.boxValue=boxValue
                 if(self.debugToTerminal==1):
                     print("\t\tBox Value: "+str(boxValue))
             elif(idBits==b'\x10\x03'):  #XY Data Points that form a closed box
-                numDataPoints = len(record)-2  #packed as XY coordinates 4 bytes each
-                thisBox.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisBox.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
+                thisBox.coordinates=self.unpackCoordinates(record)
+                if(self.debugToTerminal==1):
+                    for (x,y) in thisBox.coordinates:
                         print("\t\t\tXY Point: "+str(x)+","+str(y))
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
@@ -601,7 +684,7 @@ class Gds2reader:
         idBits = record[0:2]
         # Begin structure
         if(idBits==b'\x05\x02' and len(record)==26):
-            createYear = struct.unpack(">h",record[2:4])[0]
+            createYear = shortUnpacker.unpack_from(record,2)[0]
             createMonth = struct.unpack(">h",record[4:6])[0]
             createDay = struct.unpack(">h",record[6:8])[0]
             createHour = struct.unpack(">h",record[8:10])[0]
@@ -668,168 +751,59 @@ class Gds2reader:
         else:
             print("There was an error parsing the GDS header.  Aborting...")
 
-    def loadFromFile(self, fileName):
-        self.fileHandle = open(fileName,"rb")
-        self.readGds2()
-        self.fileHandle.close()
+    def loadFromFile(self, fileName, structName=None):
+        """
+        Load a GDS file into the layout object. If a structure name is given,
+        only that structure and the structures that it references are read.
+        """
+        self.openFile(fileName)
+        if structName == None:
+            self.readGds2()
+        elif(self.readHeader()):
+            self.indexStructures()
+            structName = self.getIndexedName(structName)
+            if structName not in self.structureOffsets:
+                self.closeFile()
+                raise KeyError("Could not find structure {} in GDS file.".format(structName))
+            self.readStructureTree(structName)
+        self.closeFile()
         self.layoutObject.initialize()
 
 ##############################################
 
     def findStruct(self,fileName,findStructName):
-	#print("find struct")
-        self.fileHandle = open(fileName,"rb")
+        """Read the structures of a file up to the wanted one and return [0, its boundaries]."""
         self.debugToTerminal=0
+        record = None
+        self.openFile(fileName)
         if(self.readHeader()):  #did the header read ok?
-            record = self.findStruct_readNextStruct(findStructName)
-            while(record == 1):
-                record = self.findStruct_readNextStruct(findStructName)
-            #now we have fallen out of the while, which means we are out of structures
-            #so test for end of library
+            self.indexStructures()
+            findStructName = self.getIndexedName(findStructName)
+            for structName in self.structureOffsets:
+                structure = self.readStructure(structName)
+                if(structName==findStructName):
+                    record = [0,structure.boundaries]
+                    break
         else:
             print("There was an error parsing the GDS header.  Aborting...")
-        self.fileHandle.close()
-	#print("End the search of",findStructName)
-        #self.layoutObject.initialize()
+        self.closeFile()
         return record
 
-    def findStruct_readNextStruct(self,findStructName):
-        self.debugToTerminal=0
-        thisStructure = GdsStructure()
-        record = self.readNextRecord()
-        idBits = record[0:2]
-        if(idBits==('\x05','\x02') and len(record)==26):
-            createYear = struct.unpack(">h",record[2]+record[3])[0]
-            createMonth = struct.unpack(">h",record[4]+record[5])[0]
-            createDay = struct.unpack(">h",record[6]+record[7])[0]
-            createHour = struct.unpack(">h",record[8]+record[9])[0]
-            createMinute = struct.unpack(">h",record[10]+record[11])[0]
-            createSecond = struct.unpack(">h",record[12]+record[13])[0]
-            modYear = struct.unpack(">h",record[14]+record[15])[0]
-            modMonth = struct.unpack(">h",record[16]+record[17])[0]
-            modDay = struct.unpack(">h",record[18]+record[19])[0]
-            modHour = struct.unpack(">h",record[20]+record[21])[0]
-            modMinute = struct.unpack(">h",record[22]+record[23])[0]
-            modSecond = struct.unpack(">h",record[24]+record[25])[0]
-            thisStructure.createDate=(createYear,createMonth,createDay,createHour,createMinute,createSecond)
-            thisStructure.modDate=(modYear,modMonth,modDay,modHour,modMinute,modSecond)
-        else:
-            #means we have hit the last structure, so return the record
-            #to whoever called us to do something with it
-            return record
-        wantedStruct=0
-        while 1:
-            record = self.readNextRecord()
-            idBits = record[0:2]
-            if idBits==('\x07','\x00'): break; #we've reached the end of the structure
-            elif(idBits==('\x06','\x06')):
-                structName = self.stripNonASCII(record[2::]) #(record[2:1] + record[1::]).rstrip()
-                thisStructure.name = structName
-                if(findStructName==thisStructure.name):
-                    wantedStruct=1
-                if(self.debugToTerminal==1):
-                    print("\tStructure Name: "+structName)
-            elif(idBits==('\x08','\x00')):
-                thisStructure.boundaries+=[self.readBoundary()]
-            elif(idBits==('\x09','\x00')):
-                thisStructure.paths+=[self.readPath()]
-            elif(idBits==('\x0A','\x00')):
-                thisStructure.srefs+=[self.readSref()]
-            elif(idBits==('\x0B','\x00')):
-                thisStructure.arefs+=[self.readAref()]
-            elif(idBits==('\x0C','\x00')):
-                thisStructure.texts+=[self.readText()]
-            elif(idBits==('\x15','\x00')):
-                thisStructure.nodes+=[self.readNode()]
-            elif(idBits==('\x2E','\x02')):
-                thisStructure.boxes+=[self.readBox()]
-        if(self.debugToTerminal==1):
-            print("\tEnd of Structure.")
-        self.layoutObject.structures[structName]=thisStructure #add this structure to the layout object
-        if(wantedStruct == 0):
-            return 1
-        else:
-	    #print("\tDone with collectting bound. Return")
-            return [0,thisStructure.boundaries]
-
     def findLabel(self,fileName,findLabelName):
-	#print("find Label")
-        self.fileHandle = open(fileName,"rb")
+        """Read the structures of a file up to the first one with the wanted label and return [0, the labels]."""
         self.debugToTerminal=0
+        record = None
+        self.openFile(fileName)
         if(self.readHeader()):  #did the header read ok?
-            record = self.findLabel_readNextStruct(findLabelName)
-            while(record == 1):
-                record = self.findLabel_readNextStruct(findLabelName)
-            #now we have fallen out of the while, which means we are out of structures
-            #so test for end of library
+            self.indexStructures()
+            for structName in self.structureOffsets:
+                structure = self.readStructure(structName)
+                #Be careful: label.textString contains one space string in it. Delete that one before use it
+                wantedtexts = [label for label in structure.texts if findLabelName == label.textString[0:(len(label.textString)-1)]]
+                if(len(wantedtexts)>0):
+                    record = [0,[GdsText()]+wantedtexts]
+                    break
         else:
             print("There was an error parsing the GDS header.  Aborting...")
-        self.fileHandle.close()
-	#print("End the search of",findStructName)
-        #self.layoutObject.initialize()
+        self.closeFile()
         return record
-
-    def findLabel_readNextStruct(self,findLabelName):
-        self.debugToTerminal=0
-        thisStructure = GdsStructure()
-        record = self.readNextRecord()
-        idBits = record[0:2]
-        if(idBits==('\x05','\x02') and len(record)==26):
-            createYear = struct.unpack(">h",record[2]+record[3])[0]
-            createMonth = struct.unpack(">h",record[4]+record[5])[0]
-            createDay = struct.unpack(">h",record[6]+record[7])[0]
-            createHour = struct.unpack(">h",record[8]+record[9])[0]
-            createMinute = struct.unpack(">h",record[10]+record[11])[0]
-            createSecond = struct.unpack(">h",record[12]+record[13])[0]
-            modYear = struct.unpack(">h",record[14]+record[15])[0]
-            modMonth = struct.unpack(">h",record[16]+record[17])[0]
-            modDay = struct.unpack(">h",record[18]+record[19])[0]
-            modHour = struct.unpack(">h",record[20]+record[21])[0]
-            modMinute = struct.unpack(">h",record[22]+record[23])[0]
-            modSecond = struct.unpack(">h",record[24]+record[25])[0]
-            thisStructure.createDate=(createYear,createMonth,createDay,createHour,createMinute,createSecond)
-            thisStructure.modDate=(modYear,modMonth,modDay,modHour,modMinute,modSecond)
-        else:
-            #means we have hit the last structure, so return the record
-            #to whoever called us to do something with it
-            return record
-        wantedLabel=0
-        wantedtexts=[GdsText()]
-        while 1:
-            record = self.readNextRecord()
-            idBits = record[0:2]
-            if idBits==('\x07','\x00'): break; #we've reached the end of the structure
-            elif(idBits==('\x06','\x06')):
-                structName = self.stripNonASCII(record[2::]) #(record[2:1] + record[1::]).rstrip()
-                thisStructure.name = structName
-                if(self.debugToTerminal==1):
-                    print("\tStructure Name: "+structName)
-            elif(idBits==('\x08','\x00')):
-                thisStructure.boundaries+=[self.readBoundary()]
-            elif(idBits==('\x09','\x00')):
-                thisStructure.paths+=[self.readPath()]
-            elif(idBits==('\x0A','\x00')):
-                thisStructure.srefs+=[self.readSref()]
-            elif(idBits==('\x0B','\x00')):
-                thisStructure.arefs+=[self.readAref()]
-            elif(idBits==('\x0C','\x00')):
-                label=self.readText()
-		#Be careful: label.textString contains one space string in it. Delete that one before use it
-                if( findLabelName == label.textString[0:(len(label.textString)-1)] ):
-                    wantedLabel=1
-                    wantedtexts+=[label]
-                thisStructure.texts+=[label]
-                if(self.debugToTerminal == 1):
-                    print(label.textString[0:(len(label.textString)-1)],findLabelName,( findLabelName == label.textString[0:(len(label.textString)-1)] ))
-            elif(idBits==('\x15','\x00')):
-                thisStructure.nodes+=[self.readNode()]
-            elif(idBits==('\x2E','\x02')):
-                thisStructure.boxes+=[self.readBox()]
-        if(self.debugToTerminal==1):
-            print("\tEnd of Structure.")
-        self.layoutObject.structures[structName]=thisStructure #add this structure to the layout object
-        if(wantedLabel == 0):
-            return 1
-        else:
-            #print("\tDone with collectting bound. Return")
-            return [0,wantedtexts]
@@ -1,15 +1,31 @@
 #!/usr/bin/env python
 import struct
+import numpy as np
 from .gdsPrimitives import *
 
+#precompiled packers of the record fields
+shortPacker = struct.Struct(">h")
+unsignedShortPacker = struct.Struct(">H")
+intPacker = struct.Struct(">i")
+colRowPacker = struct.Struct(">hh")
+
 class Gds2writer:
     """Class to take a populated layout class and write it to a file in GDSII format"""
     ## Based on info from http://www.rulabinsky.com/cavd/text/chapc.html
 
+    #the records are collected in a buffer that is written when it is larger than this
+    bufferSize = 1<<20
+    #coordinate lists with more points than this are converted with numpy
+    bulkCoordinates = 64
+
     def __init__(self,layoutObject):
         self.fileHandle = 0
+        self.buffer = bytearray()
         self.layoutObject = layoutObject
         self.debugToTerminal=0  #do we dump debug data to the screen
+        #packers of the XY records indexed by the number of points
+        self.coordinatePackers = {}
+        self.ibmDoubles = {}
 
     def print64AsBinary(self,number):
         #debugging method for binary inspection
@@ -51,6 +67,14 @@ class Gds2writer:
         return newFloat
 
     def ibmDataFromIeeeDouble(self,ieeeDouble):
+        #the same magnifications and angles are written many times
+        try:
+            return self.ibmDoubles[ieeeDouble]
+        except KeyError:
+            ibmData = self.ibmDoubles[ieeeDouble] = self.convertIeeeDouble(ieeeDouble)
+            return ibmData
+
+    def convertIeeeDouble(self,ieeeDouble):
         asciiDouble = struct.pack('>d',ieeeDouble)
         data = struct.unpack('>q',asciiDouble)[0]
         sign = (data >> 63) & 0x01
@@ -93,30 +117,55 @@ class Gds2writer:
 
     def writeRecord(self,record):
         recordLength = len(record)+2  #make sure to include this in the length
-        recordLengthAscii=struct.pack(">h",recordLength)
-        self.fileHandle.write(recordLengthAscii+record)
+        self.buffer += unsignedShortPacker.pack(recordLength)
+        self.buffer += record
+
+    def writeEndElement(self):
+        #the record with its length
+        self.buffer += b'\x00\x04\x11\x00' #End Of Element
+        if len(self.buffer) > self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        self.fileHandle.write(self.buffer)
+        self.buffer = bytearray()
+
+    def packCoordinates(self,coordinates):
+        """The XY record data of a list of points. Coordinates are truncated to integers."""
+        if len(coordinates) > self.bulkCoordinates:
+            points = np.array([(coordinate[0],coordinate[1]) for coordinate in coordinates],dtype=np.float64)
+            return np.trunc(points).astype(">i4").tobytes()
+        try:
+            packer = self.coordinatePackers[len(coordinates)]
+        except KeyError:
+            packer = self.coordinatePackers[len(coordinates)] = struct.Struct(">{}i".format(2*len(coordinates)))
+        values = []
+        for coordinate in coordinates:
+            values.append(int(coordinate[0]))
+            values.append(int(coordinate[1]))
+        return packer.pack(*values)
 
     def writeHeader(self):
         ##  Header
         if("gdsVersion" in self.layoutObject.info):
             idBits=b'\x00\x02'
-            gdsVersion = struct.pack(">h",self.layoutObject.info["gdsVersion"])
+            gdsVersion = shortPacker.pack(self.layoutObject.info["gdsVersion"])
             self.writeRecord(idBits+gdsVersion)
         ## Modified Date
         if("dates" in self.layoutObject.info):
             idBits=b'\x01\x02'
-            modYear = struct.pack(">h",self.layoutObject.info["dates"][0])
-            modMonth = struct.pack(">h",self.layoutObject.info["dates"][1])
-            modDay = struct.pack(">h",self.layoutObject.info["dates"][2])
-            modHour = struct.pack(">h",self.layoutObject.info["dates"][3])
-            modMinute = struct.pack(">h",self.layoutObject.info["dates"][4])
-            modSecond = struct.pack(">h",self.layoutObject.info["dates"][5])
-            lastAccessYear = struct.pack(">h",self.layoutObject.info["dates"][6])
-            lastAccessMonth = struct.pack(">h",self.layoutObject.info["dates"][7])
-            lastAccessDay = struct.pack(">h",self.layoutObject.info["dates"][8])
-            lastAccessHour = struct.pack(">h",self.layoutObject.info["dates"][9])
-            lastAccessMinute = struct.pack(">h",self.layoutObject.info["dates"][10])
-            lastAccessSecond = struct.pack(">h",self.layoutObject.info["dates"][11])
+            modYear = shortPacker.pack(self.layoutObject.info["dates"][0])
+            modMonth = shortPacker.pack(self.layoutObject.info["dates"][1])
+            modDay = shortPacker.pack(self.layoutObject.info["dates"][2])
+            modHour = shortPacker.pack(self.layoutObject.info["dates"][3])
+            modMinute = shortPacker.pack(self.layoutObject.info["dates"][4])
+            modSecond = shortPacker.pack(self.layoutObject.info["dates"][5])
+            lastAccessYear = shortPacker.pack(self.layoutObject.info["dates"][6])
+            lastAccessMonth = shortPacker.pack(self.layoutObject.info["dates"][7])
+            lastAccessDay = shortPacker.pack(self.layoutObject.info["dates"][8])
+            lastAccessHour = shortPacker.pack(self.layoutObject.info["dates"][9])
+            lastAccessMinute = shortPacker.pack(self.layoutObject.info["dates"][10])
+            lastAccessSecond = shortPacker.pack(self.layoutObject.info["dates"][11])
             self.writeRecord(idBits+modYear+modMonth+modDay+modHour+modMinute+modSecond+\
                              lastAccessYear+lastAccessMonth+lastAccessDay+lastAccessHour+\
                              lastAccessMinute+lastAccessSecond)
@@ -124,7 +173,7 @@ class Gds2writer:
         if("libraryName" in self.layoutObject.info):
             idBits=b'\x02\x06'
             if (len(self.layoutObject.info["libraryName"]) % 2 != 0):
-                libraryName = self.layoutObject.info["libraryName"].encode() + "\0"
+                libraryName = self.layoutObject.info["libraryName"].encode() + b"\0"
             else:
                 libraryName = self.layoutObject.info["libraryName"].encode()
             self.writeRecord(idBits+libraryName)
@@ -147,11 +196,11 @@ class Gds2writer:
             self.writeRecord(idBits+attributeTable)
         if("generations" in self.layoutObject.info):
             idBits=b'\x22\x02'
-            generations = struct.pack(">h",self.layoutObject.info["generations"])
+            generations = shortPacker.pack(self.layoutObject.info["generations"])
             self.writeRecord(idBits+generations)
         if("fileFormat" in self.layoutObject.info):
             idBits=b'\x36\x02'
-            fileFormat = struct.pack(">h",self.layoutObject.info["fileFormat"])
+            fileFormat = shortPacker.pack(self.layoutObject.info["fileFormat"])
             self.writeRecord(idBits+fileFormat)
         if("mask" in self.layoutObject.info):
             idBits=b'\x37\x06'
@@ -188,89 +237,73 @@ class Gds2writer:
         self.writeRecord(idBits)
         if(thisBoundary.elementFlags!=""):
             idBits=b'\x26\x01' # ELFLAGS
-            elementFlags = struct.pack(">h",thisBoundary.elementFlags)
+            elementFlags = shortPacker.pack(thisBoundary.elementFlags)
             self.writeRecord(idBits+elementFlags)
         if(thisBoundary.plex!=""):
             idBits=b'\x2F\x03'  # PLEX
-            plex = struct.pack(">i",thisBoundary.plex)
+            plex = intPacker.pack(thisBoundary.plex)
             self.writeRecord(idBits+plex)
         if(thisBoundary.drawingLayer!=""):
             idBits=b'\x0D\x02' # drawing layer
-            drawingLayer = struct.pack(">h",thisBoundary.drawingLayer)
+            drawingLayer = shortPacker.pack(thisBoundary.drawingLayer)
             self.writeRecord(idBits+drawingLayer)
         if(thisBoundary.purposeLayer!=""):
             idBits=b'\x0E\x02' # DataType
             if type(thisBoundary.purposeLayer)!=int:
                 import pdb; pdb.set_trace()
-            dataType = struct.pack(">h",thisBoundary.purposeLayer)
+            dataType = shortPacker.pack(thisBoundary.purposeLayer)
             self.writeRecord(idBits+dataType)
         if(thisBoundary.coordinates!=""):
             idBits=b'\x10\x03' # XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisBoundary.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
-        idBits=b'\x11\x00' #End Of Element
-        coordinateRecord = idBits
-        self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisBoundary.coordinates))
+        self.writeEndElement()
 
     def writePath(self,thisPath):  #writes out a path structure
         idBits=b'\x09\x00'  #record Type
         self.writeRecord(idBits)
         if(thisPath.elementFlags != ""):
             idBits=b'\x26\x01' #ELFLAGS
-            elementFlags = struct.pack(">h",thisPath.elementFlags)
+            elementFlags = shortPacker.pack(thisPath.elementFlags)
             self.writeRecord(idBits+elementFlags)
         if(thisPath.plex!=""):
             idBits=b'\x2F\x03'  #PLEX
-            plex = struct.pack(">i",thisPath.plex)
+            plex = intPacker.pack(thisPath.plex)
             self.writeRecord(idBits+plex)
         if(thisPath.drawingLayer):
             idBits=b'\x0D\x02' #drawig layer
-            drawingLayer = struct.pack(">h",thisPath.drawingLayer)
+            drawingLayer = shortPacker.pack(thisPath.drawingLayer)
             self.writeRecord(idBits+drawingLayer)
         if(thisPath.purposeLayer):
             idBits=b'\x16\x02' #purpose layer
-            purposeLayer = struct.pack(">h",thisPath.purposeLayer)
+            purposeLayer = shortPacker.pack(thisPath.purposeLayer)
             self.writeRecord(idBits+purposeLayer)
         if(thisPath.dataType is not None):
             idBits=b'\x0E\x02'  #Data type
-            dataType = struct.pack(">h",thisPath.dataType)
+            dataType = shortPacker.pack(thisPath.dataType)
             self.writeRecord(idBits+dataType)
         if(thisPath.pathType):
             idBits=b'\x21\x02'  #Path type
-            pathType = struct.pack(">h",thisPath.pathType)
+            pathType = shortPacker.pack(thisPath.pathType)
             self.writeRecord(idBits+pathType)
         if(thisPath.pathWidth):
             idBits=b'\x0F\x03'
-            pathWidth = struct.pack(">i",thisPath.pathWidth)
+            pathWidth = intPacker.pack(thisPath.pathWidth)
             self.writeRecord(idBits+pathWidth)
         if(thisPath.coordinates):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisPath.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
-        idBits=b'\x11\x00' #End Of Element
-        coordinateRecord = idBits
-        self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisPath.coordinates))
+        self.writeEndElement()
 
     def writeSref(self,thisSref):  #reads in a reference to another structure
         idBits=b'\x0A\x00'  #record Type
         self.writeRecord(idBits)
         if(thisSref.elementFlags != ""):
             idBits=b'\x26\x01' #ELFLAGS
-            elementFlags = struct.pack(">h",thisSref.elementFlags)
+            elementFlags = shortPacker.pack(thisSref.elementFlags)
             self.writeRecord(idBits+elementFlags)
         if(thisSref.plex!=""):
             idBits=b'\x2F\x03'  #PLEX
-            plex = struct.pack(">i",thisSref.plex)
+            plex = intPacker.pack(thisSref.plex)
             self.writeRecord(idBits+plex)
         if(thisSref.sName!=""):
             idBits=b'\x12\x06'
@@ -289,7 +322,7 @@ class Gds2writer:
             magnifyFlag = 0
             #rotateFlag = int(thisSref.transFlags[2])<<1
             #magnifyFlag = int(thisSref.transFlags[1])<<2
-            transFlags = struct.pack(">H",mirrorFlag|rotateFlag|magnifyFlag)
+            transFlags = unsignedShortPacker.pack(mirrorFlag|rotateFlag|magnifyFlag)
             self.writeRecord(idBits+transFlags)
         if(thisSref.magFactor!=""):
             idBits=b'\x1B\x05'
@@ -301,28 +334,19 @@ class Gds2writer:
             self.writeRecord(idBits+rotateAngle)
         if(thisSref.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            coordinate = thisSref.coordinates
-            x=struct.pack(">i",int(coordinate[0]))
-            y=struct.pack(">i",int(coordinate[1]))
-            coordinateRecord+=x
-            coordinateRecord+=y
-	    #print(thisSref.coordinates)
-            self.writeRecord(coordinateRecord)
-        idBits=b'\x11\x00' #End Of Element
-        coordinateRecord = idBits
-        self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates([thisSref.coordinates]))
+        self.writeEndElement()
 
     def writeAref(self,thisAref):  #an array of references
         idBits=b'\x0B\x00'  #record Type
         self.writeRecord(idBits)
         if(thisAref.elementFlags!=""):
             idBits=b'\x26\x01' #ELFLAGS
-            elementFlags = struct.pack(">h",thisAref.elementFlags)
+            elementFlags = shortPacker.pack(thisAref.elementFlags)
             self.writeRecord(idBits+elementFlags)
         if(thisAref.plex):
             idBits=b'\x2F\x03'  #PLEX
-            plex = struct.pack(">i",thisAref.plex)
+            plex = intPacker.pack(thisAref.plex)
             self.writeRecord(idBits+plex)
         if(thisAref.aName):
             idBits=b'\x12\x06'
@@ -330,7 +354,7 @@ class Gds2writer:
                 aName = thisAref.aName+"\0"
             else:
                 aName = thisAref.aName
-            self.writeRecord(idBits+aName)
+            self.writeRecord(idBits+aName.encode())
         if(thisAref.transFlags):
             idBits=b'\x1A\x01'
             mirrorFlag = int(thisAref.transFlags[0])<<15
@@ -341,7 +365,7 @@ class Gds2writer:
             magnifyFlag = 0
             #rotateFlag = int(thisAref.transFlags[2])<<1
             #magnifyFlag = int(thisAref.transFlags[1])<<2
-            transFlags = struct.pack(">H",mirrorFlag|rotateFlag|magnifyFlag)
+            transFlags = unsignedShortPacker.pack(mirrorFlag|rotateFlag|magnifyFlag)
             self.writeRecord(idBits+transFlags)
         if(thisAref.magFactor!=""):
             idBits=b'\x1B\x05'
@@ -351,36 +375,32 @@ class Gds2writer:
             idBits=b'\x1C\x05'
             rotateAngle=self.ibmDataFromIeeeDouble(thisAref.rotateAngle)
             self.writeRecord(idBits+rotateAngle)
+        if(thisAref.columns!=""):
+            idBits=b'\x13\x02' #COLROW
+            colRow = colRowPacker.pack(thisAref.columns,thisAref.rows)
+            self.writeRecord(idBits+colRow)
         if(thisAref.coordinates):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisAref.coordinates:
-                x=struct.pack(">i",coordinate[0])
-                y=struct.pack(">i",coordinate[1])
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
-        idBits=b'\x11\x00' #End Of Element
-        coordinateRecord = idBits
-        self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisAref.coordinates))
+        self.writeEndElement()
 
     def writeText(self,thisText):
         idBits=b'\x0C\x00'  #record Type
         self.writeRecord(idBits)
         if(thisText.elementFlags!=""):
             idBits=b'\x26\x01' #ELFLAGS
-            elementFlags = struct.pack(">h",thisText.elementFlags)
+            elementFlags = shortPacker.pack(thisText.elementFlags)
             self.writeRecord(idBits+elementFlags)
         if(thisText.plex !=""):
             idBits=b'\x2F\x03'  #PLEX
-            plex = struct.pack(">i",thisText.plex)
+            plex = intPacker.pack(thisText.plex)
             self.writeRecord(idBits+plex)
         if(thisText.drawingLayer != ""):
             idBits=b'\x0D\x02' #drawing layer
-            drawingLayer = struct.pack(">h",thisText.drawingLayer)
+            drawingLayer = shortPacker.pack(thisText.drawingLayer)
             self.writeRecord(idBits+drawingLayer)
             idBits=b'\x16\x02' #purpose layer TEXTTYPE
-            purposeLayer = struct.pack(">h",thisText.purposeLayer)
+            purposeLayer = shortPacker.pack(thisText.purposeLayer)
             self.writeRecord(idBits+purposeLayer)
         if(thisText.transFlags != ""):
             idBits=b'\x1A\x01'
@@ -392,7 +412,7 @@ class Gds2writer:
             magnifyFlag = 0
             #rotateFlag = int(thisText.transFlags[2])<<1
             #magnifyFlag = int(thisText.transFlags[1])<<2
-            transFlags = struct.pack(">H",mirrorFlag|rotateFlag|magnifyFlag)
+            transFlags = unsignedShortPacker.pack(mirrorFlag|rotateFlag|magnifyFlag)
             self.writeRecord(idBits+transFlags)
         if(thisText.magFactor!=""):
             idBits=b'\x1B\x05'
@@ -404,123 +424,99 @@ class Gds2writer:
             self.writeRecord(idBits+rotateAngle)
         if(thisText.pathType !=""):
             idBits=b'\x21\x02'  #Path type
-            pathType = struct.pack(">h",thisText.pathType)
+            pathType = shortPacker.pack(thisText.pathType)
             self.writeRecord(idBits+pathType)
         if(thisText.pathWidth != ""):
             idBits=b'\x0F\x03'
-            pathWidth = struct.pack(">i",thisText.pathWidth)
+            pathWidth = intPacker.pack(thisText.pathWidth)
             self.writeRecord(idBits+pathWidth)
         if(thisText.presentationFlags!=""):
             idBits=b'\x1A\x01'
             font = thisText.presentationFlags[0]<<4
             verticalFlags = int(thisText.presentationFlags[1])<<2
             horizontalFlags = int(thisText.presentationFlags[2])
-            presentationFlags = struct.pack(">H",font|verticalFlags|horizontalFlags)
+            presentationFlags = unsignedShortPacker.pack(font|verticalFlags|horizontalFlags)
             self.writeRecord(idBits+transFlags)
         if(thisText.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisText.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisText.coordinates))
         if(thisText.textString):
             idBits=b'\x19\x06'
             textString = thisText.textString
             self.writeRecord(idBits+textString.encode())
 
-        idBits=b'\x11\x00' #End Of Element
-        coordinateRecord = idBits
-        self.writeRecord(coordinateRecord)
+        self.writeEndElement()
 
     def writeNode(self,thisNode):
         idBits=b'\x15\x00'  #record Type
         self.writeRecord(idBits)
         if(thisNode.elementFlags!=""):
             idBits=b'\x26\x01' #ELFLAGS
-            elementFlags = struct.pack(">h",thisNode.elementFlags)
+            elementFlags = shortPacker.pack(thisNode.elementFlags)
             self.writeRecord(idBits+elementFlags)
         if(thisNode.plex!=""):
             idBits=b'\x2F\x03'  #PLEX
-            plex = struct.pack(">i",thisNode.plex)
+            plex = intPacker.pack(thisNode.plex)
             self.writeRecord(idBits+plex)
         if(thisNode.drawingLayer!=""):
             idBits=b'\x0D\x02' #drawig layer
-            drawingLayer = struct.pack(">h",thisNode.drawingLayer)
+            drawingLayer = shortPacker.pack(thisNode.drawingLayer)
             self.writeRecord(idBits+drawingLayer)
         if(thisNode.nodeType!=""):
             idBits=b'\x2A\x02'
-            nodeType = struct.pack(">h",thisNode.nodeType)
+            nodeType = shortPacker.pack(thisNode.nodeType)
             self.writeRecord(idBits+nodeType)
-        if(thisText.coordinates!=""):
+        if(thisNode.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisText.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
-
-        idBits=b'\x11\x00' #End Of Element
-        coordinateRecord = idBits
-        self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisNode.coordinates))
+
+        self.writeEndElement()
 
     def writeBox(self,thisBox):
         idBits=b'\x2E\x02'  #record Type
         self.writeRecord(idBits)
         if(thisBox.elementFlags!=""):
             idBits=b'\x26\x01' #ELFLAGS
-            elementFlags = struct.pack(">h",thisBox.elementFlags)
+            elementFlags = shortPacker.pack(thisBox.elementFlags)
             self.writeRecord(idBits+elementFlags)
         if(thisBox.plex!=""):
             idBits=b'\x2F\x03'  #PLEX
-            plex = struct.pack(">i",thisBox.plex)
+            plex = intPacker.pack(thisBox.plex)
             self.writeRecord(idBits+plex)
         if(thisBox.drawingLayer!=""):
             idBits=b'\x0D\x02' #drawig layer
-            drawingLayer = struct.pack(">h",thisBox.drawingLayer)
+            drawingLayer = shortPacker.pack(thisBox.drawingLayer)
             self.writeRecord(idBits+drawingLayer)
         if(thisBox.purposeLayer):
             idBits=b'\x16\x02' #purpose layer
-            purposeLayer = struct.pack(">h",thisBox.purposeLayer)
+            purposeLayer = shortPacker.pack(thisBox.purposeLayer)
             self.writeRecord(idBits+purposeLayer)
         if(thisBox.boxValue!=""):
             idBits=b'\x2D\x00'
-            boxValue = struct.pack(">h",thisBox.boxValue)
+            boxValue = shortPacker.pack(thisBox.boxValue)
             self.writeRecord(idBits+boxValue)
         if(thisBox.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisBox.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
-
-        idBits=b'\x11\x00' #End Of Element
-        coordinateRecord = idBits
-        self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisBox.coordinates))
+
+        self.writeEndElement()
 
     def writeNextStructure(self,structureName):
         #first put in the structure head
         thisStructure = self.layoutObject.structures[structureName]
         idBits=b'\x05\x02'
-        createYear = struct.pack(">h",thisStructure.createDate[0])
-        createMonth = struct.pack(">h",thisStructure.createDate[1])
-        createDay = struct.pack(">h",thisStructure.createDate[2])
-        createHour = struct.pack(">h",thisStructure.createDate[3])
-        createMinute = struct.pack(">h",thisStructure.createDate[4])
-        createSecond = struct.pack(">h",thisStructure.createDate[5])
-        modYear = struct.pack(">h",thisStructure.modDate[0])
-        modMonth = struct.pack(">h",thisStructure.modDate[1])
-        modDay = struct.pack(">h",thisStructure.modDate[2])
-        modHour = struct.pack(">h",thisStructure.modDate[3])
-        modMinute = struct.pack(">h",thisStructure.modDate[4])
-        modSecond = struct.pack(">h",thisStructure.modDate[5])
+        createYear = shortPacker.pack(thisStructure.createDate[0])
+        createMonth = shortPacker.pack(thisStructure.createDate[1])
+        createDay = shortPacker.pack(thisStructure.createDate[2])
+        createHour = shortPacker.pack(thisStructure.createDate[3])
+        createMinute = shortPacker.pack(thisStructure.createDate[4])
+        createSecond = shortPacker.pack(thisStructure.createDate[5])
+        modYear = shortPacker.pack(thisStructure.modDate[0])
+        modMonth = shortPacker.pack(thisStructure.modDate[1])
+        modDay = shortPacker.pack(thisStructure.modDate[2])
+        modHour = shortPacker.pack(thisStructure.modDate[3])
+        modMinute = shortPacker.pack(thisStructure.modDate[4])
+        modSecond = shortPacker.pack(thisStructure.modDate[5])
         self.writeRecord(idBits+createYear+createMonth+createDay+createHour+createMinute+createSecond\
                          +modYear+modMonth+modDay+modHour+modMinute+modSecond)
         #now the structure name
@@ -550,10 +546,38 @@ class Gds2writer:
         idBits=b'\x07\x00'
         self.writeRecord(idBits)
 
+    def getStructureOrder(self):
+        """The structures with every structure after the structures that it references."""
+        structures = self.layoutObject.structures
+        order = []
+        visited = set()
+        for rootName in structures:
+            if rootName in visited:
+                continue
+            visited.add(rootName)
+            #an explicit stack since the hierarchy can be deeper than the recursion limit
+            stack = [(rootName, self.getReferencedNames(structures[rootName]))]
+            while stack:
+                (name, references) = stack[-1]
+                for reference in references:
+                    if reference in structures and reference not in visited:
+                        visited.add(reference)
+                        stack.append((reference, self.getReferencedNames(structures[reference])))
+                        break
+                else:
+                    stack.pop()
+                    order.append(name)
+        return order
+
+    def getReferencedNames(self,structure):
+        names = [sref.sName for sref in structure.srefs] + [aref.aName for aref in structure.arefs]
+        return iter(names)
+
     def writeGds2(self):
         self.writeHeader();  #first, put the header in
         #go through each structure in the layout and write it to the file
-        for structureName in self.layoutObject.structures:
+        #after the structures that it references
+        for structureName in self.getStructureOrder():
             self.writeNextStructure(structureName)
         #at the end, put in the END LIB record
         idBits=b'\x04\x00'
@@ -561,5 +585,7 @@ class Gds2writer:
 
     def writeToFile(self,fileName):
         self.fileHandle = open(fileName,"wb")
+        self.buffer = bytearray()
         self.writeGds2()
+        self.flush()
         self.fileHandle.close()
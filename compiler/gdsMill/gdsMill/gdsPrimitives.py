@@ -132,6 +132,9 @@ class GdsAref:
         self.transFlags=[0,0,0]
         self.magFactor=""
         self.rotateAngle=""
+        self.columns=""
+        self.rows=""
+        #the reference point, the point after the last column and the point after the last row
         self.coordinates=""
 
 class GdsText:
@@ -67,6 +67,12 @@ class VlsiLayout:
         # Multiple labels may be disconnected.
         self.pins = {}
 
+        # The flattened shapes of every layer purpose pair (see getShapeTable)
+        # and the transforms of the xyTree as arrays. Both are cleared when
+        # the xyTree is populated.
+        self.shapeTables = {}
+        self.treeTransforms = None
+
     def rotatedCoordinates(self,coordinatesToRotate,rotateAngle):
         #helper method to rotate a list of coordinates
         angle=math.radians(float(0))
@@ -151,6 +157,9 @@ class VlsiLayout:
                 for sref in self.structures[name].srefs: #go through each reference
                     if sref.sName in structureNames: #and compare to our list
                         structureNames.remove(sref.sName)
+            for aref in self.structures[name].arefs:
+                if aref.aName in structureNames:
+                    structureNames.remove(aref.aName)
 
         debug.check(len(structureNames)==1,"Multiple possible root structures in the layout: {}".format(str(structureNames)))
         self.rootStructureName = structureNames[0]
@@ -202,14 +211,34 @@ class VlsiLayout:
                                               rotateAngle = sref.rotateAngle,
                                               transFlags = sref.transFlags,
                                               coordinates = sref.coordinates)
+            #every element of an array reference is traversed like a separate reference
+            for aref in self.structures[startingStructureName].arefs:
+                for coordinates in self.getArrayCoordinates(aref):
+                    self.traverseTheHierarchy(startingStructureName = aref.aName,
+                                              delegateFunction = delegateFunction,
+                                              transformPath = transformPath,
+                                              rotateAngle = aref.rotateAngle,
+                                              transFlags = aref.transFlags,
+                                              coordinates = coordinates)
         except KeyError:
             debug.error("Could not find structure {} in GDS file.".format(startingStructureName),-1)
 
-            #MUST HANDLE AREFs HERE AS WELL
         #when we return, drop the last transform from the transformPath
         del transformPath[-1]
         return
 
+    def getArrayCoordinates(self, aref):
+        """ The reference points of all of the elements of an array reference. """
+        (origin, columnPoint, rowPoint) = aref.coordinates
+        columnStep = ((columnPoint[0]-origin[0])/aref.columns, (columnPoint[1]-origin[1])/aref.columns)
+        rowStep = ((rowPoint[0]-origin[0])/aref.rows, (rowPoint[1]-origin[1])/aref.rows)
+        coordinates = []
+        for row in range(aref.rows):
+            for column in range(aref.columns):
+                coordinates.append((origin[0] + column*columnStep[0] + row*rowStep[0],
+                                    origin[1] + column*columnStep[1] + row*rowStep[1]))
+        return coordinates
+
     def initialize(self):
         self.deduceHierarchy()
         # self.traverseTheHierarchy()
@@ -220,6 +249,8 @@ class VlsiLayout:
 
 
     def populateCoordinateMap(self):
+        self.shapeTables = {}
+        self.treeTransforms = None
         def addToXyTree(startingStructureName = None,transformPath = None):
             uVector = np.array([[1.0],[0.0],[0.0]]) #start with normal basis vectors
             vVector = np.array([[0.0],[1.0],[0.0]])
@@ -328,10 +359,51 @@ class VlsiLayout:
         layoutToAddSref = GdsSref()
         layoutToAddSref.sName = StructureName
         layoutToAddSref.coordinates = offsetInLayoutUnits
+        self.setReferenceTransform(layoutToAddSref, mirror, rotate)
+
+        #add the sref to the root structure
+        self.structures[self.rootStructureName].srefs.append(layoutToAddSref)
+
+    def addArrayInstance(self,layoutToAdd,nameOfLayout,offsetInMicrons=(0,0),mirror=None,rotate=None,
+                         columns=1,rows=1,columnPitchInMicrons=(0,0),rowPitchInMicrons=(0,0)):
+        """
+        Method to insert an array of a layout into another at a particular offset.
+        The elements are placed at the offset plus a multiple of the column pitch
+        plus a multiple of the row pitch and all have the same mirror and rotation.
+        The pitches must be a whole number of layout units.
+        """
+        offsetInLayoutUnits = (self.userUnits(offsetInMicrons[0]),self.userUnits(offsetInMicrons[1]))
+        columnPitch = (self.userUnits(columnPitchInMicrons[0]),self.userUnits(columnPitchInMicrons[1]))
+        rowPitch = (self.userUnits(rowPitchInMicrons[0]),self.userUnits(rowPitchInMicrons[1]))
 
+        StructureFound = any(nameOfLayout in structure for structure in layoutToAdd.structures)
+        debug.check(StructureFound,"Could not find layout to instantiate {}".format(nameOfLayout))
+        if layoutToAdd != self:
+            for structure in layoutToAdd.structures:
+                if structure not in self.structures:
+                    self.structures[structure]=layoutToAdd.structures[structure]
+            for layerNumber in layoutToAdd.layerNumbersInUse:
+                if layerNumber not in self.layerNumbersInUse:
+                    self.layerNumbersInUse.append(layerNumber)
+
+        layoutToAddAref = GdsAref()
+        layoutToAddAref.aName = nameOfLayout
+        layoutToAddAref.columns = columns
+        layoutToAddAref.rows = rows
+        layoutToAddAref.coordinates = [offsetInLayoutUnits,
+                                       (offsetInLayoutUnits[0] + columns*columnPitch[0],
+                                        offsetInLayoutUnits[1] + columns*columnPitch[1]),
+                                       (offsetInLayoutUnits[0] + rows*rowPitch[0],
+                                        offsetInLayoutUnits[1] + rows*rowPitch[1])]
+        self.setReferenceTransform(layoutToAddAref, mirror, rotate)
+
+        self.structures[self.rootStructureName].arefs.append(layoutToAddAref)
+
+    def setReferenceTransform(self, reference, mirror, rotate):
+        """ Set the transform flags and angle of a structure or array reference. """
         if mirror or rotate:
 
-            layoutToAddSref.transFlags = [0,0,0]
+            reference.transFlags = [0,0,0]
             # transFlags = (mirror around x-axis, magnification, rotation)
             # If magnification or rotation is true, it is the flags are then
             # followed by an amount in the record
@@ -342,20 +414,17 @@ class VlsiLayout:
             if mirror=="R270":
                 rotate = 270.0
             if rotate:
-                #layoutToAddSref.transFlags[2] = 1
-                layoutToAddSref.rotateAngle = rotate
+                #reference.transFlags[2] = 1
+                reference.rotateAngle = rotate
             if mirror == "x" or mirror == "MX":
-                layoutToAddSref.transFlags[0] = 1
+                reference.transFlags[0] = 1
             if mirror == "y" or mirror == "MY": #NOTE: "MY" option will override specified rotate angle
-                layoutToAddSref.transFlags[0] = 1
-                #layoutToAddSref.transFlags[2] = 1
-                layoutToAddSref.rotateAngle = 180.0
+                reference.transFlags[0] = 1
+                #reference.transFlags[2] = 1
+                reference.rotateAngle = 180.0
             if mirror == "xy" or mirror == "XY": #NOTE: "XY" option will override specified rotate angle
-                #layoutToAddSref.transFlags[2] = 1
-                layoutToAddSref.rotateAngle = 180.0
-
-        #add the sref to the root structure
-        self.structures[self.rootStructureName].srefs.append(layoutToAddSref)
+                #reference.transFlags[2] = 1
+                reference.rotateAngle = 180.0
 
     def addBox(self,layerNumber=0, purposeNumber=0, offsetInMicrons=(0,0), width=1.0, height=1.0,center=False):
         """
@@ -718,17 +787,22 @@ class VlsiLayout:
         # Get the labels on a layer in the root level
         labels = self.getTexts(lpp)
 
+        if len(labels) == 0:
+            return
+
         # Get all of the shapes on the layer at all levels
         # and transform them to the current level
-        shapes = self.getAllShapes(lpp)
+        (rectangles, polygons) = self.getShapeTable(lpp)
 
         for label in labels:
             label_coordinate = label.coordinates[0]
             user_coordinate = [x*self.units[0] for x in label_coordinate]
-            pin_shapes = []
-            for boundary in shapes:
+            inside = ((rectangles[:, 0] <= user_coordinate[0]) & (rectangles[:, 2] >= user_coordinate[0])
+                      & (rectangles[:, 1] <= user_coordinate[1]) & (rectangles[:, 3] >= user_coordinate[1]))
+            pin_shapes = [(lpp, boundary) for boundary in rectangles[inside].tolist()]
+            for boundary in polygons:
                 if self.labelInRectangle(user_coordinate, boundary):
-                    pin_shapes.append((lpp, boundary))
+                    pin_shapes.append((lpp, list(boundary)))
 
             label_text = label.textString
 
@@ -766,19 +840,93 @@ class VlsiLayout:
         and [coordinate 1, coordinate 2,...] format and user
         units for polygons.
         """
-        boundaries = set()
-        for TreeUnit in self.xyTree:
-            # print(TreeUnit[0])
-            boundaries.update(self.getShapesInStructure(lpp, TreeUnit))
-
-        # Convert to user units
-        user_boundaries = []
-        for boundary in boundaries:
-            boundaries_list = []
-            for i in range(0, len(boundary)):
-                boundaries_list.append(boundary[i]*self.units[0])
-            user_boundaries.append(boundaries_list)
-        return user_boundaries
+        (rectangles, polygons) = self.getShapeTable(lpp)
+        return rectangles.tolist() + [list(polygon) for polygon in polygons]
+
+    def getShapeTable(self, lpp):
+        """
+        Return the shapes on a given layer at all levels without duplicates:
+        a (n, 4) array of the [llx, lly, urx, ury] rectangles and a list of
+        the (coordinate 1, coordinate 2,...) polygons, both in user units.
+        The rectangles of all instances of a structure are transformed
+        at once and the tables are cached per layer.
+        """
+        if lpp in self.shapeTables:
+            return self.shapeTables[lpp]
+
+        (origins, uVectors, vVectors, instances) = self.getTreeTransforms()
+        rectangleBlocks = []
+        orderBlocks = []
+        polygons = []
+        for (structureName, treeIndices) in instances.items():
+            corners = []
+            hasPolygons = False
+            for boundary in self.structures[str(structureName)].boundaries:
+                if sameLPP((boundary.drawingLayer, boundary.purposeLayer), lpp):
+                    if len(boundary.coordinates) != 5:
+                        hasPolygons = True
+                    else:
+                        (left_bottom, right_top) = (boundary.coordinates[0], boundary.coordinates[2])
+                        corners.append([left_bottom[0], left_bottom[1], right_top[0], right_top[1]])
+            if hasPolygons:
+                # Polygons are rare (used in DFF) so they are transformed one at a time
+                for treeIndex in treeIndices:
+                    for shape in self.getShapesInStructure(lpp, self.xyTree[treeIndex]):
+                        if len(shape) != 4:
+                            polygons.append((treeIndex, shape))
+            if len(corners) == 0:
+                continue
+
+            # Rows are the instances and columns are the shapes. This does
+            # the same floating point operations as transformRectangle.
+            corners = np.array(corners, dtype=np.float64)
+            treeIndices = np.array(treeIndices)
+            (ux, uy) = (uVectors[treeIndices, 0:1], uVectors[treeIndices, 1:2])
+            (vx, vy) = (vVectors[treeIndices, 0:1], vVectors[treeIndices, 1:2])
+            (ox, oy) = (origins[treeIndices, 0:1], origins[treeIndices, 1:2])
+            x1 = corners[:, 0]*ux + corners[:, 1]*vx
+            y1 = corners[:, 0]*uy + corners[:, 1]*vy
+            x2 = corners[:, 2]*ux + corners[:, 3]*vx
+            y2 = corners[:, 2]*uy + corners[:, 3]*vy
+            rectangleBlocks.append(np.stack((np.minimum(x1, x2) + ox,
+                                             np.minimum(y1, y2) + oy,
+                                             np.maximum(x1, x2) + ox,
+                                             np.maximum(y1, y2) + oy), axis=-1).reshape(-1, 4))
+            orderBlocks.append((np.repeat(treeIndices, len(corners)),
+                                np.tile(np.arange(len(corners)), len(treeIndices))))
+
+        if len(rectangleBlocks) == 0:
+            rectangles = np.zeros((0, 4))
+        else:
+            # Remove the duplicates keeping the order of the xyTree and
+            # of the boundaries in a structure and convert to user units
+            rectangles = np.concatenate(rectangleBlocks)
+            treeOrder = np.concatenate([order[0] for order in orderBlocks])
+            boundaryOrder = np.concatenate([order[1] for order in orderBlocks])
+            rectangles = rectangles[np.lexsort((boundaryOrder, treeOrder))]
+            firstIndices = np.unique(rectangles, axis=0, return_index=True)[1]
+            rectangles = rectangles[np.sort(firstIndices)]*self.units[0]
+
+        uniquePolygons = {}
+        for (treeIndex, polygon) in sorted(polygons, key=lambda item: item[0]):
+            uniquePolygons.setdefault(polygon, tuple(x*self.units[0] for x in polygon))
+        self.shapeTables[lpp] = (rectangles, list(uniquePolygons.values()))
+        return self.shapeTables[lpp]
+
+    def getTreeTransforms(self):
+        """
+        Return the origins and the u and v basis vectors of the xyTree as (n, 2)
+        arrays and a map of the structure names to their xyTree indices.
+        """
+        if self.treeTransforms == None:
+            origins = np.array([[origin[0][0], origin[1][0]] for (name, origin, u, v) in self.xyTree]).reshape(-1, 2)
+            uVectors = np.array([[u[0][0], u[1][0]] for (name, origin, u, v) in self.xyTree]).reshape(-1, 2)
+            vVectors = np.array([[v[0][0], v[1][0]] for (name, origin, u, v) in self.xyTree]).reshape(-1, 2)
+            instances = {}
+            for (treeIndex, treeUnit) in enumerate(self.xyTree):
+                instances.setdefault(treeUnit[0], []).append(treeIndex)
+            self.treeTransforms = (origins, uVectors, vVectors, instances)
+        return self.treeTransforms
 
     def getShapesInStructure(self, lpp, structure):
         """
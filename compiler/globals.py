@@ -78,6 +78,11 @@ def parse_args():
                              action="store_false",
                              dest="analytical_delay",
                              help="Perform characterization to calculate delays (default is analytical models)"),
+        optparse.make_option("-j", "--threads",
+                             action="store",
+                             type="int",
+                             dest="num_threads",
+                             help="Number of worker processes for characterization and supply routing (default is 1)"),
         optparse.make_option("-d",
                              "--dontpurge",
                              action="store_false",
@@ -0,0 +1,255 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import os
+import io
+import pickle
+import hashlib
+import debug
+from globals import OPTS
+
+
+class module_pickler(pickle.Pickler):
+    """
+    Pickle a module without the other factory modules that it references.
+    They are saved as their factory keys and are created (or loaded) again
+    by the factory when the module is loaded, so every module is a separate
+    cache entry and a subtree is shared by all of the modules that use it.
+    """
+
+    def __init__(self, f, root, module_keys):
+        pickle.Pickler.__init__(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.root = root
+        self.module_keys = module_keys
+
+    def persistent_id(self, obj):
+        if obj is self.root or id(obj) not in self.module_keys:
+            return None
+        module_key = self.module_keys[id(obj)]
+        if module_key == None:
+            raise pickle.PicklingError("References {} which can't be created from its key.".format(obj.name))
+        return module_key
+
+
+class module_unpickler(pickle.Unpickler):
+
+    def __init__(self, f, factory):
+        pickle.Unpickler.__init__(self, f)
+        self.factory = factory
+
+    def persistent_load(self, pid):
+        return self.factory.create_from_key(*pid)
+
+
+class module_cache():
+    """
+    A persistent on-disk cache of generated modules (netlist and layout).
+    Entries are keyed by a hash of the module type, its keyword arguments,
+    the technology, the options and the compiler and technology source, so
+    any change of those invalidates the entries. Only modules with plain
+    keyword arguments (numbers, strings, lists, ...) are cached.
+    The least recently used entries are evicted when the cache grows over
+    OPTS.module_cache_size MB.
+    """
+
+    # Options that only name or place the output files or control other tools.
+    # The array sizes are passed to the modules as keyword arguments.
+    ignored_options = ["output_path", "output_name", "openram_temp", "purge_temp", "config_file",
+                       "debug_level", "print_banner", "is_unit_test", "num_threads", "router_stats",
+                       "num_sweep_points", "num_functional_shards",
+                       "sim_cache_path", "sim_cache_size", "module_cache_path", "module_cache_size",
+                       "spice_name", "spice_exe", "drc_exe", "lvs_exe", "pex_exe", "magic_exe",
+                       "word_size", "num_words", "write_size", "words_per_row", "num_banks",
+                       "num_spare_rows", "num_spare_cols"]
+
+    def __init__(self):
+        self.source_digest = None
+        # Modules that were created in this run and are saved by flush
+        self.pending = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        """ Clear the hit/miss counters. """
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get_stats(self):
+        return (self.hits, self.misses, self.stores)
+
+    def is_enabled(self):
+        return OPTS.module_cache_path != ""
+
+    def print_stats(self):
+        """ Report the hit/miss statistics of this run. """
+        total = self.hits + self.misses
+        if not self.is_enabled() or total == 0:
+            return
+        debug.print_raw("Module cache: {0} hits, {1} misses ({2:.1f}% hit rate), {3} stored in {4}".format(self.hits,
+                                                                                                           self.misses,
+                                                                                                           100.0 * self.hits / total,
+                                                                                                           self.stores,
+                                                                                                           OPTS.module_cache_path))
+
+    def get_source_digest(self):
+        """ Hash of the compiler and technology source files. Computed once per run. """
+        if self.source_digest:
+            return self.source_digest
+
+        digest = hashlib.sha256()
+        source_dirs = [(os.getenv("OPENRAM_HOME"), [".py"]),
+                       (OPTS.openram_tech, None)]
+        for (source_dir, extensions) in source_dirs:
+            for (root, dirs, files) in os.walk(source_dir):
+                dirs[:] = sorted(d for d in dirs if d not in ["tests", "__pycache__"])
+                for name in sorted(files):
+                    if extensions and os.path.splitext(name)[1] not in extensions:
+                        continue
+                    filename = os.path.join(root, name)
+                    digest.update(os.path.relpath(filename, source_dir).encode())
+                    with open(filename, "rb") as f:
+                        digest.update(f.read())
+        self.source_digest = digest.hexdigest()
+        return self.source_digest
+
+    def get_options_digest(self):
+        # The config file module attributes (e.g. __loader__) are copied to OPTS too
+        options = sorted((k, repr(v)) for (k, v) in OPTS.__dict__.items()
+                         if k not in self.ignored_options and not k.startswith("__")
+                         and isinstance(v, (str, int, float, bool, list, tuple, dict, type(None))))
+        return hashlib.sha256(repr(options).encode()).hexdigest()
+
+    def get_key(self, module_type, kwargs_key):
+        """ The cache entry name of a module or None if it can't be cached. """
+        if not self.is_enabled() or kwargs_key == None:
+            return None
+        key = hashlib.sha256()
+        for item in [OPTS.tech_name, self.get_source_digest(), self.get_options_digest(),
+                     module_type, repr(kwargs_key)]:
+            key.update(item.encode())
+        return key.hexdigest()
+
+    def get_entry_path(self, key):
+        return os.path.join(os.path.expanduser(OPTS.module_cache_path), key + ".pickle")
+
+    def load(self, key, factory):
+        """
+        Load the module of key and the name that the factory gave it. The modules
+        that it references are created with the factory. Returns None on a cache miss.
+        The create calls of the constructor are made again first, so that the
+        factory creates (and names) the modules in the same order as without
+        the cache.
+        """
+        entry_path = self.get_entry_path(key)
+        try:
+            f = open(entry_path, "rb")
+        except IOError:
+            self.misses += 1
+            return None
+
+        try:
+            unpickler = module_unpickler(f, factory)
+            for create_call in unpickler.load():
+                factory.create_from_key(*create_call)
+            (factory_name, obj) = unpickler.load()
+        except Exception as e:
+            # An entry of an incompatible (older) class layout
+            debug.info(2, "Removing invalid module cache entry {0}: {1}".format(entry_path, e))
+            f.close()
+            self.remove(entry_path)
+            self.misses += 1
+            return None
+        f.close()
+
+        # Mark as recently used for the LRU eviction
+        os.utime(entry_path)
+        self.hits += 1
+        debug.info(3, "Module cache hit: {0} {1}".format(obj.name, key))
+        return (factory_name, obj)
+
+    def add(self, key, factory_name, obj, create_calls):
+        """
+        Save a new module when the cache is flushed. The create_calls are the
+        (module type, module name, kwargs) of the factory calls of its constructor.
+        """
+        self.pending.append((key, factory_name, obj, create_calls))
+
+    def flush(self, module_keys):
+        """
+        Save the modules that were created since the last flush.
+        This is done after the SRAM is complete so that the entries include
+        any changes that the parent modules made.
+        module_keys maps the ids of the factory modules to their factory keys.
+        """
+        if not self.is_enabled():
+            self.pending = []
+            return
+        os.makedirs(os.path.expanduser(OPTS.module_cache_path), exist_ok=True)
+        for (key, factory_name, obj, create_calls) in self.pending:
+            self.store(key, factory_name, obj, create_calls, module_keys)
+        self.pending = []
+        self.evict()
+
+    def store(self, key, factory_name, obj, create_calls, module_keys):
+        entry_path = self.get_entry_path(key)
+        if os.path.isfile(entry_path):
+            return
+        f = io.BytesIO()
+        try:
+            pickler = module_pickler(f, obj, module_keys)
+            pickler.dump(create_calls)
+            pickler.dump((factory_name, obj))
+        except Exception as e:
+            debug.info(2, "Could not add {0} to the module cache: {1}".format(obj.name, e))
+            return
+
+        # Write a private file first so concurrent runs never see partial entries
+        staging_path = "{0}.{1}.tmp".format(entry_path, os.getpid())
+        try:
+            with open(staging_path, "wb") as staging_file:
+                staging_file.write(f.getvalue())
+            os.replace(staging_path, entry_path)
+        except OSError as e:
+            debug.info(2, "Could not add {0} to the module cache: {1}".format(obj.name, e))
+            self.remove(staging_path)
+            return
+        self.stores += 1
+
+    def remove(self, filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache fits in OPTS.module_cache_size MB. """
+        cache_path = os.path.expanduser(OPTS.module_cache_path)
+        entries = []
+        total_size = 0
+        for name in os.listdir(cache_path):
+            if not name.endswith(".pickle"):
+                continue
+            entry_path = os.path.join(cache_path, name)
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                # Removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size += stat.st_size
+
+        max_size = OPTS.module_cache_size * 1024 * 1024
+        for (mtime, size, entry_path) in sorted(entries):
+            if total_size <= max_size:
+                break
+            debug.info(2, "Evicting module cache entry: {}".format(entry_path))
+            self.remove(entry_path)
+            total_size -= size
+
+
+# The cache shared by all factories of this process
+cache = module_cache()
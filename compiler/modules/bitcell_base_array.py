@@ -153,3 +153,5 @@ class bitcell_base_array(design.design):
                                                mirror=dir_key)
                 yoffset += self.cell.height
             xoffset += self.cell.width
+
+        self.add_inst_array(self.cell_inst.values())
@@ -126,6 +126,8 @@ class precharge_array(design.design):
             self.local_insts[i].place(offset=offset, mirror=mirror)
             xoffset = xoffset + self.pc_cell.width
 
+        self.add_inst_array(self.local_insts)
+
     def get_en_cin(self):
         """
         Get the relative capacitance of all the clk connections
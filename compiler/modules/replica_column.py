@@ -151,6 +151,8 @@ class replica_column(design.design):
             self.cell_inst[row].place(offset=offset,
                                       mirror=dir_key)
 
+        self.add_inst_array(self.cell_inst.values())
+
     def add_layout_pins(self):
         """ Add the layout pins """
 
@@ -129,6 +129,8 @@ class single_level_column_mux_array(design.design):
             offset = vector(xoffset, self.route_height)
             self.mux_inst[col_num].place(offset=offset, mirror=mirror)
 
+        self.add_inst_array(self.mux_inst)
+
     def add_layout_pins(self):
         """ Add the pins after we determine the height. """
         # For every column, add a pass gate
@@ -85,6 +85,20 @@ class options(optparse.Values):
     netlist_only = False
     # Whether we should do the final power routing
     route_supplies = False
+    # Store the routing grid in dense arrays of its bounding box instead of
+    # a sparse map. Uses less memory and time for large supply grids.
+    route_dense_grid = False
+    # The maze routes of the supply pins start with a cost bound of
+    # route_detour_scale times the distance to the target. A route that
+    # the bound prunes continues from the pruned nodes with the bound
+    # doubled until it reaches route_max_detour_scale. Start with a tight
+    # bound (e.g. 2) and a large maximum (e.g. 40) to route the easy pins
+    # fast and still route the hard ones.
+    route_detour_scale = 5
+    route_max_detour_scale = 5
+    # Write the run statistics of the routers (time of the stages and
+    # the maze search of every pin component) as JSON to the output path
+    router_stats = False
     # This determines whether LVS and DRC is checked at all.
     check_lvsdrc = False
     # This determines whether LVS and DRC is checked for every submodule.
@@ -93,6 +107,24 @@ class options(optparse.Values):
     trim_netlist = False
     # Run with extracted parasitics
     use_pex = False
+    # Number of worker processes used for parallel characterization
+    # and supply rail search
+    num_threads = 1
+    # Number of points (loads, setup/hold times) swept in a single simulator
+    # invocation with .ALTER/.control loops. 1 runs a simulation per point.
+    num_sweep_points = 1
+    # Number of independent segments that the functional test cycles are
+    # split into. Each segment starts from its own seed and preloaded memory
+    # contents and is simulated separately. 1 runs a single simulation.
+    num_functional_shards = 1
+    # Directory of the persistent simulation result cache (disabled if empty)
+    sim_cache_path = ""
+    # Maximum size of the simulation result cache in MB
+    sim_cache_size = 1024
+    # Directory of the persistent generated module cache (disabled if empty)
+    module_cache_path = ""
+    # Maximum size of the generated module cache in MB
+    module_cache_size = 1024
 
 
     ###################
@@ -9,7 +9,9 @@ import numpy as np
 import string
 import debug
 from vector3d import vector3d
-from grid_cell import grid_cell
+from grid_map import grid_map
+from grid_array import grid_array
+from globals import OPTS
 
 class grid:
     """
@@ -40,8 +42,12 @@ class grid:
         self.ll = vector3d(ll.x,ll.y,0).scale(self.track_factor).round()
         self.ur = vector3d(ur.x,ur.y,1).scale(self.track_factor).round()
         
-        # let's leave the map sparse, cells are created on demand to reduce memory
-        self.map={}
+        # let's leave the map sparse, cells are created on demand to reduce memory,
+        # unless the dense arrays of the whole bounding box are requested
+        if OPTS.route_dense_grid:
+            self.map=grid_array(self.ll, self.ur)
+        else:
+            self.map=grid_map()
 
     def add_all_grids(self):
         for x in range(self.ll.x, self.ur.x, 1):
@@ -54,8 +60,7 @@ class grid:
             for item in n:
                 self.set_blocked(item,value)
         else:
-            self.add_map(n)
-            self.map[n].blocked=value
+            self.map.set_blocked(n,value)
 
     def is_blocked(self,n):
         if not isinstance(n, vector3d):
@@ -65,29 +70,25 @@ class grid:
             else:
                 return False
         else:
-            self.add_map(n)
-            return self.map[n].blocked
+            return self.map.is_blocked(n)
 
 
     def set_path(self,n,value=True):
-        if isinstance(n, (list,tuple,set,frozenset)):
+        if not isinstance(n, vector3d):
             for item in n:
                 self.set_path(item,value)
         else:
-            self.add_map(n)
-            self.map[n].path=value
+            self.map.set_path(n,value)
 
     def clear_blockages(self):
-        for k in self.map:
-            self.map[k].blocked=False
+        self.map.clear_blockages()
             
     def set_source(self,n,value=True):
         if not isinstance(n, vector3d):
             for item in n:
                 self.set_source(item,value)
         else:
-            self.add_map(n)
-            self.map[n].source=value
+            self.map.set_source(n,value)
             self.source.add(n)
         
     def set_target(self,n,value=True):
@@ -95,8 +96,7 @@ class grid:
             for item in n:
                 self.set_target(item,value)
         else:
-            self.add_map(n)
-            self.map[n].target=value
+            self.map.set_target(n,value)
             self.target.add(n)
 
         
@@ -129,8 +129,7 @@ class grid:
             for item in n:
                 self.add_map(item)
         else:
-            if n not in self.map:
-                self.map[n]=grid_cell()
+            self.map.add(n)
         
 
     def block_path(self,path):
@@ -138,8 +137,8 @@ class grid:
         Mark the path in the routing grid as blocked. 
         Also unsets the path flag.
         """
-        path.set_path(False)
-        path.set_blocked(True)
+        path.set_path(self,False)
+        path.set_blocked(self,True)
             
     
 
@@ -0,0 +1,216 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import numpy as np
+from collections.abc import MutableMapping
+from vector3d import vector3d
+from grid_cell import grid_cell
+from grid_map import grid_map
+
+
+class grid_array(MutableMapping):
+    """
+    A dense routing map of the two layer bounding box of a grid.
+    The cell flags are bits of a (x, y, z) uint8 array and the minimum
+    costs are an int32 array, so a large supply grid does not need a
+    grid_cell and vector3d per visited cell. Points outside of the
+    bounding box fall back to a sparse grid_map.
+    It has the same interface as grid_map, including the dictionary
+    interface whose cells are views into the arrays.
+    """
+    EXISTS = 1
+    BLOCKED = 2
+    SOURCE = 4
+    TARGET = 8
+    PATH = 16
+    flag_names = {BLOCKED: "blocked",
+                  SOURCE: "source",
+                  TARGET: "target",
+                  PATH: "path"}
+
+    def __init__(self, ll, ur):
+        self.ll = ll
+        self.width = ur.x - ll.x + 1
+        self.height = ur.y - ll.y + 1
+        self.flags = np.zeros((self.width, self.height, 2), dtype=np.uint8)
+        self.min_costs = np.full((self.width, self.height, 2), -1, dtype=np.int32)
+        # Flat views for fast scalar access from Python
+        self.flag_view = memoryview(self.flags.reshape(-1))
+        self.min_cost_view = memoryview(self.min_costs.reshape(-1))
+        self.outside = grid_map()
+
+    def get_index(self, n):
+        """ The flat array index of a point or None if it is outside of the arrays. """
+        x = n.x - self.ll.x
+        y = n.y - self.ll.y
+        if 0 <= x < self.width and 0 <= y < self.height and (n.z == 0 or n.z == 1):
+            return (x * self.height + y) * 2 + n.z
+        return None
+
+    def get_point(self, index):
+        (index, z) = divmod(int(index), 2)
+        (x, y) = divmod(index, self.height)
+        return vector3d(x + self.ll.x, y + self.ll.y, z)
+
+    def get_flag(self, n, bit):
+        # This and set_flag are called for every point so get_index is inlined
+        x = n.x - self.ll.x
+        y = n.y - self.ll.y
+        if 0 <= x < self.width and 0 <= y < self.height and (n.z == 0 or n.z == 1):
+            index = (x * self.height + y) * 2 + n.z
+            flags = self.flag_view[index]
+            self.flag_view[index] = flags | self.EXISTS
+            return (flags & bit) != 0
+        return getattr(self.outside.get_cell(n), self.flag_names[bit])
+
+    def set_flag(self, n, bit, value):
+        x = n.x - self.ll.x
+        y = n.y - self.ll.y
+        if 0 <= x < self.width and 0 <= y < self.height and (n.z == 0 or n.z == 1):
+            index = (x * self.height + y) * 2 + n.z
+            if value:
+                self.flag_view[index] |= self.EXISTS | bit
+            else:
+                self.flag_view[index] = (self.flag_view[index] | self.EXISTS) & (0xff ^ bit)
+        else:
+            setattr(self.outside.get_cell(n), self.flag_names[bit], value)
+
+    def add(self, n):
+        """ Add a point to the map if it doesn't exist. """
+        index = self.get_index(n)
+        if index is None:
+            self.outside.add(n)
+        else:
+            self.flag_view[index] |= self.EXISTS
+
+    def is_blocked(self, n):
+        return self.get_flag(n, self.BLOCKED)
+
+    def set_blocked(self, n, value=True):
+        self.set_flag(n, self.BLOCKED, value)
+
+    def set_path(self, n, value=True):
+        self.set_flag(n, self.PATH, value)
+
+    def set_source(self, n, value=True):
+        self.set_flag(n, self.SOURCE, value)
+
+    def set_target(self, n, value=True):
+        self.set_flag(n, self.TARGET, value)
+
+    def get_min_cost(self, n):
+        index = self.get_index(n)
+        if index is None:
+            return self.outside.get_min_cost(n)
+        return self.min_cost_view[index]
+
+    def set_min_cost(self, n, cost):
+        index = self.get_index(n)
+        if index is None:
+            self.outside.set_min_cost(n, cost)
+        else:
+            self.min_cost_view[index] = cost
+
+    def get_source_and_targets(self):
+        """ The points that are both a source and a target. """
+        both = self.SOURCE | self.TARGET
+        indices = np.flatnonzero((self.flags.reshape(-1) & both) == both)
+        return [self.get_point(i) for i in indices] + self.outside.get_source_and_targets()
+
+    def clear_blockages(self):
+        self.flags &= np.uint8(0xff ^ self.BLOCKED)
+        self.outside.clear_blockages()
+
+    def reset_costs(self):
+        """ Reset the costs of all the cells but keep the other info. """
+        self.min_costs.fill(-1)
+        self.outside.reset_costs()
+
+    def reset(self):
+        """ Reset the dynamic routing info of all the cells. """
+        self.flags &= np.uint8(0xff ^ (self.BLOCKED | self.SOURCE | self.TARGET))
+        self.min_costs.fill(-1)
+        self.outside.reset()
+
+    def __contains__(self, n):
+        index = self.get_index(n)
+        if index is None:
+            return n in self.outside
+        return (self.flag_view[index] & self.EXISTS) != 0
+
+    def __getitem__(self, n):
+        index = self.get_index(n)
+        if index is None:
+            return self.outside[n]
+        if not self.flag_view[index] & self.EXISTS:
+            raise KeyError(n)
+        return grid_array_cell(self, index)
+
+    def __setitem__(self, n, cell):
+        index = self.get_index(n)
+        if index is None:
+            self.outside[n] = cell
+            return
+        flags = self.EXISTS
+        for (bit, name) in self.flag_names.items():
+            if getattr(cell, name):
+                flags |= bit
+        self.flag_view[index] = flags
+        self.min_cost_view[index] = cell.min_cost
+
+    def __delitem__(self, n):
+        index = self.get_index(n)
+        if index is None:
+            del self.outside[n]
+            return
+        if not self.flag_view[index] & self.EXISTS:
+            raise KeyError(n)
+        self.flag_view[index] = 0
+        self.min_cost_view[index] = -1
+
+    def __iter__(self):
+        for index in np.flatnonzero(self.flags.reshape(-1) & self.EXISTS):
+            yield self.get_point(index)
+        yield from self.outside
+
+    def __len__(self):
+        return int(np.count_nonzero(self.flags & self.EXISTS)) + len(self.outside)
+
+
+class grid_array_cell(grid_cell):
+    """
+    A grid_cell that reads and writes a cell of a grid_array.
+    """
+    def __init__(self, array, index):
+        self.array = array
+        self.index = index
+
+    def get_bit(self, bit):
+        return (self.array.flag_view[self.index] & bit) != 0
+
+    def set_bit(self, bit, value):
+        if value:
+            self.array.flag_view[self.index] |= bit
+        else:
+            self.array.flag_view[self.index] &= 0xff ^ bit
+
+    path = property(lambda self: self.get_bit(grid_array.PATH),
+                    lambda self, value: self.set_bit(grid_array.PATH, value))
+    blocked = property(lambda self: self.get_bit(grid_array.BLOCKED),
+                       lambda self, value: self.set_bit(grid_array.BLOCKED, value))
+    source = property(lambda self: self.get_bit(grid_array.SOURCE),
+                      lambda self, value: self.set_bit(grid_array.SOURCE, value))
+    target = property(lambda self: self.get_bit(grid_array.TARGET),
+                      lambda self, value: self.set_bit(grid_array.TARGET, value))
+
+    @property
+    def min_cost(self):
+        return self.array.min_cost_view[self.index]
+
+    @min_cost.setter
+    def min_cost(self, cost):
+        self.array.min_cost_view[self.index] = cost
@@ -0,0 +1,76 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+from grid_cell import grid_cell
+
+
+class grid_map(dict):
+    """
+    A sparse routing map of grid cells indexed by vector3d.
+    Cells are created on demand to reduce memory.
+    The methods are the storage interface that the grid uses and that
+    the dense grid_array implements too.
+    """
+
+    def __init__(self):
+        dict.__init__(self)
+        # The points that have a cost so they can be reset without
+        # visiting every cell
+        self.cost_points = []
+
+    def add(self, n):
+        """ Add a point to the map if it doesn't exist. """
+        if n not in self:
+            self[n] = grid_cell()
+
+    def get_cell(self, n):
+        cell = self.get(n)
+        if cell is None:
+            cell = self[n] = grid_cell()
+        return cell
+
+    def is_blocked(self, n):
+        return self.get_cell(n).blocked
+
+    def set_blocked(self, n, value=True):
+        self.get_cell(n).blocked = value
+
+    def set_path(self, n, value=True):
+        self.get_cell(n).path = value
+
+    def set_source(self, n, value=True):
+        self.get_cell(n).source = value
+
+    def set_target(self, n, value=True):
+        self.get_cell(n).target = value
+
+    def get_min_cost(self, n):
+        return self[n].min_cost
+
+    def set_min_cost(self, n, cost):
+        self[n].min_cost = cost
+        self.cost_points.append(n)
+
+    def get_source_and_targets(self):
+        """ The points that are both a source and a target. """
+        return [k for (k, cell) in self.items() if cell.source and cell.target]
+
+    def clear_blockages(self):
+        for cell in self.values():
+            cell.blocked = False
+
+    def reset(self):
+        """ Reset the dynamic routing info of all the cells. """
+        for cell in self.values():
+            cell.reset()
+        self.cost_points = []
+
+    def reset_costs(self):
+        """ Reset the costs of all the cells but keep the other info. """
+        for n in self.cost_points:
+            self[n].min_cost = -1
+        self.cost_points = []
@@ -96,15 +96,12 @@ class grid_path:
         """
         self.pathlist.extend(item)
         
-    def set_path(self,value=True):
-        for sublist in self.pathlist:
-            for p in sublist:
-                p.path=value
+    def set_path(self,grid,value=True):
+        """ Mark the cells of the path in a routing grid """
+        grid.set_path(self.get_grids(),value)
 
-    def set_blocked(self,value=True):
-        for sublist in self.pathlist:
-            for p in sublist:
-                p.blocked=value
+    def set_blocked(self,grid,value=True):
+        grid.set_blocked(self.get_grids(),value)
 
     def get_grids(self):
         """
@@ -115,6 +112,13 @@ class grid_path:
             newset.update(sublist)
         return newset
 
+    def num_vias(self):
+        """
+        Return the number of layer changes in this path.
+        """
+        return sum(1 for (p0list, p1list) in zip(self.pathlist, self.pathlist[1:])
+                   if p0list[0].z != p1list[0].z)
+
     def get_wire_grids(self, start_index, end_index):
         """
         Return a set of all the wire grids in this path.
@@ -7,6 +7,7 @@
 #
 from direction import direction
 from pin_layout import pin_layout
+from shape_index import shape_index
 from vector import vector
 import debug
 
@@ -96,13 +97,15 @@ class pin_group:
         new_pin_list = pin_list.copy()
 
         remove_indices = set()
-        # This is n^2, but the number is small
+        # Only compare the pins that are close to each other
+        pin_index = shape_index(pin_list)
         for index1, pin1 in enumerate(pin_list):
             # If we remove this pin, it can't contain other pins
             if index1 in remove_indices:
                 continue
 
-            for index2, pin2 in enumerate(pin_list):
+            for index2 in pin_index.candidates(pin1.rect[0], pin1.rect[1], pin1.lpp[0]):
+                pin2 = pin_list[index2]
                 # Can't contain yourself,
                 # but compare the indices and not the pins
                 # so you can remove duplicate copies.
@@ -344,15 +347,15 @@ class pin_group:
 
         return smallest
 
-    def find_smallest_overlapping(self, pin_list, shape_list):
+    def find_smallest_overlapping(self, pin_list, shapes):
         """
-        Find the smallest area shape in shape_list that overlaps with any
+        Find the smallest area shape in the shape_index that overlaps with any
         pin in pin_list by a min width.
         """
 
         smallest_shape = None
         for pin in pin_list:
-            overlap_shape = self.find_smallest_overlapping_pin(pin, shape_list)
+            overlap_shape = self.find_smallest_overlapping_pin(pin, shapes)
             if overlap_shape:
                 # overlap_length = pin.overlap_length(overlap_shape)
                 if not smallest_shape or overlap_shape.area() < smallest_shape.area():
@@ -360,18 +363,18 @@ class pin_group:
 
         return smallest_shape
 
-    def find_smallest_overlapping_pin(self, pin, shape_list):
+    def find_smallest_overlapping_pin(self, pin, shapes):
         """
-        Find the smallest area shape in shape_list that overlaps with any
-        pin in pin_list by a min width.
+        Find the smallest area shape in the shape_index that overlaps with
+        the pin by a min width.
         """
 
         smallest_shape = None
         zindex = self.router.get_zindex(pin.lpp[0])
         (min_width, min_space) = self.router.get_layer_width_space(zindex)
 
-        # Now compare it with every other shape to check how much they overlap
-        for other in shape_list:
+        # Now compare it with every other touching shape to check how much they overlap
+        for other in shapes.intersecting(pin.rect[0], pin.rect[1]):
             overlap_length = pin.overlap_length(other)
             if overlap_length > min_width:
                 if not smallest_shape or other.area() < smallest_shape.area():
@@ -379,14 +382,13 @@ class pin_group:
 
         return smallest_shape
 
-    def overlap_any_shape(self, pin_list, shape_list):
+    def overlap_any_shape(self, pin_list, shapes):
         """
-        Does the given pin overlap any of the shapes in the pin list.
+        Does any of the given pins overlap any of the shapes in the shape_index.
         """
         for pin in pin_list:
-            for other in shape_list:
-                if pin.overlaps(other):
-                    return True
+            if shapes.overlaps_any(pin):
+                return True
 
         return False
 
@@ -454,12 +456,13 @@ class pin_group:
 
         # Compute the enclosure pin_layout list of the set of tracks
         self.enclosures = self.compute_enclosures()
+        enclosure_index = shape_index(self.enclosures)
 
         # Find a connector to every pin and add it to the enclosures
         for pin in self.pins:
 
             # If it is contained, it won't need a connector
-            if pin.contained_by_any(self.enclosures):
+            if len(enclosure_index.containing(pin)) > 0:
                 continue
 
             # Find a connector in the cardinal directions
@@ -481,12 +484,13 @@ class pin_group:
                 bbox_connector = copy.copy(pin)
                 bbox_connector.bbox(filtered_list)
                 self.enclosures.append(bbox_connector)
+                enclosure_index.add(bbox_connector)
 
         # Now, make sure each pin touches an enclosure.
         # If not, add another (diagonal) connector.
         # This could only happen when there was no enclosure
         # in any cardinal direction from a pin
-        if not self.overlap_any_shape(self.pins, self.enclosures):
+        if not self.overlap_any_shape(self.pins, enclosure_index):
             connector = self.find_smallest_connector(self.pins,
                                                      self.enclosures)
             if not connector:
@@ -495,12 +499,13 @@ class pin_group:
                 self.router.write_debug_gds("no_connector.gds")
                 import pdb; pdb.set_trace()
             self.enclosures.append(connector)
+            enclosure_index.add(connector)
 
         # At this point, the pins are overlapping,
         # but there might be more than one!
         overlap_set = set()
         for pin in self.pins:
-            overlap_set.update(self.transitive_overlap(pin, self.enclosures))
+            overlap_set.update(self.transitive_overlap(pin, enclosure_index))
         # Use the new enclosures and recompute the grids
         # that correspond to them
         if len(overlap_set) < len(self.enclosures):
@@ -518,23 +523,21 @@ class pin_group:
                                                                               self.grids,
                                                                               self.enclosures))
 
-    def transitive_overlap(self, shape, shape_list):
+    def transitive_overlap(self, shape, shapes):
         """
-        Given shape, find the elements in shape_list that overlap transitively.
+        Given shape, find the elements in the shape_index that overlap transitively.
         I.e. if shape overlaps A and A overlaps B, return both A and B.
         """
 
-        augmented_shape_list = set(shape_list)
-        old_connected_set = set()
         connected_set = set([shape])
-        # Repeat as long as we expand the set
-        while len(connected_set) > len(old_connected_set):
-            old_connected_set = connected_set
-            connected_set = set([shape])
-            for old_shape in old_connected_set:
-                for cur_shape in augmented_shape_list:
-                    if old_shape.overlaps(cur_shape):
-                        connected_set.add(cur_shape)
+        # Search outward from the shape through the overlapping shapes
+        frontier = [shape]
+        while len(frontier) > 0:
+            old_shape = frontier.pop()
+            for cur_shape in shapes.overlapping(old_shape):
+                if cur_shape not in connected_set:
+                    connected_set.add(cur_shape)
+                    frontier.append(cur_shape)
 
         # Remove the original shape
         connected_set.remove(shape)
@@ -592,12 +595,17 @@ class pin_group:
         Determine the sets of grids that are within a separation distance
         of any grid in the other set.
         """
-        # We could optimize this to just check the boundaries
+        # The distance ignores the layer so compare the planar locations
+        other_locations = {(g.x, g.y) for g in other.grids}
+        offsets = [(x, y) for x in range(-separation, separation + 1)
+                   for y in range(-separation, separation + 1)
+                   if abs(x) + abs(y) <= separation]
         adj_grids = set()
         for g1 in self.grids:
-            for g2 in other.grids:
-                if g1.distance(g2) <= separation:
+            for (x, y) in offsets:
+                if (g1.x + x, g1.y + y) in other_locations:
                     adj_grids.add(g1)
+                    break
 
         return adj_grids
 
@@ -14,6 +14,8 @@ import debug
 from router_tech import router_tech
 from pin_layout import pin_layout
 from pin_group import pin_group
+from shape_index import shape_index
+from router_stats import router_stats
 from vector import vector
 from vector3d import vector3d
 from globals import OPTS, print_time
@@ -37,6 +39,9 @@ class router(router_tech):
         
         self.cell = design
 
+        # The run statistics of the router
+        self.stats = router_stats(self.cell.name)
+
         # If didn't specify a gds blockage file, write it out to read the gds
         # This isn't efficient, but easy for now
         # start_time = datetime.now()
@@ -78,6 +83,13 @@ class router(router_tech):
         # A list of path blockages (they might be expanded for wide metal DRC)
         self.path_blockages = []
 
+        # The incremental blockages of routing the components of a pin
+        # The number of path blockages that are blocked in the grid
+        self.num_blocked_paths = 0
+        # The grids that the sources and targets of the current component
+        # changed and whether they were blocked before
+        self.component_grids = {}
+
         # The boundary will determine the limits to the size
         # of the routing grid
         self.boundary = self.layout.measureBoundary(self.top_name)
@@ -143,6 +155,12 @@ class router(router_tech):
         for lpp in [self.vert_lpp, self.horiz_lpp]:
             self.retrieve_blockages(lpp)
             
+    def print_stage_time(self, stage, start_time, indentation):
+        """ Print the run time of a router stage and add it to the statistics. """
+        now_time = datetime.now()
+        print_time(stage, now_time, start_time, indentation)
+        self.stats.add_stage(stage, (now_time - start_time).total_seconds())
+
     def find_pins_and_blockages(self, pin_list):
         """
         Find the pins and blockages in the design
@@ -154,23 +172,23 @@ class router(router_tech):
         start_time = datetime.now()
         for pin_name in pin_list:
             self.retrieve_pins(pin_name)
-        print_time("Retrieving pins", datetime.now(), start_time, 4)
+        self.print_stage_time("Retrieving pins", start_time, 4)
         
         start_time = datetime.now()
         for pin_name in pin_list:
             self.analyze_pins(pin_name)
-        print_time("Analyzing pins", datetime.now(), start_time, 4)
+        self.print_stage_time("Analyzing pins", start_time, 4)
 
         # This will get all shapes as blockages and convert to grid units
         # This ignores shapes that were pins
         start_time = datetime.now()
         self.find_blockages()
-        print_time("Finding blockages", datetime.now(), start_time, 4)
+        self.print_stage_time("Finding blockages", start_time, 4)
 
         # Convert the blockages to grid units
         start_time = datetime.now()
         self.convert_blockages()
-        print_time("Converting blockages", datetime.now(), start_time, 4)
+        self.print_stage_time("Converting blockages", start_time, 4)
         
         # This will convert the pins to grid units
         # It must be done after blockages to ensure no DRCs
@@ -178,7 +196,7 @@ class router(router_tech):
         start_time = datetime.now()
         for pin in pin_list:
             self.convert_pins(pin)
-        print_time("Converting pins", datetime.now(), start_time, 4)
+        self.print_stage_time("Converting pins", start_time, 4)
 
         # Combine adjacent pins into pin groups to reduce run-time
         # by reducing the number of maze routes.
@@ -194,13 +212,13 @@ class router(router_tech):
         # Must be done before enclosing pins
         start_time = datetime.now()
         self.separate_adjacent_pins(0)
-        print_time("Separating adjacent pins", datetime.now(), start_time, 4)
+        self.print_stage_time("Separating adjacent pins", start_time, 4)
         
         # Enclose the continguous grid units in a metal
         # rectangle to fix some DRCs
         start_time = datetime.now()
         self.enclose_pins()
-        print_time("Enclosing pins", datetime.now(), start_time, 4)
+        self.print_stage_time("Enclosing pins", start_time, 4)
 
     # MRG: Removing this code for now. The later compute enclosure code
     # assumes that all pins are touching and this may produce sets of pins
@@ -288,9 +306,26 @@ class router(router_tech):
         debug.info(1,
                    "Comparing {0} and {1} adjacency".format(pin_name1,
                                                             pin_name2))
+        # Map the (x, y) of the second pin groups' grids to the groups.
+        # Grids are only removed below, so a pair of groups that isn't
+        # close now can't become adjacent and doesn't need to be compared.
+        group_map = {}
+        for index2, pg2 in enumerate(self.pin_groups[pin_name2]):
+            for g in pg2.grids:
+                group_map.setdefault((g.x, g.y), set()).add(index2)
+        offsets = [(x, y) for x in range(-separation, separation + 1)
+                   for y in range(-separation, separation + 1)
+                   if abs(x) + abs(y) <= separation]
+
         removed_grids = 0
         for index1, pg1 in enumerate(self.pin_groups[pin_name1]):
+            close_groups = set()
+            for g in pg1.grids:
+                for (x, y) in offsets:
+                    close_groups.update(group_map.get((g.x + x, g.y + y), ()))
             for index2, pg2 in enumerate(self.pin_groups[pin_name2]):
+                if index2 not in close_groups:
+                    continue
                 adj_grids = pg1.adjacent_grids(pg2, separation)
                 removed_grids += len(adj_grids)
                 # These should have the same length, so...
@@ -383,7 +418,46 @@ class router(router_tech):
         # route over them
         blockage_grids = {y for x in self.pin_groups[pin_name] for y in x.grids}
         self.set_blockages(blockage_grids, False)
-        
+
+    def init_component_blockages(self, pin_name):
+        """
+        Clear the routing grid and add all of the blockages to route the
+        components of a pin one at a time with prepare_component_blockages.
+        """
+        self.rg.reinit()
+        self.prepare_blockages(pin_name)
+        self.num_blocked_paths = len(self.path_blockages)
+        self.component_grids = {}
+
+    def prepare_component_blockages(self, pin_name, grids):
+        """
+        Update the blockages from the previous component of a pin to route the
+        next one. This gives the same grid as init_component_blockages but
+        only restores the grids of the previous component and blocks the new
+        paths instead of marking every blockage again.
+        The grids are the ones that the source and targets of the next
+        component will change. Targets that are not in them (e.g. the supply
+        rails) stay targets for all of the components.
+        """
+        # Restore the grids of the previous component
+        for (g, (blocked, target)) in self.component_grids.items():
+            self.rg.map.set_source(g, False)
+            self.rg.map.set_target(g, target)
+            self.rg.map.set_blocked(g, blocked)
+            if not target:
+                self.rg.target.discard(g)
+        self.rg.reset_source()
+
+        # Block the new paths except over the pins like prepare_blockages
+        # and the targets which are unblocked after the blockages
+        if self.num_blocked_paths < len(self.path_blockages):
+            pin_grids = {y for x in self.pin_groups[pin_name] for y in x.grids}
+            for path_set in self.path_blockages[self.num_blocked_paths:]:
+                self.set_blockages(path_set - pin_grids - self.rg.target)
+            self.num_blocked_paths = len(self.path_blockages)
+
+        self.component_grids = {g: (self.rg.map.is_blocked(g), g in self.rg.target) for g in grids}
+
     def convert_shape_to_units(self, shape):
         """
         Scale a shape (two vector list) to user units
@@ -730,56 +804,25 @@ class router(router_tech):
         debug.info(2, "Analyzing pin groups for {}.".format(pin_name))        
         pin_set = self.pins[pin_name]
 
-        # This will be a list of pin tuples that overlap
-        overlap_list = []
-
-        # Sort the rectangles into a list with lower/upper y coordinates
-        bottom_y_coordinates = [(x.by(), x, "bottom") for x in pin_set]
-        top_y_coordinates = [(x.uy(), x, "top") for x in pin_set]
-        y_coordinates = bottom_y_coordinates + top_y_coordinates
-        y_coordinates.sort(key=lambda x: x[0])
-
-        # Map the pins to the lower indices
-        bottom_index_map = {x[1]: i for i, x in enumerate(y_coordinates) if x[2] == "bottom"}
-        # top_index_map = {x[1]: i for i, x in enumerate(y_coordinates) if x[2] == "bottom"}
-
         # Sort the pin list by x coordinate
         pin_list = list(pin_set)
         pin_list.sort(key=lambda x: x.lx())
 
-        # for shapes in x order
+        # Merge the groups of the overlapping pins (union-find)
+        pin_index = shape_index(pin_list)
+        group_id = {pin: pin for pin in pin_list}
+
+        def find_group(pin):
+            while group_id[pin] != pin:
+                group_id[pin] = group_id[group_id[pin]]
+                pin = group_id[pin]
+            return pin
+
         for pin in pin_list:
-            # start at pin's lower y coordinate
-            bottom_index = bottom_index_map[pin]
-            compared_pins = set()
-            for i in range(bottom_index, len(y_coordinates)):
-                compare_pin = y_coordinates[i][1]
-                # Don't overlap yourself
-                if pin == compare_pin:
-                    continue
-                # Done when we encounter any shape above the pin
-                if compare_pin.by() > pin.uy():
-                    break
-                # Don't double compare the same pin twice
-                if compare_pin in compared_pins:
-                    continue
-                compared_pins.add(compare_pin)
-                # If we overlap, add them to the list
-                if pin.overlaps(compare_pin):
-                    overlap_list.append((pin, compare_pin))
-
-        # Initial unique group assignments
-        group_id = {}
-        gid = 1
+            for compare_pin in pin_index.overlapping(pin):
+                group_id[find_group(compare_pin)] = find_group(pin)
         for pin in pin_list:
-            group_id[pin] = gid
-            gid += 1
-                    
-        for p in overlap_list:
-            (p1, p2) = p
-            for pin in pin_list:
-                if group_id[pin] == group_id[p2]:
-                    group_id[pin] = group_id[p1]
+            group_id[pin] = find_group(pin)
             
         # For each pin add it to it's group
         group_map = {}
@@ -811,7 +854,11 @@ class router(router_tech):
         for pin_name in self.pin_groups:
             debug.info(1, "Enclosing pins for {}".format(pin_name))
             for pg in self.pin_groups[pin_name]:
+                start_time = datetime.now()
                 pg.enclose_pin()
+                self.stats.add_enclosure(pin_name,
+                                         len(pg.enclosures),
+                                         (datetime.now() - start_time).total_seconds())
                 pg.add_enclosure(self.cell)
 
     def add_source(self, pin_name):
@@ -878,6 +925,24 @@ class router(router_tech):
             if i != index:
                 self.add_pin_component_target(pin_name, i)
         
+    def move_component_source(self, pin_name, old_index, new_index):
+        """
+        Change the source from one pin component to another one when every
+        other component is a target. The old source becomes a target, so
+        only the grids of the two components change.
+        """
+        old_grids = self.pin_groups[pin_name][old_index].grids
+        new_grids = self.pin_groups[pin_name][new_index].grids
+        for g in old_grids:
+            self.rg.map.set_source(g, False)
+        for g in new_grids:
+            self.rg.map.set_target(g, False)
+        self.rg.target -= new_grids
+        self.rg.reset_source()
+
+        self.add_pin_component_source(pin_name, new_index)
+        self.add_pin_component_target(pin_name, old_index)
+
     def set_component_blockages(self, pin_name, value=True):
         """
         Block all of the pin components.
@@ -895,7 +960,7 @@ class router(router_tech):
         debug.info(4, "Set path: " + str(path))
 
         # This is marked for debug
-        path.set_path()
+        path.set_path(self.rg)
 
         # For debugging... if the path failed to route.
         # if False or path == None:
@@ -993,19 +1058,26 @@ class router(router_tech):
             newpath.append(path[-1])
         return newpath
             
-    def run_router(self, detour_scale):
+    def run_router(self, detour_scale, max_detour_scale=None):
         """
         This assumes the blockages, source, and target are all set up.
+        The cost bound of the search is relaxed up to max_detour_scale
+        if it is larger than the detour_scale.
         """
 
         # Double check source and taget are not same node, if so, we are done!
-        for k, v in self.rg.map.items():
-            if v.source and v.target:
-                debug.error("Grid cell is source and target! {}".format(k))
-                return False
+        for k in self.rg.map.get_source_and_targets():
+            debug.error("Grid cell is source and target! {}".format(k))
+            return False
             
         # returns the path in tracks
-        (path, cost) = self.rg.route(detour_scale)
+        start_time = datetime.now()
+        (path, cost) = self.rg.route(detour_scale, max_detour_scale)
+        self.stats.add_attempt(detour_scale,
+                               self.rg.search_stats,
+                               path,
+                               cost,
+                               (datetime.now() - start_time).total_seconds())
         if path:
             debug.info(1, "Found path: cost={0} ".format(cost))
             debug.info(1, str(path))
@@ -1058,6 +1130,14 @@ class router(router_tech):
             import sys
             sys.exit(1)
 
+    def write_stats(self):
+        """
+        Write the run statistics of the router to the output path
+        if OPTS.router_stats is enabled.
+        """
+        if OPTS.router_stats:
+            self.stats.write(OPTS.output_path + self.cell.name + "_router.json")
+
     def annotate_grid(self, g):
         """
         Display grid information in the GDS file for a single grid cell.
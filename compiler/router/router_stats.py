@@ -0,0 +1,95 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import json
+import debug
+from datetime import datetime
+
+
+class router_stats():
+    """
+    Run statistics of a router to find the nets that dominate the routing time.
+    It records the time of the router stages, the pin enclosures of every net
+    and the maze routes of every pin component with the search statistics
+    of each attempt (one per detour_scale that was tried).
+    """
+
+    def __init__(self, design_name):
+        self.design_name = design_name
+        # The (name, seconds) of the router stages in the order they ran
+        self.stages = []
+        # Map of pin names to the totals of their pin group enclosures
+        self.enclosures = {}
+        # The pin components that were maze routed
+        self.components = []
+        # The component that is being routed
+        self.component = None
+        self.component_start = None
+
+    def add_stage(self, stage, seconds):
+        self.stages.append({"stage": stage,
+                            "seconds": seconds})
+
+    def add_enclosure(self, pin_name, num_enclosures, seconds):
+        """ Add the enclosures of a pin group. """
+        totals = self.enclosures.setdefault(pin_name, {"groups": 0,
+                                                       "enclosures": 0,
+                                                       "seconds": 0.0,
+                                                       "max_seconds": 0.0})
+        totals["groups"] += 1
+        totals["enclosures"] += num_enclosures
+        totals["seconds"] += seconds
+        totals["max_seconds"] = max(totals["max_seconds"], seconds)
+
+    def begin_component(self, pin_name, index):
+        """ Start the routes of a pin component. """
+        self.component = {"pin": pin_name,
+                          "component": index,
+                          "routed": False,
+                          "seconds": 0.0,
+                          "attempts": []}
+        self.component_start = datetime.now()
+
+    def add_attempt(self, detour_scale, search, path, cost, seconds):
+        """
+        Add a maze route of the current component. The search is the dictionary
+        of the grid search statistics and the path is None if it failed.
+        """
+        attempt = {"detour_scale": detour_scale,
+                   "routed": path != None,
+                   "seconds": seconds}
+        attempt.update(search)
+        if path:
+            attempt["cost"] = cost
+            attempt["length"] = len(path)
+            attempt["vias"] = path.num_vias()
+        self.component["attempts"].append(attempt)
+
+    def end_component(self):
+        """ Finish the routes of the current pin component. """
+        attempts = self.component["attempts"]
+        self.component["routed"] = len(attempts) > 0 and attempts[-1]["routed"]
+        self.component["retries"] = max(len(attempts) - 1, 0)
+        self.component["seconds"] = (datetime.now() - self.component_start).total_seconds()
+        self.components.append(self.component)
+        self.component = None
+
+    def get_dict(self):
+        """ All of the statistics with the components sorted by decreasing run time. """
+        return {"design": self.design_name,
+                "stages": self.stages,
+                "enclosures": self.enclosures,
+                "routed_components": sum(x["routed"] for x in self.components),
+                "failed_components": sum(not x["routed"] for x in self.components),
+                "nodes_expanded": sum(y["nodes_expanded"] for x in self.components for y in x["attempts"]),
+                "components": sorted(self.components, key=lambda x: x["seconds"], reverse=True)}
+
+    def write(self, filename):
+        """ Write the statistics as JSON. """
+        debug.info(1, "Writing router statistics to {}".format(filename))
+        with open(filename, "w") as f:
+            json.dump(self.get_dict(), f, indent=1)
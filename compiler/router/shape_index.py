@@ -0,0 +1,168 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import math
+
+
+class shape_index:
+    """
+    A uniform bin spatial index of pin_layout shapes split per layer.
+    Each shape is added to every bin that its rectangle touches so
+    overlap, containment and nearest queries only compare the shapes
+    in the bins around the query instead of all shapes.
+    Queries return shapes in the order they were added.
+    Shapes must not be moved or resized after they are added.
+    """
+
+    def __init__(self, shapes=[], bin_size=None):
+        # All of the shapes in the order they were added
+        self.shapes = []
+        # Map of layer number to a map of bin to shape indices
+        self.layers = {}
+        # Map of layer number to the lower left and upper right bins
+        self.bounds = {}
+
+        if not bin_size:
+            bin_size = self.get_bin_size(shapes)
+        self.bin_size = bin_size
+
+        for shape in shapes:
+            self.add(shape)
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def __iter__(self):
+        return iter(self.shapes)
+
+    def get_bin_size(self, shapes):
+        """ Use the average shape dimension so that most shapes are in a few bins. """
+        if len(shapes) == 0:
+            return 1.0
+        total = sum(max(shape.width(), shape.height()) for shape in shapes)
+        return max(total / len(shapes), 0.001)
+
+    def get_bin_range(self, ll, ur):
+        """ The lower left and upper right bins that a rectangle touches. """
+        return (math.floor(ll.x / self.bin_size),
+                math.floor(ll.y / self.bin_size),
+                math.floor(ur.x / self.bin_size),
+                math.floor(ur.y / self.bin_size))
+
+    def add(self, shape):
+        """ Add a shape to the index. """
+        index = len(self.shapes)
+        self.shapes.append(shape)
+
+        bins = self.layers.setdefault(shape.lpp[0], {})
+        (llx, lly, urx, ury) = self.get_bin_range(shape.rect[0], shape.rect[1])
+        for x in range(llx, urx + 1):
+            for y in range(lly, ury + 1):
+                bins.setdefault((x, y), []).append(index)
+
+        (minx, miny, maxx, maxy) = self.bounds.get(shape.lpp[0], (llx, lly, urx, ury))
+        self.bounds[shape.lpp[0]] = (min(minx, llx), min(miny, lly), max(maxx, urx), max(maxy, ury))
+
+    def candidates(self, ll, ur, layer=None):
+        """
+        Return the sorted indices of the shapes that share a bin with the
+        rectangle on the given layer number (or any layer if it is None).
+        This is a superset of the shapes that touch the rectangle.
+        """
+        if layer is None:
+            layer_bins = list(self.layers.values())
+        elif layer in self.layers:
+            layer_bins = [self.layers[layer]]
+        else:
+            return []
+
+        (llx, lly, urx, ury) = self.get_bin_range(ll, ur)
+        indices = set()
+        for bins in layer_bins:
+            for x in range(llx, urx + 1):
+                for y in range(lly, ury + 1):
+                    if (x, y) in bins:
+                        indices.update(bins[(x, y)])
+        return sorted(indices)
+
+    def intersecting(self, ll, ur, layer=None):
+        """ Return the shapes that touch a rectangle on a layer number (or any layer). """
+        shape_list = []
+        for index in self.candidates(ll, ur, layer):
+            (oll, our) = self.shapes[index].rect
+            if oll.x <= ur.x and our.x >= ll.x and oll.y <= ur.y and our.y >= ll.y:
+                shape_list.append(self.shapes[index])
+        return shape_list
+
+    def overlapping(self, shape):
+        """ Return the shapes that overlap with a shape. """
+        return [self.shapes[i] for i in self.candidates(shape.rect[0], shape.rect[1], shape.lpp[0])
+                if shape.overlaps(self.shapes[i])]
+
+    def overlaps_any(self, shape):
+        """ Check if a shape overlaps any of the shapes. """
+        for i in self.candidates(shape.rect[0], shape.rect[1], shape.lpp[0]):
+            if shape.overlaps(self.shapes[i]):
+                return True
+        return False
+
+    def containing(self, shape):
+        """ Return the shapes that contain a shape. """
+        return [self.shapes[i] for i in self.candidates(shape.rect[0], shape.rect[1], shape.lpp[0])
+                if self.shapes[i].contains(shape)]
+
+    def contained(self, shape):
+        """ Return the shapes that are contained by a shape. """
+        return [self.shapes[i] for i in self.candidates(shape.rect[0], shape.rect[1], shape.lpp[0])
+                if shape.contains(self.shapes[i])]
+
+    def nearest(self, shape):
+        """
+        Return the closest shape on the same layer (by pin_layout.distance)
+        or None if there are no shapes on that layer.
+        Bins are searched in growing rings around the shape until no
+        unsearched bin can be closer than the best shape so far.
+        """
+        bins = self.layers.get(shape.lpp[0])
+        if not bins:
+            return None
+
+        (llx, lly, urx, ury) = self.get_bin_range(shape.rect[0], shape.rect[1])
+        # No shape is in a ring beyond the bins of the layer
+        (minx, miny, maxx, maxy) = self.bounds[shape.lpp[0]]
+        max_ring = max(llx - minx, lly - miny, maxx - urx, maxy - ury, 0)
+
+        best_shape = None
+        best_distance = math.inf
+        searched = set()
+        for ring in range(max_ring + 1):
+            # Any shape in a bin of this ring is at least this far away
+            if (ring - 1) * self.bin_size > best_distance:
+                break
+            for (x, y) in self.get_ring(llx, lly, urx, ury, ring):
+                for index in bins.get((x, y), []):
+                    if index in searched:
+                        continue
+                    searched.add(index)
+                    other = self.shapes[index]
+                    if not shape.same_lpp(shape.lpp, other.lpp):
+                        continue
+                    distance = shape.distance(other)
+                    if distance < best_distance:
+                        best_distance = distance
+                        best_shape = other
+
+        return best_shape
+
+    def get_ring(self, llx, lly, urx, ury, ring):
+        """ The bins on the square ring that is ring bins outside of a range of bins. """
+        if ring == 0:
+            return [(x, y) for x in range(llx, urx + 1) for y in range(lly, ury + 1)]
+        (llx, lly, urx, ury) = (llx - ring, lly - ring, urx + ring, ury + ring)
+        ring_bins = [(x, y) for x in range(llx, urx + 1) for y in (lly, ury)]
+        ring_bins.extend((x, y) for x in (llx, urx) for y in range(lly + 1, ury))
+        return ring_bins
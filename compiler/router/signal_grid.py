@@ -8,11 +8,11 @@
 from itertools import tee
 import debug
 from heapq import heappush,heappop
-from copy import deepcopy
 
 from grid import grid
 from grid_path import grid_path
 from vector3d import vector3d
+from direction import direction
 
 class signal_grid(grid):
     """
@@ -26,26 +26,47 @@ class signal_grid(grid):
         # priority queue for the maze routing
         self.q = []
 
+        # statistics of the last route search
+        self.search_stats = {}
+
+        # extra cost of entering each grid (e.g. for negotiated congestion)
+        self.congestion_costs = {}
+
+        # offsets and step costs of the expansion directions
+        self.expand_offsets = self.get_expand_offsets()
+
     def reinit(self):
         """ Reinitialize everything for a new route. """
 
         # Reset all the cells in the map
-        for p in self.map.values():
-            p.reset()
+        self.map.reset()
         
         # clear source and target pins
-        self.source=[]
-        self.target=[]
+        self.source=set()
+        self.target=set()
         
         # Clear the queue 
         while len(self.q)>0:
             heappop(self.q)
         self.counter = 0
 
+    def reset_route(self):
+        """
+        Remove the sources, targets and costs of the previous route
+        but keep the blockages.
+        """
+        for n in self.source:
+            self.map.set_source(n,False)
+        for n in self.target:
+            self.map.set_target(n,False)
+        self.source=set()
+        self.target=set()
+        self.map.reset_costs()
+
     def init_queue(self):
         """
         Populate the queue with all the source pins with cost
-        to the target. Each item is a path of the grid cells.
+        to the target. Each item is a search node of the grid cells.
         We will use an A* search, so this cost must be pessimistic.
         Cost so far will be the length of the path.
         """
@@ -57,24 +78,35 @@ class signal_grid(grid):
         for s in self.source:
             cost = self.cost_to_target(s)
             debug.info(3,"Init: cost=" + str(cost) + " " + str([s]))
-            heappush(self.q,(cost,self.counter,grid_path([vector3d(s)])))
+            wave = [vector3d(s)]
+            heappush(self.q,(cost,self.counter,(wave,0,None,wave)))
             self.counter+=1
 
             
-    def route(self,detour_scale):
+    def route(self,detour_scale,max_detour_scale=None):
         """
         This does the A* maze routing with preferred direction routing.
         This only works for 1 track wide routes!
+        Each queue item is a search node (wave, cost so far, parent node,
+        first wave) so expanding a node does not copy or re-cost the path.
+        If the cost bound prunes all of the routes, the detour_scale is doubled
+        (up to max_detour_scale) and the search continues from the pruned
+        nodes with the minimum costs that it already found.
         """
+        if max_detour_scale == None:
+            max_detour_scale = detour_scale
+        debug.check(detour_scale > 0, "The detour_scale must be positive.")
         
         # We set a cost bound of the HPWL for run-time. This can be 
         # over-ridden if the route fails due to pruning a feasible solution.
         any_source_element = next(iter(self.source))
-        cost_bound = detour_scale*self.cost_to_target(any_source_element)*grid.PREFERRED_COST
+        source_cost = self.cost_to_target(any_source_element)
+        cost_bound = detour_scale*source_cost*grid.PREFERRED_COST
 
         # Check if something in the queue is already a source and a target!
         for s in self.source:
             if self.is_target(s):
+                self.set_search_stats(0, 0, 0, 0, detour_scale, 0)
                 return((grid_path([vector3d(s)]),0))
             
         # Make sure the queue is empty if we run another route
@@ -83,51 +115,157 @@ class signal_grid(grid):
             
         # Put the source items into the queue
         self.init_queue()
-        cheapest_path = None
-        cheapest_cost = None
 
-            
+        # Search statistics
+        nodes_expanded = 0
+        queue_peak = len(self.q)
+        nodes_pruned = 0
+        nodes_skipped = 0
+        relaxations = 0
+
+        # The nodes that the cost bound pruned if it can be relaxed
+        pruned = []
+        congestion_costs = self.congestion_costs
+        keep_pruned = detour_scale < max_detour_scale
+
         # Keep expanding and adding to the priority queue until we are done
-        while len(self.q)>0:
-            # should we keep the path in the queue as well or just the final node?
-            (cost,count,curpath) = heappop(self.q)
+        while True:
+            if len(self.q)==0:
+                if not pruned:
+                    break
+                # Relax the cost bound and continue from the pruned nodes
+                detour_scale = min(2*detour_scale, max_detour_scale)
+                cost_bound = detour_scale*source_cost*grid.PREFERRED_COST
+                keep_pruned = detour_scale < max_detour_scale
+                relaxations += 1
+                debug.info(2,"Relaxing the cost bound to detour_scale {}".format(detour_scale))
+                pruned = self.requeue_pruned(pruned, cost_bound, keep_pruned)
+                queue_peak = max(queue_peak, len(self.q))
+                continue
+
+            (cost,count,curnode) = heappop(self.q)
+            (curwave,curcost,parent,rootwave) = curnode
             debug.info(3,"Queue size: size=" + str(len(self.q)) + " " + str(cost))
-            debug.info(4,"Expanding: cost=" + str(cost) + " " + str(curpath))
-            
+
+            # Skip nodes that were reached more cheaply after they were queued.
+            # The cheaper node was expanded first, so these could only enqueue
+            # neighbors that are more expensive than the ones it already did.
+            min_cost = self.map.get_min_cost(curwave[0])
+            if min_cost!=-1 and cost>min_cost:
+                nodes_skipped += 1
+                continue
+            # The first target that is popped is the cheapest since the HPWL never
+            # overestimates the cost
+            if self.is_target(curwave[0]): # This uses the [0] item because we are assuming 1-track wide
+                self.set_search_stats(nodes_expanded, queue_peak, nodes_pruned, nodes_skipped,
+                                      detour_scale, relaxations)
+                return (self.get_path(curnode),curcost)
+            debug.info(4,"Expanding: cost=" + str(cost) + " " + str(curwave))
+            nodes_expanded += 1
+
+            # The first wave of a path is never revisited. The other
+            # waves on the path have a lower min_cost than any revisit.
             # expand the last element
-            neighbors =  self.expand_dirs(curpath)
-            debug.info(4,"Neighbors: " + str(neighbors))
-            
-            for n in neighbors:
-                # make a new copy of the path to not update the old ones
-                newpath = deepcopy(curpath)
-                # node is added to the map by the expand routine
-                newpath.append(n)
-                # check if we hit the target and are done
-                if self.is_target(n[0]): # This uses the [0] item because we are assuming 1-track wide
-                    return (newpath,newpath.cost())
+            for (offset,step_costs) in self.expand_offsets:
+                n = [point + offset for point in curwave]
+                if n==rootwave or n[0].z>1 or n[0].z<0:
+                    continue
+                # node is added to the map by the blocked check
+                if self.is_blocked(n):
+                    continue
+                # incremental cost of the path to this point
+                current_cost = curcost + step_costs[curwave[0].z]
+                if congestion_costs:
+                    current_cost += congestion_costs.get(n[0], 0)
+                # current path cost + predicted cost
+                target_cost = self.cost_to_target(n[0])
+                predicted_cost = current_cost +  target_cost
+                # only add the cost if it is less than our bound
+                # (a target is always added, it is the end of a route)
+                if (predicted_cost < cost_bound or self.is_target(n[0])):
+                    min_cost = self.map.get_min_cost(n[0])
+                    if (min_cost==-1 or predicted_cost<min_cost):
+                        self.map.set_min_cost(n[0],predicted_cost)
+                        debug.info(4,"Enqueuing: cost=" + str(current_cost) + "+" + str(target_cost) + " " + str(n))
+                        # add the cost to get to this point if we haven't reached it yet
+                        heappush(self.q,(predicted_cost,self.counter,(n,current_cost,curnode,rootwave)))
+                        self.counter += 1
+                        if len(self.q) > queue_peak:
+                            queue_peak = len(self.q)
                 else:
-                    # current path cost + predicted cost
-                    current_cost = newpath.cost()
-                    target_cost = self.cost_to_target(n[0])
-                    predicted_cost = current_cost +  target_cost
-                    # only add the cost if it is less than our bound
-                    if (predicted_cost < cost_bound):
-                        if (self.map[n[0]].min_cost==-1 or predicted_cost<self.map[n[0]].min_cost):
-                            self.map[n[0]].min_path = newpath
-                            self.map[n[0]].min_cost = predicted_cost
-                            debug.info(4,"Enqueuing: cost=" + str(current_cost) + "+" + str(target_cost) + " " + str(newpath))
-                            # add the cost to get to this point if we haven't reached it yet
-                            heappush(self.q,(predicted_cost,self.counter,newpath))
-                            self.counter += 1
-                        #else:
-                        #    print("Better previous cost.")
-                    #else:
-                    #    print("Cost bounded")
+                    nodes_pruned += 1
+                    if keep_pruned:
+                        pruned.append((predicted_cost,n,current_cost,curnode,rootwave))
 
+        self.set_search_stats(nodes_expanded, queue_peak, nodes_pruned, nodes_skipped,
+                              detour_scale, relaxations)
         debug.warning("Unable to route path. Expand the detour_scale to allow detours.")
         return (None,None)
 
+    def requeue_pruned(self, pruned, cost_bound, keep_pruned):
+        """
+        Add the pruned nodes that are within a relaxed cost bound to the queue
+        unless they were reached more cheaply since. Returns the nodes that
+        are still pruned if the bound can be relaxed again.
+        """
+        still_pruned = []
+        for (predicted_cost,n,current_cost,parent,rootwave) in pruned:
+            if predicted_cost < cost_bound:
+                min_cost = self.map.get_min_cost(n[0])
+                if (min_cost==-1 or predicted_cost<min_cost):
+                    self.map.set_min_cost(n[0],predicted_cost)
+                    heappush(self.q,(predicted_cost,self.counter,(n,current_cost,parent,rootwave)))
+                    self.counter += 1
+            elif keep_pruned:
+                still_pruned.append((predicted_cost,n,current_cost,parent,rootwave))
+        return still_pruned
+
+    def set_search_stats(self, nodes_expanded, queue_peak, nodes_pruned, nodes_skipped,
+                         detour_scale, relaxations):
+        """
+        Save the statistics of a route search. The pruned nodes exceeded
+        the cost bound and the skipped ones were reached more cheaply
+        after they were queued. The detour_scale is the final one after
+        the relaxations of the cost bound.
+        """
+        self.search_stats = {"nodes_expanded": nodes_expanded,
+                             "queue_peak": queue_peak,
+                             "nodes_pruned": nodes_pruned,
+                             "nodes_skipped": nodes_skipped,
+                             "final_detour_scale": detour_scale,
+                             "relaxations": relaxations}
+
+    def get_expand_offsets(self):
+        """
+        The offsets of each of the four cardinal directions plus up or down
+        and the cost of a step in that direction from layer 0 and layer 1.
+        Matches the costs of grid_path.cost().
+        """
+        offsets = []
+        for d in direction.cardinal_directions(True):
+            offset = direction.get_offset(d)
+            if offset.z != 0: # via
+                step_costs = (grid.VIA_COST, grid.VIA_COST)
+            elif offset.x != 0: # horizontal is non-preferred on the vertical layer
+                step_costs = (grid.PREFERRED_COST, grid.NONPREFERRED_COST)
+            else: # vertical is non-preferred on the horizontal layer
+                step_costs = (grid.NONPREFERRED_COST, grid.PREFERRED_COST)
+            offsets.append((offset, step_costs))
+        return offsets
+
+    def get_path(self,node):
+        """
+        Follow the parent nodes back to the source to create the path.
+        """
+        waves = []
+        while node:
+            waves.append(node[0])
+            node = node[2]
+        waves.reverse()
+        path = grid_path()
+        path.extend(waves)
+        return path
+
     def expand_dirs(self,curpath):
         """
         Expand each of the four cardinal directions plus up or down
@@ -13,6 +13,8 @@ import debug
 from pin_layout import pin_layout
 from globals import OPTS
 from router import router
+import grid_utils
+from datetime import datetime
 
 class signal_router(router):
     """
@@ -41,7 +43,7 @@ class signal_router(router):
         self.rg = signal_grid.signal_grid(self.ll, self.ur, self.track_width)
         
 
-    def route(self, src, dest, detour_scale=5):
+    def route(self, src, dest, detour_scale=5, max_detour_scale=None):
         """ 
         Route a single source-destination net and return
         the simplified rectilinear path. Cost factor is how sub-optimal to explore for a feasible route. 
@@ -64,25 +66,146 @@ class signal_router(router):
         # Get the pin shapes
         self.find_pins_and_blockages([src, dest])
         
-        # Block everything
-        self.prepare_blockages()
-        # Clear the pins we are routing
-        self.set_blockages(self.pin_components[src],False)
-        self.set_blockages(self.pin_components[dest],False)        
+        # Block everything except the pins we are routing
+        self.prepare_blockages([src, dest])
             
         # Now add the src/tgt if they are not blocked by other shapes
         self.add_source(src)
         self.add_target(dest)
 
-        if not self.run_router(detour_scale=detour_scale):
-            self.write_debug_gds(stop_program=False)
-            return False
-        
-        self.write_debug_gds(stop_program=False)        
-        return True
+        self.stats.begin_component(src, 0)
+        routed = self.run_router(detour_scale=detour_scale,
+                                 max_detour_scale=max_detour_scale)
+        self.stats.end_component()
+        self.write_stats()
 
-                           
-        
+        self.write_debug_gds(stop_program=False)
+        return routed
+
+    def route_nets(self, nets, detour_scale=5, max_detour_scale=None, max_iterations=16):
+        """
+        Route a list of (src, dest) nets together with negotiated congestion
+        (PathFinder) instead of one at a time so the order of the nets does not
+        matter. Every iteration rips up and reroutes each net where the grids of
+        the other nets are allowed but cost more the more nets use them and the
+        more iterations they were shared (the history cost). This repeats until
+        no grid is shared or max_iterations.
+        The routes are added and the list of paths (in the order of the nets) is
+        returned or None if the nets could not be routed without sharing grids.
+        """
+        debug.info(1,"Running signal router on {} nets...".format(len(nets)))
+        debug.check(max_iterations > 0, "Need at least one routing iteration.")
+        pin_names = [name for net in nets for name in net]
+
+        # Clear the pins if we have previously routed
+        if (hasattr(self,'rg')):
+            self.clear_pins()
+        else:
+            # Creat a routing grid over the entire area
+            self.create_routing_grid()
+
+        # Get the pin shapes of all of the nets and block them once
+        self.find_pins_and_blockages(pin_names)
+        self.prepare_blockages()
+
+        paths = [None] * len(nets)
+        path_grids = [set()] * len(nets)
+        # The number of nets that use each grid
+        usage = {}
+        # The cost of the grids that were shared in the previous iterations
+        history = {}
+        # The cost of sharing a grid in this iteration
+        present_cost = 1
+        for iteration in range(max_iterations):
+            for (index, (src, dest)) in enumerate(nets):
+                # Rip up the net
+                for g in path_grids[index]:
+                    usage[g] -= 1
 
+                # The cost of the grids of the other nets
+                self.rg.congestion_costs = {g: history.get(g, 0) + present_cost * count
+                                            for (g, count) in usage.items() if count > 0}
+                for g in history:
+                    self.rg.congestion_costs.setdefault(g, history[g])
+
+                self.stats.begin_component(src, iteration)
+                paths[index] = self.route_net(src, dest, detour_scale, max_detour_scale)
+                self.stats.end_component()
+                if not paths[index]:
+                    debug.warning("Unable to route {0} to {1}.".format(src, dest))
+                    self.rg.congestion_costs = {}
+                    self.write_stats()
+                    return None
+
+                path_grids[index] = paths[index].get_grids()
+                for g in path_grids[index]:
+                    usage[g] = usage.get(g, 0) + 1
+
+            shared_grids = [g for (g, count) in usage.items() if count > 1]
+            debug.info(1,"Iteration {0}: {1} shared grids.".format(iteration, len(shared_grids)))
+            if not shared_grids:
+                break
+
+            # Penalize the shared grids more in the next iterations
+            for g in shared_grids:
+                history[g] = history.get(g, 0) + 1
+            present_cost *= 2
+
+        self.rg.congestion_costs = {}
+        self.write_stats()
+        if shared_grids:
+            debug.warning("Unable to route {0} nets without sharing {1} grids.".format(len(nets),
+                                                                                       len(shared_grids)))
+            return None
+
+        for path in paths:
+            self.paths.append(path)
+            self.add_route(path)
+            self.path_blockages.append(grid_utils.flatten_set(path))
+        return paths
+
+    def route_net(self, src, dest, detour_scale, max_detour_scale):
+        """
+        Route a net on the grid of prepare_blockages (where all of the pins are
+        blocked) and restore the grid for the next net. Returns the path or None.
+        """
+        # Now add the src/tgt which unblocks them
+        self.add_source(src)
+        self.add_target(dest)
+
+        start_time = datetime.now()
+        (path, cost) = self.rg.route(detour_scale, max_detour_scale)
+        self.stats.add_attempt(detour_scale,
+                               self.rg.search_stats,
+                               path,
+                               cost,
+                               (datetime.now() - start_time).total_seconds())
+
+        # Block the pins again
+        pin_grids = {y for name in [src, dest] for x in self.pin_groups[name] for y in x.grids}
+        self.rg.reset_route()
+        self.set_blockages(pin_grids)
+        return path
+
+    def prepare_blockages(self, pin_names=[]):
+        """
+        Reset and add all of the blockages in the design
+        except the pins of the given names which are routed.
+        """
+        debug.info(3,"Preparing blockages.")
+        self.clear_blockages()
+        # This adds the initial blockges of the design
+        self.set_blockages(self.blocked_grids, True)
 
+        # Block all of the pins and the previous routes
+        for name in self.pin_groups:
+            blockage_grids = {y for x in self.pin_groups[name] for y in x.grids}
+            self.set_blockages(blockage_grids, True)
+            blockage_grids = {y for x in self.pin_groups[name] for y in x.blockages}
+            self.set_blockages(blockage_grids, True)
+        self.set_blockages(self.path_blockages)
 
+        # Unblock the pins that are routed
+        for name in pin_names:
+            blockage_grids = {y for x in self.pin_groups[name] for y in x.grids}
+            self.set_blockages(blockage_grids, False)
@@ -30,8 +30,12 @@ class supply_grid(signal_grid):
         self.source = set()
         self.target = set()
         # Reset all the cells in the map
-        for p in self.map.values():
-            p.reset()
+        self.map.reset()
+
+    def reset_source(self):
+        """ Reset the sources and costs of the previous route but keep the blockages and targets. """
+        self.source = set()
+        self.map.reset_costs()
         
 
     def find_start_wave(self, wave, direct):
@@ -74,12 +78,15 @@ class supply_grid(signal_grid):
         Expand the wave until there is a blockage and return
         the wave path.
         """
+        offset = direction.get_offset(direct)
         wave_path = grid_path()
         while wave and not self.is_wave_blocked(wave):
             if wave[0].x > self.ur.x or wave[-1].y > self.ur.y:
                 break
             wave_path.append(wave)
-            wave = wave_path.neighbor(direct)
+            # The wave only moves forward so, unlike grid_path.neighbor,
+            # don't search the path for it
+            wave = [point + offset for point in wave]
 
         return wave_path
 
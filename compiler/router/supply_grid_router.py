@@ -6,7 +6,8 @@
 # All rights reserved.
 #
 import debug
-from globals import print_time
+import multiprocessing
+from globals import OPTS
 from vector3d import vector3d
 from router import router
 from direction import direction
@@ -14,6 +15,19 @@ from datetime import datetime
 import grid_utils
 
 
+# The router whose tracks are searched by the forked workers
+parallel_router = None
+
+
+def find_band_rails(band):
+    """
+    Worker entry point which finds the supply rails of a band of tracks
+    in the blockage map that was forked from the parallel_router.
+    """
+    (name, tracks) = band
+    return parallel_router.find_tracks_rails(name, tracks)
+
+
 class supply_grid_router(router):
     """
     A router class to read an obstruction map from a gds and
@@ -36,8 +50,10 @@ class supply_grid_router(router):
         self.supply_rails = {}
         # This is the same as above but as a sigle set for the all the rails
         self.supply_rail_tracks = {}
+        # The fewest tracks that are worth searching in a worker process
+        self.min_band_tracks = 16
 
-        print_time("Init supply router", datetime.now(), start_time, 3)
+        self.print_stage_time("Init supply router", start_time, 3)
         
     def create_routing_grid(self):
         """ 
@@ -69,7 +85,7 @@ class supply_grid_router(router):
         # Get the pin shapes
         start_time = datetime.now()
         self.find_pins_and_blockages([self.vdd_name, self.gnd_name])
-        print_time("Finding pins and blockages", datetime.now(), start_time, 3)
+        self.print_stage_time("Finding pins and blockages", start_time, 3)
         # Add the supply rails in a mesh network and connect H/V with vias
         start_time = datetime.now()
         # Block everything
@@ -81,20 +97,21 @@ class supply_grid_router(router):
         self.prepare_blockages(self.vdd_name)
         # Determine the rail locations
         self.route_supply_rails(self.vdd_name, 1)
-        print_time("Routing supply rails", datetime.now(), start_time, 3)
+        self.print_stage_time("Routing supply rails", start_time, 3)
         
         start_time = datetime.now()
         self.route_simple_overlaps(vdd_name)
         self.route_simple_overlaps(gnd_name)
-        print_time("Simple overlap routing", datetime.now(), start_time, 3)
+        self.print_stage_time("Simple overlap routing", start_time, 3)
         
         # Route the supply pins to the supply rails
         # Route vdd first since we want it to be shorter
         start_time = datetime.now()
         self.route_pins_to_rails(vdd_name)
         self.route_pins_to_rails(gnd_name)
-        print_time("Maze routing supplies", datetime.now(), start_time, 3)
+        self.print_stage_time("Maze routing supplies", start_time, 3)
         # self.write_debug_gds("final.gds", False)
+        self.write_stats()
 
         # Did we route everything??
         if not self.check_all_routed(vdd_name):
@@ -148,6 +165,13 @@ class supply_grid_router(router):
 
         all_rails = self.supply_rails[name]
 
+        # The bounding boxes of the rails to skip the pairs that can't overlap
+        rail_boxes = []
+        for rail in all_rails:
+            xs = [i.x for i in rail]
+            ys = [i.y for i in rail]
+            rail_boxes.append((min(xs), min(ys), max(xs), max(ys)))
+
         connections = set()
         via_areas = []
         for i1, r1 in enumerate(all_rails):
@@ -170,6 +194,11 @@ class supply_grid_router(router):
                 if e.z==0:
                     continue
 
+                (llx1, lly1, urx1, ury1) = rail_boxes[i1]
+                (llx2, lly2, urx2, ury2) = rail_boxes[i2]
+                if llx1 > urx2 or llx2 > urx1 or lly1 > ury2 or lly2 > ury1:
+                    continue
+
                 # Determine if we have sufficient overlap and, if so,
                 # remember:
                 # the indices to determine a rail is connected to another
@@ -226,44 +255,77 @@ class supply_grid_router(router):
         Compute the unblocked locations for the horizontal and vertical supply rails.
         Go in a raster order from bottom to the top (for horizontal) and left to right
         (for vertical). Start with an initial start_offset in x and y direction.
+        The tracks only read the blockages, so bands of them are searched in
+        parallel (with OPTS.num_threads workers) and the rails are merged in
+        the raster order.
         """
 
-        self.supply_rails[name]=[]
-        
         max_yoffset = self.rg.ur.y
         max_xoffset = self.rg.ur.x
         min_yoffset = self.rg.ll.y
         min_xoffset = self.rg.ll.x
-        
+
         # Horizontal supply rails
         start_offset = min_yoffset + supply_number
-        for offset in range(start_offset, max_yoffset, 2):
-            # Seed the function at the location with the given width
-            wave = [vector3d(min_xoffset, offset, 0)]
-            # While we can keep expanding east in this horizontal track
-            while wave and wave[0].x < max_xoffset:
-                added_rail = self.find_supply_rail(name, wave, direction.EAST)
-                if not added_rail:
-                    # Just seed with the next one
-                    wave = [x+vector3d(1, 0, 0) for x in wave]
-                else:
-                    # Seed with the neighbor of the end of the last rail
-                    wave = added_rail.neighbor(direction.EAST)
+        tracks = [([vector3d(min_xoffset, offset, 0)], direction.EAST)
+                  for offset in range(start_offset, max_yoffset, 2)]
 
         # Vertical supply rails
         start_offset = min_xoffset + supply_number
-        for offset in range(start_offset, max_xoffset, 2):
-            # Seed the function at the location with the given width
-            wave = [vector3d(offset, min_yoffset, 1)]
-            # While we can keep expanding north in this vertical track
-            while wave and wave[0].y < max_yoffset:
-                added_rail = self.find_supply_rail(name, wave, direction.NORTH)
+        tracks.extend(([vector3d(offset, min_yoffset, 1)], direction.NORTH)
+                      for offset in range(start_offset, max_xoffset, 2))
+
+        # Workers are daemons which cannot fork again
+        num_workers = min(OPTS.num_threads, len(tracks) // self.min_band_tracks)
+        if num_workers <= 1 or multiprocessing.current_process().daemon \
+           or "fork" not in multiprocessing.get_all_start_methods():
+            self.find_tracks_rails(name, tracks)
+            return
+
+        # Several contiguous bands per worker to balance the blocked regions
+        num_bands = min(4 * num_workers, len(tracks) // self.min_band_tracks)
+        bands = [(name, tracks[i * len(tracks) // num_bands:(i + 1) * len(tracks) // num_bands])
+                 for i in range(num_bands)]
+        debug.info(1, "Finding supply rails of {0} tracks in {1} bands on {2} workers.".format(len(tracks),
+                                                                                           num_bands,
+                                                                                           num_workers))
+
+        global parallel_router
+        parallel_router = self
+        pool = multiprocessing.get_context("fork").Pool(num_workers)
+        try:
+            band_rails = pool.map(find_band_rails, bands, chunksize=1)
+        finally:
+            pool.terminate()
+            parallel_router = None
+
+        self.supply_rails[name] = [rail for rails in band_rails for rail in rails]
+
+    def find_tracks_rails(self, name, tracks):
+        """
+        Find the supply rails in a list of (seed wave, direction) tracks.
+        Horizontal tracks go EAST and vertical ones NORTH from the seed.
+        Returns the rails in the order of the tracks.
+        """
+        self.supply_rails[name] = []
+
+        for (wave, direct) in tracks:
+            offset = direction.get_offset(direct)
+            if direct == direction.EAST:
+                (index, max_offset) = (0, self.rg.ur.x)
+            else:
+                (index, max_offset) = (1, self.rg.ur.y)
+            # While we can keep expanding in this track
+            while wave and wave[0][index] < max_offset:
+                added_rail = self.find_supply_rail(name, wave, direct)
                 if not added_rail:
                     # Just seed with the next one
-                    wave = [x + vector3d(0, 1, 0) for x in wave]
+                    wave = [x + offset for x in wave]
                 else:
                     # Seed with the neighbor of the end of the last rail
-                    wave = added_rail.neighbor(direction.NORTH)
+                    wave = added_rail.neighbor(direct)
+
+        return self.supply_rails[name]
 
     def find_supply_rail(self, name, seed_wave, direct):
         """
@@ -359,30 +421,35 @@ class supply_grid_router(router):
         debug.info(1, "Maze routing {0} with {1} pin components to connect.".format(pin_name,
                                                                                     remaining_components))
 
+        # Add all of the blockages and the rails as targets once
+        # and only update the changes of each component
+        # Don't add the other pins, but we could?
+        self.init_component_blockages(pin_name)
+        self.add_supply_rail_target(pin_name)
+
         for index, pg in enumerate(self.pin_groups[pin_name]):
             if pg.is_routed():
                 continue
             
             debug.info(3, "Routing component {0} {1}".format(pin_name, index))
+            self.stats.begin_component(pin_name, index)
 
-            # Clear everything in the routing grid.
-            self.rg.reinit()
-
-            # This is inefficient since it is non-incremental, but it was
-            # easier to debug.
-            self.prepare_blockages(pin_name)
+            # Undo the source of the previous component
+            # and block the previous route
+            self.prepare_component_blockages(pin_name, pg.grids)
             
             # Add the single component of the pin as the source
             # which unmarks it as a blockage too
             self.add_pin_component_source(pin_name, index)
 
-            # Add all of the rails as targets
-            # Don't add the other pins, but we could?
-            self.add_supply_rail_target(pin_name)
-
             # Actually run the A* router
-            if not self.run_router(detour_scale=5):
+            if not self.run_router(detour_scale=OPTS.route_detour_scale,
+                                   max_detour_scale=OPTS.route_max_detour_scale):
                 self.write_debug_gds("debug_route.gds", False)
+                # The failed route cleared the grid
+                self.init_component_blockages(pin_name)
+                self.add_supply_rail_target(pin_name)
+            self.stats.end_component()
                 
             # if index==3 and pin_name=="vdd":
             #     self.write_debug_gds("route.gds",False)
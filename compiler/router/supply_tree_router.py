@@ -9,7 +9,7 @@ import gdsMill
 import tech
 import math
 import debug
-from globals import OPTS,print_time
+from globals import OPTS
 from contact import contact
 from pin_group import pin_group
 from pin_layout import pin_layout
@@ -67,7 +67,7 @@ class supply_tree_router(router):
         # Get the pin shapes
         start_time = datetime.now()
         self.find_pins_and_blockages([self.vdd_name, self.gnd_name])
-        print_time("Finding pins and blockages",datetime.now(), start_time, 3)
+        self.print_stage_time("Finding pins and blockages", start_time, 3)
 
         # Add the supply rails in a mesh network and connect H/V with vias
         start_time = datetime.now()
@@ -80,9 +80,10 @@ class supply_tree_router(router):
         start_time = datetime.now()
         self.route_pins(vdd_name)
         self.route_pins(gnd_name)
-        print_time("Maze routing supplies",datetime.now(), start_time, 3)
+        self.print_stage_time("Maze routing supplies", start_time, 3)
 
         #self.write_debug_gds("final.gds",False)  
+        self.write_stats()
 
         # Did we route everything??
         if not self.check_all_routed(vdd_name):
@@ -144,27 +145,33 @@ class supply_tree_router(router):
         debug.info(1,"Maze routing {0} with {1} pin components to connect.".format(pin_name,
                                                                                    remaining_components))
 
+        # Add all of the blockages once and only update the changes
+        # of each component
+        self.init_component_blockages(pin_name)
+        source_index = None
+        num_target_paths = 0
+
         for index,pg in enumerate(self.pin_groups[pin_name]):
             if pg.is_routed():
                 continue
             
             debug.info(1,"Routing component {0} {1}".format(pin_name, index))
-
-            # Clear everything in the routing grid.
-            self.rg.reinit()
-
-            # This is inefficient since it is non-incremental, but it was
-            # easier to debug.
-            self.prepare_blockages(pin_name)
-            
-            # Add the single component of the pin as the source
-            # which unmarks it as a blockage too
-            self.add_pin_component_source(pin_name,index)
-            
-            # Marks all pin components except index as target
-            self.add_pin_component_target_except(pin_name,index)
-            # Add the prevous paths as a target too
-            self.add_path_target(self.paths)
+            self.stats.begin_component(pin_name, index)
+
+            if source_index == None:
+                # Add the single component of the pin as the source
+                # which unmarks it as a blockage too
+                self.add_pin_component_source(pin_name,index)
+
+                # Marks all pin components except index as target
+                self.add_pin_component_target_except(pin_name,index)
+            else:
+                # The previous source becomes a target
+                self.move_component_source(pin_name, source_index, index)
+            # Add the paths since the previous component as a target too
+            self.add_path_target(self.paths[num_target_paths:])
+            source_index = index
+            num_target_paths = len(self.paths)
 
             print("SOURCE: ")
             for k,v in self.rg.map.items():
@@ -181,8 +188,14 @@ class supply_tree_router(router):
                 self.write_debug_gds("debug{}.gds".format(pin_name),False)
                 
             # Actually run the A* router
-            if not self.run_router(detour_scale=5):
+            if not self.run_router(detour_scale=OPTS.route_detour_scale,
+                                   max_detour_scale=OPTS.route_max_detour_scale):
                 self.write_debug_gds("debug_route.gds",True)
+                # The failed route cleared the grid
+                self.init_component_blockages(pin_name)
+                source_index = None
+                num_target_paths = 0
+            self.stats.end_component()
                 
             #if index==3 and pin_name=="vdd":
             #    self.write_debug_gds("route.gds",False)
@@ -0,0 +1,73 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test that routes multiple nets with negotiated congestion"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+
+OPTS = globals.OPTS
+
+class multi_net_test(openram_test):
+    """
+    Route two nets in the same GDS file together with negotiated
+    congestion so they don't depend on the order of the nets.
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+        from gds_cell import gds_cell
+        from design import design
+        from signal_router import signal_router as router
+
+        class routing(design, openram_test):
+            """
+            A generic GDS design that we can route on.
+            """
+            def __init__(self, name, nets):
+                design.__init__(self, "top")
+
+                # Instantiate a GDS cell with the design
+                gds_file = "{0}/{1}.gds".format(os.path.dirname(os.path.realpath(__file__)),name)
+                cell = gds_cell(name, gds_file)
+                self.add_inst(name=name,
+                              mod=cell,
+                              offset=[0,0])
+                self.connect_inst([])
+                
+                layer_stack =("m1","via1","m2")
+                r=router(layer_stack,self,gds_file)
+                self.routed_paths = r.route_nets(nets)
+                self.assertTrue(self.routed_paths)
+                self.assertTrue(all(self.routed_paths))
+
+        nets = [("A","B"),("C","D")]
+        r = routing("05_two_nets_test_{0}".format(OPTS.tech_name), nets)
+        self.local_drc_check(r)
+
+        # The routes don't depend on the order of the nets
+        r_reversed = routing("05_two_nets_test_{0}".format(OPTS.tech_name), nets[::-1])
+        paths = r.routed_paths
+        reversed_paths = r_reversed.routed_paths[::-1]
+        self.assertEqual([x.get_grids() for x in paths], [x.get_grids() for x in reversed_paths])
+        self.assertEqual([x.cost() for x in paths], [x.cost() for x in reversed_paths])
+
+        # fails if there are any DRC errors on any cells
+        globals.end_openram()
+
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,94 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test that resolves shared grids of nets in a channel with negotiated congestion"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+
+OPTS = globals.OPTS
+
+class negotiated_congestion_test(openram_test):
+    """
+    Route three nets through a channel of two tracks on both layers.
+    The shortest routes of the nets share grids in the first iteration
+    and the congestion costs move them apart in the next iteration.
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+        from vector3d import vector3d
+        from signal_grid import signal_grid
+        from signal_router import signal_router
+        from router_stats import router_stats
+
+        class channel_pin():
+            """
+            A pin group of a single grid.
+            """
+            def __init__(self, grid):
+                self.grids = {grid}
+                self.blockages = set()
+
+        class channel_router(signal_router):
+            """
+            A signal router on a grid without a layout. Everything outside of
+            the channel in rows 3 and 4 is blocked in the middle of the grid.
+            """
+            def __init__(self):
+                self.stats = router_stats("channel")
+                self.pins = {}
+                self.pin_groups = {}
+                self.blocked_grids = {vector3d(x, y, z) for x in range(5, 16) for y in range(8) for z in range(2)
+                                      if y not in [3, 4]}
+                self.paths = []
+                self.path_blockages = []
+                self.pin_grids = {"A": vector3d(2, 4, 0), "B": vector3d(18, 3, 0),
+                                  "C": vector3d(2, 3, 0), "D": vector3d(18, 4, 0),
+                                  "E": vector3d(3, 3, 1), "F": vector3d(17, 4, 1)}
+
+            def create_routing_grid(self):
+                self.rg = signal_grid(vector3d(0, 0, 0), vector3d(20, 7, 0), 1)
+
+            def find_pins_and_blockages(self, pin_names):
+                for name in pin_names:
+                    self.pin_groups[name] = [channel_pin(self.pin_grids[name])]
+
+            def add_route(self, path):
+                pass
+
+        nets = [("A","B"),("C","D"),("E","F")]
+
+        # The nets share grids after the first iteration
+        r = channel_router()
+        self.assertEqual(r.route_nets(nets, max_iterations=1), None)
+
+        r = channel_router()
+        paths = r.route_nets(nets)
+        self.assertTrue(paths)
+        self.assertTrue(all(paths))
+        self.assertEqual(max(x["component"] for x in r.stats.components), 2)
+        grids = [x.get_grids() for x in paths]
+        for i in range(len(grids)):
+            for j in range(i + 1, len(grids)):
+                self.assertTrue(grids[i].isdisjoint(grids[j]))
+        self.assertEqual([x.cost() for x in paths], [27, 20, 27])
+
+        globals.end_openram()
+
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,70 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test that relaxes the cost bound of a maze route around a wall"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+
+OPTS = globals.OPTS
+
+class detour_relaxation_test(openram_test):
+    """
+    Route around a wall on both layers that needs a detour longer than
+    the HPWL bound. The route fails with a detour_scale of 1 and the
+    relaxed search finds the same route as a search with a larger bound.
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+
+        (path, cost, stats) = self.route_wall(1)
+        self.assertEqual(path, None)
+        self.assertEqual(stats["relaxations"], 0)
+
+        (path, cost, stats) = self.route_wall(1, 64)
+        self.assertTrue(path)
+        self.assertEqual(cost, 56)
+        self.assertEqual(stats["relaxations"], 2)
+        self.assertEqual(stats["final_detour_scale"], 4)
+        relaxed_grids = path.get_grids()
+
+        for detour_scale in [5, 64]:
+            (path, cost, stats) = self.route_wall(detour_scale)
+            self.assertEqual(cost, 56)
+            self.assertEqual(stats["relaxations"], 0)
+            self.assertEqual(path.get_grids(), relaxed_grids)
+
+        globals.end_openram()
+
+    def route_wall(self, detour_scale, max_detour_scale=None):
+        """
+        Route across a wall at x=15 which leaves a gap at the top of the grid.
+        Returns the path, cost and search statistics.
+        """
+        from vector3d import vector3d
+        from signal_grid import signal_grid
+
+        rg = signal_grid(vector3d(0, 0, 0), vector3d(30, 30, 0), 1)
+        rg.set_blocked({vector3d(15, y, z) for y in range(29) for z in range(2)})
+        rg.set_source(vector3d(5, 15, 0))
+        rg.set_target(vector3d(25, 15, 0))
+        (path, cost) = rg.route(detour_scale, max_detour_scale)
+        return (path, cost, rg.search_stats)
+
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,88 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test that routes the same net on a sparse and a dense routing grid"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+
+OPTS = globals.OPTS
+
+class dense_grid_test(openram_test):
+    """
+    Route through a gap in a wall that is outside of the bounding box of
+    the grid, so the dense grid uses its arrays and its sparse fallback.
+    Both grids must find the same paths and leave the same grid state.
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+
+        OPTS.route_dense_grid = False
+        (sparse_grid, sparse_results) = self.route_wall()
+        OPTS.route_dense_grid = True
+        (dense_grid, dense_results) = self.route_wall()
+
+        self.assertEqual(type(dense_grid.map).__name__, "grid_array")
+        self.assertTrue(len(dense_grid.map.outside) > 0)
+        self.assertEqual(dense_results, sparse_results)
+        for (path, cost, search_stats) in dense_results:
+            self.assertTrue(path)
+        # The second route goes around the first one and the wall through the gap
+        self.assertTrue(any(n.y > dense_grid.ur.y for n in dense_results[1][0]))
+        self.assertEqual(self.get_state(dense_grid), self.get_state(sparse_grid))
+
+        # Clearing the blockages and resetting also match
+        for rg in [sparse_grid, dense_grid]:
+            rg.clear_blockages()
+        self.assertEqual(self.get_state(dense_grid), self.get_state(sparse_grid))
+        for rg in [sparse_grid, dense_grid]:
+            rg.reinit()
+        self.assertEqual(self.get_state(dense_grid), self.get_state(sparse_grid))
+
+        globals.end_openram()
+
+    def route_wall(self):
+        """
+        Route two nets through a wall at x=10 with a gap at y=4 on layer 0 and
+        another one above the grid at y=13. The first route blocks the first gap.
+        Returns the grid and the (path grids, cost, search statistics) of the routes.
+        """
+        from vector3d import vector3d
+        from signal_grid import signal_grid
+
+        rg = signal_grid(vector3d(0, 0, 0), vector3d(20, 10, 0), 1)
+        rg.reinit()
+        rg.set_blocked({vector3d(10, y, z) for y in range(-5, 20) for z in range(2) if (y, z) not in [(4, 0), (13, 0), (13, 1)]})
+        results = []
+        for (source, target) in [((5, 4, 0), (15, 4, 0)), ((5, 6, 0), (15, 6, 0))]:
+            rg.add_source([vector3d(source)])
+            rg.add_target([vector3d(target)])
+            (path, cost) = rg.route(5, 64)
+            results.append((path.get_grids(), cost, rg.search_stats))
+            path.set_path(rg)
+            path.set_blocked(rg)
+            rg.reset_route()
+        return (rg, results)
+
+    def get_state(self, rg):
+        """ The flags and minimum cost of every cell in the map. """
+        return {n: (rg.map[n].blocked, rg.map[n].source, rg.map[n].target, rg.map[n].path, rg.map[n].min_cost)
+                for n in rg.map}
+
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,120 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test of the spatial index of pin shapes and the pin groups that it finds"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+
+OPTS = globals.OPTS
+
+class shape_index_test(openram_test):
+    """
+    Compare the queries of the shape index with brute force comparisons of
+    all shapes and the pin groups of analyze_pins with the pairwise overlap
+    grouping that it replaced.
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+        from pin_layout import pin_layout
+        from shape_index import shape_index
+        from vector import vector
+        import random
+
+        # Pins of 0.5 multiples on bins of 1.0, so many edges are on bin boundaries
+        rng = random.Random(0)
+        shapes = []
+        for i in range(60):
+            ll = vector(rng.randint(0, 20) * 0.5, rng.randint(0, 20) * 0.5)
+            ur = ll + vector(rng.randint(1, 6) * 0.5, rng.randint(1, 6) * 0.5)
+            shapes.append(pin_layout("pin{}".format(i), [ll, ur], rng.choice(["m1", "m2"])))
+        # Abutting pins on a bin boundary, a duplicate pin and a pin inside of another one
+        shapes.append(pin_layout("left", [vector(1, 1), vector(2, 2)], "m1"))
+        shapes.append(pin_layout("right", [vector(2, 1), vector(3, 2)], "m1"))
+        shapes.append(pin_layout("duplicate", [vector(2, 1), vector(3, 2)], "m1"))
+        shapes.append(pin_layout("inside", [vector(2.25, 1.25), vector(2.75, 1.75)], "m1"))
+        index = shape_index(shapes, 1.0)
+
+        m3 = pin_layout("m3", [vector(0, 0), vector(10, 10)], "m3")
+        queries = shapes + [m3,
+                            pin_layout("boundary", [vector(4, 4), vector(4.5, 6)], "m1"),
+                            pin_layout("corner", [vector(2.75, 2.75), vector(3, 3)], "m2"),
+                            pin_layout("far", [vector(40, 40), vector(41, 41)], "m2")]
+        for query in queries:
+            layer = query.lpp[0]
+            same_layer = [x for x in shapes if x.lpp[0] == layer]
+            self.assertEqual(index.overlapping(query), [x for x in same_layer if query.overlaps(x)])
+            self.assertEqual(index.overlaps_any(query), any(query.overlaps(x) for x in same_layer))
+            self.assertEqual(index.containing(query), [x for x in same_layer if x.contains(query)])
+            self.assertEqual(index.contained(query), [x for x in same_layer if query.contains(x)])
+            (ll, ur) = query.rect
+            self.assertEqual(index.intersecting(ll, ur, layer),
+                             [x for x in same_layer if self.touches(x, ll, ur)])
+            self.assertEqual(index.intersecting(ll, ur),
+                             [x for x in shapes if self.touches(x, ll, ur)])
+            nearest = index.nearest(query)
+            if same_layer:
+                self.assertEqual(query.distance(nearest), min(query.distance(x) for x in same_layer))
+            else:
+                self.assertEqual(nearest, None)
+
+        # An empty index and a layer without shapes
+        empty_index = shape_index([])
+        self.assertEqual(empty_index.overlapping(shapes[0]), [])
+        self.assertEqual(empty_index.intersecting(vector(0, 0), vector(10, 10)), [])
+        self.assertEqual(empty_index.nearest(shapes[0]), None)
+        self.assertEqual(index.overlapping(m3), [])
+        self.assertEqual(index.intersecting(vector(0, 0), vector(10, 10), m3.lpp[0]), [])
+
+        # The pin groups of a library cell and of an array with abutting supply pins
+        from sram_factory import factory
+        from router import router
+        cells = [factory.create(module_type="write_driver"),
+                 factory.create(module_type="bitcell_array", cols=4, rows=4)]
+        for cell in cells:
+            r = router(("m1","via1","m2"), cell)
+            for pin_name in ["vdd", "gnd"]:
+                r.retrieve_pins(pin_name)
+                r.analyze_pins(pin_name)
+                groups = {frozenset(x.pins) for x in r.pin_groups[pin_name]}
+                self.assertEqual(groups, self.pairwise_pin_groups(r.pins[pin_name]))
+
+        globals.end_openram()
+
+    def touches(self, shape, ll, ur):
+        (oll, our) = shape.rect
+        return oll.x <= ur.x and our.x >= ll.x and oll.y <= ur.y and our.y >= ll.y
+
+    def pairwise_pin_groups(self, pin_set):
+        """ Group the pins by comparing every pair of pins. """
+        pin_list = list(pin_set)
+        group_id = {pin: i for (i, pin) in enumerate(pin_list)}
+        for pin in pin_list:
+            for other in pin_list:
+                if pin.overlaps(other) and group_id[pin] != group_id[other]:
+                    old_id = group_id[other]
+                    for x in pin_list:
+                        if group_id[x] == old_id:
+                            group_id[x] = group_id[pin]
+        groups = {}
+        for pin in pin_list:
+            groups.setdefault(group_id[pin], set()).add(pin)
+        return {frozenset(x) for x in groups.values()}
+
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,67 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test of the supply rails found by one and by several workers"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+
+OPTS = globals.OPTS
+
+class supply_rails_threads_test(openram_test):
+    """
+    Compute the supply rails of a test GDS with a single process and with
+    bands of tracks on three workers and check that the rails are identical.
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+        from gds_cell import gds_cell
+        from design import design
+        from supply_grid_router import supply_grid_router
+
+        name = "07_big_test_scn4m_subm"
+        gds_file = "{0}/{1}.gds".format(os.path.dirname(os.path.realpath(__file__)), name)
+        top = design("top")
+        cell = gds_cell(name, gds_file)
+        top.add_inst(name=name,
+                     mod=cell,
+                     offset=[0, 0])
+        top.connect_inst([])
+
+        supply_rails = {}
+        for num_threads in [1, 3]:
+            OPTS.num_threads = num_threads
+            rtr = supply_grid_router(("m1", "via1", "m2"), top, gds_file)
+            rtr.create_routing_grid()
+            rtr.find_pins_and_blockages(["vdd", "gnd"])
+            for (pin_name, supply_number) in [("gnd", 0), ("vdd", 1)]:
+                rtr.prepare_blockages(pin_name)
+                rtr.compute_supply_rails(pin_name, supply_number)
+            supply_rails[num_threads] = {pin_name: [sorted(rail) for rail in rails]
+                                         for (pin_name, rails) in rtr.supply_rails.items()}
+
+        # Enough tracks that the bands are searched by the workers
+        num_tracks = (rtr.rg.ur.x - rtr.rg.ll.x + rtr.rg.ur.y - rtr.rg.ll.y) // 2
+        self.assertGreaterEqual(num_tracks // rtr.min_band_tracks, 3)
+        self.assertTrue(len(supply_rails[1]["gnd"]) > 0)
+        self.assertTrue(len(supply_rails[1]["vdd"]) > 0)
+        self.assertEqual(supply_rails[1], supply_rails[3])
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,116 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test of the A* maze route costs against an exhaustive search"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+
+OPTS = globals.OPTS
+
+class astar_brute_force_test(openram_test):
+    """
+    Route between random grids of small grids with random blockages and
+    congestion costs and compare the costs with a Dijkstra search of all
+    of the grids that uses the step costs of grid_path.cost().
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+        from vector3d import vector3d
+        from signal_grid import signal_grid
+        import random
+
+        size = 8
+        rng = random.Random(0)
+        grids = [vector3d(x, y, z) for x in range(size) for y in range(size) for z in range(2)]
+        # Block a ring around the grids so the search can't leave them
+        border = {vector3d(x, y, z) for x in range(-1, size + 1) for y in range(-1, size + 1) for z in range(2)
+                  if x in [-1, size] or y in [-1, size]}
+        routed = 0
+        for trial in range(150):
+            blocked = {x for x in grids if rng.random() < 0.3}
+            free = [x for x in grids if x not in blocked]
+            source = rng.choice(free)
+            targets = set(rng.sample(free, rng.randint(1, 2))) - {source}
+            if not targets:
+                continue
+            congestion_costs = {}
+            if trial % 2:
+                congestion_costs = {x: rng.randint(1, 5) for x in free if rng.random() < 0.2}
+
+            rg = signal_grid(vector3d(0, 0, 0), vector3d(size, size, 0), 1)
+            rg.set_blocked(blocked | border)
+            rg.set_source(source)
+            rg.add_target(list(targets))
+            rg.congestion_costs = congestion_costs
+            (path, cost) = rg.route(100)
+            best_cost = self.brute_force_cost(blocked, source, targets, congestion_costs, size)
+            if best_cost == None:
+                self.assertEqual(path, None)
+                continue
+            routed += 1
+            self.assertEqual(cost, best_cost)
+
+            # The path is connected, unblocked and goes from the source to a target
+            points = [x[0] for x in path.pathlist]
+            self.assertEqual(points[0], source)
+            self.assertIn(points[-1], targets)
+            for (p0, p1) in zip(points, points[1:]):
+                self.assertEqual(abs(p0.x - p1.x) + abs(p0.y - p1.y) + abs(p0.z - p1.z), 1)
+                self.assertNotIn(p1, blocked)
+            self.assertEqual(path.cost() + sum(congestion_costs.get(x, 0) for x in points[1:]), cost)
+        self.assertTrue(routed > 100)
+
+        globals.end_openram()
+
+    def brute_force_cost(self, blocked, source, targets, congestion_costs, size):
+        """
+        The cheapest cost from the source to any target with Dijkstra's
+        algorithm or None if there is no route.
+        """
+        from vector3d import vector3d
+        from grid import grid
+        import heapq
+
+        costs = {source: 0}
+        queue = [(0, source)]
+        while queue:
+            (cost, point) = heapq.heappop(queue)
+            if cost > costs[point]:
+                continue
+            if point in targets:
+                return cost
+            for offset in [vector3d(1, 0, 0), vector3d(-1, 0, 0), vector3d(0, 1, 0),
+                           vector3d(0, -1, 0), vector3d(0, 0, 1), vector3d(0, 0, -1)]:
+                n = point + offset
+                if not (0 <= n.x < size and 0 <= n.y < size and 0 <= n.z <= 1) or n in blocked:
+                    continue
+                if offset.z != 0:
+                    step = grid.VIA_COST
+                elif (offset.x != 0) == (point.z == 0):
+                    step = grid.PREFERRED_COST
+                else:
+                    step = grid.NONPREFERRED_COST
+                new_cost = cost + step + congestion_costs.get(n, 0)
+                if n not in costs or new_cost < costs[n]:
+                    costs[n] = new_cost
+                    heapq.heappush(queue, (new_cost, n))
+        return None
+
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,156 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+#!/usr/bin/env python3
+"Run a regression test that writes the router statistics of routed and failed nets as JSON"
+
+import unittest
+from testutils import header,openram_test
+import sys,os
+sys.path.append(os.path.join(sys.path[0],"../.."))
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import json
+
+OPTS = globals.OPTS
+
+class router_stats_test(openram_test):
+    """
+    Route nets on a grid without a layout with the router statistics
+    enabled and read the written JSON file back.
+    """
+
+    def runTest(self):
+        globals.init_openram("config_{0}".format(OPTS.tech_name))
+        from vector3d import vector3d
+        from signal_grid import signal_grid
+        from signal_router import signal_router
+        from router_stats import router_stats
+
+        class stats_pin():
+            """
+            A pin group of a single grid.
+            """
+            def __init__(self, grid):
+                self.grids = {grid}
+                self.blockages = set()
+
+        class stats_cell():
+            """
+            A cell that only has a name for the statistics file.
+            """
+            def __init__(self, name):
+                self.name = name
+
+        class stats_router(signal_router):
+            """
+            A signal router on a grid without a layout. Pin G is walled in
+            by blockages so it can't be routed.
+            """
+            def __init__(self, name):
+                self.cell = stats_cell(name)
+                self.stats = router_stats(name)
+                self.pins = {}
+                self.pin_groups = {}
+                self.blocked_grids = {vector3d(x, y, z) for x in range(9, 12) for y in range(9, 12) for z in range(2)
+                                      if (x, y) != (10, 10)}
+                self.paths = []
+                self.path_blockages = []
+                self.pin_grids = {"A": vector3d(1, 1, 0), "B": vector3d(6, 4, 0),
+                                  "C": vector3d(1, 6, 1), "D": vector3d(6, 8, 1),
+                                  "G": vector3d(10, 10, 0)}
+
+            def create_routing_grid(self):
+                self.rg = signal_grid(vector3d(0, 0, 0), vector3d(15, 15, 0), 1)
+
+            def find_pins_and_blockages(self, pin_names):
+                for name in pin_names:
+                    self.pin_groups[name] = [stats_pin(self.pin_grids[name])]
+
+            def add_route(self, path):
+                pass
+
+        OPTS.router_stats = True
+        OPTS.output_path = OPTS.openram_temp
+        filename = OPTS.output_path + "stats_routed_router.json"
+        r = stats_router("stats_routed")
+        r.stats.add_stage("find pins", 0.5)
+        r.stats.add_enclosure("A", 2, 0.25)
+        r.stats.add_enclosure("A", 1, 0.5)
+        self.assertTrue(r.route_nets([("A","B"),("C","D")]))
+        stats = self.read_stats(filename)
+        self.assertEqual(set(stats.keys()), {"design", "stages", "enclosures", "routed_components",
+                                             "failed_components", "nodes_expanded", "components"})
+        self.assertEqual(stats["design"], "stats_routed")
+        self.assertEqual(stats["stages"], [{"stage": "find pins", "seconds": 0.5}])
+        self.assertEqual(stats["enclosures"], {"A": {"groups": 2, "enclosures": 3,
+                                                     "seconds": 0.75, "max_seconds": 0.5}})
+        self.assertEqual(stats["routed_components"], 2)
+        self.assertEqual(stats["failed_components"], 0)
+        self.check_components(stats)
+        self.assertEqual(sorted(x["pin"] for x in stats["components"]), ["A", "C"])
+
+        # A failed net is written with the attempts that did not route
+        filename = OPTS.output_path + "stats_failed_router.json"
+        r = stats_router("stats_failed")
+        self.assertEqual(r.route_nets([("A","B"),("C","G")], max_detour_scale=10), None)
+        stats = self.read_stats(filename)
+        self.assertEqual(stats["routed_components"], 1)
+        self.assertEqual(stats["failed_components"], 1)
+        self.check_components(stats)
+        failed = [x for x in stats["components"] if not x["routed"]][0]
+        self.assertEqual(failed["pin"], "C")
+        # The cost bound was relaxed up to the max_detour_scale in the attempt
+        self.assertEqual(failed["retries"], 0)
+        self.assertEqual(failed["attempts"][0]["final_detour_scale"], 10)
+        self.assertTrue(failed["attempts"][0]["relaxations"] > 0)
+        self.assertFalse("cost" in failed["attempts"][0])
+
+        # Nothing is written without the option
+        OPTS.router_stats = False
+        filename = OPTS.output_path + "stats_off_router.json"
+        r = stats_router("stats_off")
+        self.assertTrue(r.route_nets([("A","B")]))
+        self.assertFalse(os.path.exists(filename))
+
+        globals.end_openram()
+
+    def read_stats(self, filename):
+        """ Load the statistics file as JSON. """
+        f = open(filename, "r")
+        stats = json.load(f)
+        f.close()
+        return stats
+
+    def check_components(self, stats):
+        """ Check the keys and the totals of the components and their attempts. """
+        components = stats["components"]
+        self.assertEqual(len(components), stats["routed_components"] + stats["failed_components"])
+        seconds = [x["seconds"] for x in components]
+        self.assertEqual(seconds, sorted(seconds, reverse=True))
+        nodes_expanded = 0
+        for component in components:
+            self.assertEqual(set(component.keys()), {"pin", "component", "routed", "seconds",
+                                                     "attempts", "retries"})
+            self.assertEqual(component["retries"], len(component["attempts"]) - 1)
+            self.assertEqual(component["routed"], component["attempts"][-1]["routed"])
+            for attempt in component["attempts"]:
+                keys = {"detour_scale", "routed", "seconds", "nodes_expanded", "queue_peak",
+                        "nodes_pruned", "nodes_skipped", "final_detour_scale", "relaxations"}
+                if attempt["routed"]:
+                    keys |= {"cost", "length", "vias"}
+                self.assertEqual(set(attempt.keys()), keys)
+                nodes_expanded += attempt["nodes_expanded"]
+        self.assertEqual(stats["nodes_expanded"], nodes_expanded)
+
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -17,6 +17,12 @@ class gds_cell(design):
         
         design.__init__(self, name)
 
+        # The design reads the technology library, so read the given
+        # GDS file as a library cell with the name of the design
+        self.gds_file = gds_file
+        self.gds_read()
+        self.gds.rename(name)
+
         # The dimensions will not be defined, so do this...
         self.width=0
         self.height=0
@@ -7,28 +7,41 @@
 #
 import debug
 import math
+from operator import itemgetter
 
-class vector3d():
+class vector3d(tuple):
     """
     This is the vector3d class to represent a 3D coordinate.
     It needs to override several operators to support
     concise vector3d operations, output, and other more complex
     data structures like lists.
+    Like vector, it is an immutable (x, y, z) tuple without an instance
+    dictionary so the grid cells are cheap to create and hash.
     """
-    def __init__(self, x, y=None, z=None):
+    __slots__ = ()
+
+    def __new__(cls, x, y=None, z=None):
         """ init function support two init method"""
         # will take single input as a coordinate
-        if y==None:
-            self.x = x[0]
-            self.y = x[1]
-            self.z = x[2]
+        if y is None:
+            return tuple.__new__(cls, (x[0], x[1], x[2]))
         #will take inputs as the values of a coordinate
-        else:
-            self.x = x
-            self.y = y
-            self.z = z
-        self._hash = hash((self.x,self.y,self.z))
-            
+        return tuple.__new__(cls, (x, y, z))
+
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
+    z = property(itemgetter(2))
+
+    def __getnewargs__(self):
+        """ The arguments to create a copy (for pickle) """
+        return (self[0], self[1], self[2])
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def __str__(self):
         """ override print function output """
         return "v3d["+str(self.x)+", "+str(self.y)+", "+str(self.z)+"]"
@@ -37,42 +50,12 @@ class vector3d():
         """ override print function output """
         return "v3d["+str(self.x)+", "+str(self.y)+", "+str(self.z)+"]"
 
-    def __setitem__(self, index, value):
-        """ 
-        override setitem function 
-        can set value by vector3d[index]=value
-        """
-        if index==0:
-            self.x=value
-        elif index==1:
-            self.y=value
-        elif index==2:
-            self.z=value
-        else:
-            self.x=value[0]
-            self.y=value[1]
-            self.z=value[2] 
-
-    def __getitem__(self, index):
-        """
-        override getitem function 
-        can get value by value=vector3d[index]
-        """
-        if index==0:
-            return self.x
-        elif index==1:
-            return self.y
-        elif index==2:
-            return self.z
-        else:
-            return self                
-
     def __add__(self, other):
         """
         Override + function (left add)
         Can add by vector3d(x1,y1,z1)+vector(x2,y2,z2)
         """
-        return vector3d(self.x + other[0], self.y + other[1], self.z + other[2])
+        return vector3d(self[0] + other[0], self[1] + other[1], self[2] + other[2])
 
 
     def __radd__(self, other):
@@ -88,22 +71,21 @@ class vector3d():
         """
         Override - function (left)
         """
-        return vector3d(self.x - other[0], self.y - other[1], self.z - other[2])
+        return vector3d(self[0] - other[0], self[1] - other[1], self[2] - other[2])
 
-    def __hash__(self):
+    def __rsub__(self, other):
         """
-        Override - function (hash)
-        Note: This assumes that you DON'T CHANGE THE VECTOR or it will
-        break things.
+        Override - function (right)
         """
-        return self._hash
+        return vector3d(other[0]- self[0], other[1] - self[1], other[2] - self[2])
 
-
-    def __rsub__(self, other):
+    def __mul__(self, other):
         """
-        Override - function (right)
+        A vector3d is not repeated like a tuple (use scale)
         """
-        return vector3d(other[0]- self.x, other[1] - self.y, other[2] - self.z)
+        return NotImplemented
+
+    __rmul__ = __mul__
 
     def rotate(self):
         """ pass a copy of rotated vector3d, without altering the vector3d! """
@@ -143,12 +125,6 @@ class vector3d():
         """
         return vector3d(int(round(self.x)),int(round(self.y)), self.z)
     
-    def __eq__(self, other):
-        """Override the default Equals behavior"""
-        if isinstance(other, self.__class__):
-            return self.x==other.x and self.y==other.y and self.z==other.z
-        return False
-
     def __lt__(self, other):
         """Override the default less than behavior"""
         if isinstance(other, self.__class__):
@@ -157,10 +133,10 @@ class vector3d():
             if self.x==other.x and self.y<other.y:
                 return True
         return False
-    
-    def __ne__(self, other):
-        """Override the default non-equality behavior"""
-        return not self.__eq__(other)
+
+    def __gt__(self, other):
+        """ The reflection of __lt__ instead of the tuple comparison """
+        return other.__lt__(self)
 
     def max(self, other):
         """ Max of both values """
@@ -8,6 +8,8 @@
 import datetime
 import debug
 from globals import OPTS, print_time
+from sram_factory import factory
+from module_cache import cache
 
 
 class sram():
@@ -44,9 +46,14 @@ class sram():
         self.s.create_netlist()
         if not OPTS.netlist_only:
             self.s.create_layout()
-        
+
+        # Save the new modules for the next runs
+        factory.flush_cache()
+
         if not OPTS.is_unit_test:
             print_time("SRAM creation", datetime.datetime.now(), start_time)
+            cache.print_stats()
+            factory.print_stats()
     
     def sp_write(self, name):
         self.s.sp_write(name)
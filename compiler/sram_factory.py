@@ -5,7 +5,10 @@
 # (acting for and on behalf of Oklahoma State University)
 # All rights reserved.
 #
+import time
+import debug
 from globals import OPTS
+from module_cache import cache
 
 class sram_factory:
     """
@@ -24,6 +27,16 @@ class sram_factory:
         self.module_indices = {}
         # A dictionary of instance lists indexed by module type
         self.objects = {}
+        # The (module type, module name, kwargs) that created each object indexed by id.
+        # The module name is None if it was generated.
+        self.object_keys = {}
+        # A dictionary of objects indexed by module type and canonical kwargs
+        self.object_index = {}
+        # A dictionary of instance lists with kwargs that can't be indexed by module type
+        self.unindexed_objects = {}
+        # The names of all of the objects
+        self.names = set()
+        self.reset_stats()
 
     def reset(self):
         """
@@ -64,11 +77,42 @@ class sram_factory:
         return (module_type, overridden)
 
     def is_duplicate_name(self, name):
-        for mods in self.objects.values():
-            for insts in mods:
-                if insts[1].name == name:
-                    return True
-        return False
+        return name in self.names
+
+    def reset_stats(self):
+        """ Clear the creation statistics. """
+        # Number of create calls and how many returned an existing object
+        self.creates = 0
+        self.hits = 0
+        # Per module type number of new objects and seconds spent in their
+        # constructors, excluding the objects that they create
+        self.type_counts = {}
+        self.type_times = {}
+        # Seconds spent in the child objects of the constructors being run
+        self.child_times = []
+        # The create calls of the constructors being run in the order they were made
+        self.create_calls = []
+
+    def get_stats(self):
+        """
+        Return the creation statistics as a dictionary for profiling.
+        """
+        return {"creates": self.creates,
+                "hits": self.hits,
+                "counts": dict(self.type_counts),
+                "times": dict(self.type_times)}
+
+    def print_stats(self):
+        """ Report the creation statistics sorted by construction time. """
+        if self.creates == 0:
+            return
+        debug.info(1, "Factory: {0} creates, {1} hits ({2:.1f}% hit rate)".format(self.creates,
+                                                                                   self.hits,
+                                                                                   100.0 * self.hits / self.creates))
+        for module_type in sorted(self.type_times, key=lambda t: -self.type_times[t]):
+            debug.info(1, "  {0:<30} {1:>6} objects {2:>9.3f} s".format(module_type,
+                                                                           self.type_counts[module_type],
+                                                                           self.type_times[module_type]))
 
     def create(self, module_type, module_name=None, **kwargs):
         """
@@ -90,6 +134,32 @@ class sram_factory:
         else:
             real_module_type = user_module_type
 
+        return self.create_from_key(real_module_type, module_name, kwargs)
+
+    def get_kwargs_key(self, kwargs):
+        """
+        A canonical (sorted and hashable) version of kwargs or None if they
+        are not plain values (numbers, strings, lists, tuples and dicts of them).
+        """
+        try:
+            return self.get_value_key(kwargs)
+        except TypeError:
+            return None
+
+    def get_value_key(self, value):
+        if value is None or type(value) in [str, int, float, bool]:
+            return value
+        elif type(value) in [list, tuple]:
+            return (type(value).__name__,) + tuple(self.get_value_key(v) for v in value)
+        elif type(value) == dict:
+            return ("dict",) + tuple(sorted((k, self.get_value_key(v)) for (k, v) in value.items()))
+        raise TypeError("Not a plain value: {}".format(value))
+
+    def create_from_key(self, real_module_type, module_name, kwargs):
+        """
+        Create a module of a resolved module type. This is also used to create
+        the modules that are referenced by the modules in the module cache.
+        """
         # Either retrieve the already loaded module or load it
         try:
             # Load a cached version from previous usage
@@ -102,15 +172,28 @@ class sram_factory:
             self.modules[real_module_type] = mod
             self.module_indices[real_module_type] = 0
             self.objects[real_module_type] = []
-            
+            self.object_index[real_module_type] = {}
+            self.unindexed_objects[real_module_type] = []
+
         # Either retreive a previous object or create a new one
-        for obj in self.objects[real_module_type]:
-            (obj_kwargs, obj_item) = obj
+        self.creates += 1
+        if self.create_calls:
+            self.create_calls[-1].append((real_module_type, module_name, kwargs))
+        kwargs_key = self.get_kwargs_key(kwargs)
+        if kwargs_key != None:
             # Must have the same dictionary exactly (conservative)
-            if obj_kwargs == kwargs:
-                return obj_item
+            if kwargs_key in self.object_index[real_module_type]:
+                self.hits += 1
+                return self.object_index[real_module_type][kwargs_key]
+        else:
+            for obj in self.unindexed_objects[real_module_type]:
+                (obj_kwargs, obj_item) = obj
+                if obj_kwargs == kwargs:
+                    self.hits += 1
+                    return obj_item
 
         # If no prefered module name is provided, we generate one.
+        given_name = module_name != None
         if not module_name:
             # Use the default name for the first cell.
             # This is especially for library cells so that the
@@ -133,10 +216,53 @@ class sram_factory:
         # kwargs_str = "kwargs={}".format(str(kwargs))
         # import debug
         # debug.info(0, "New module:" + type_str + name_str + kwargs_str)
-        obj = mod(name=module_name, **kwargs)
+        object_key = (real_module_type, module_name if given_name else None, kwargs)
+        cache_key = cache.get_key(real_module_type, kwargs_key)
+        start_time = time.time()
+        self.child_times.append(0)
+        self.create_calls.append([])
+        cached = None
+        if cache_key:
+            cached = cache.load(cache_key, self)
+        if cached:
+            (cached_name, obj) = cached
+            # Modules that name themselves (e.g. ptx) keep their name
+            if obj.name == cached_name:
+                obj.restore_cached(module_name)
+            else:
+                obj.restore_cached(obj.name)
+        else:
+            obj = mod(name=module_name, **kwargs)
+            if cache_key and not obj.is_library_cell:
+                cache.add(cache_key, module_name, obj, self.create_calls[-1])
+        self.create_calls.pop()
+        total_time = time.time() - start_time
+        self_time = total_time - self.child_times.pop()
+        if self.child_times:
+            self.child_times[-1] += total_time
+        self.type_counts[real_module_type] = self.type_counts.get(real_module_type, 0) + 1
+        self.type_times[real_module_type] = self.type_times.get(real_module_type, 0) + self_time
+
         self.objects[real_module_type].append((kwargs, obj))
+        if kwargs_key != None:
+            self.object_index[real_module_type][kwargs_key] = obj
+        else:
+            self.unindexed_objects[real_module_type].append((kwargs, obj))
+        self.names.add(obj.name)
+        self.object_keys[id(obj)] = object_key
         return obj
 
+    def flush_cache(self):
+        """ Save the new modules to the module cache. """
+        module_keys = {}
+        for (obj_id, (real_module_type, module_name, kwargs)) in self.object_keys.items():
+            # Modules with other arguments can't be created again from their key
+            if self.get_kwargs_key(kwargs) == None:
+                module_keys[obj_id] = None
+            else:
+                module_keys[obj_id] = (real_module_type, module_name, kwargs)
+        cache.flush(module_keys)
+
     def get_mods(self, module_type):
         """Returns list of all objects of module name's type."""
         if hasattr(OPTS, module_type):
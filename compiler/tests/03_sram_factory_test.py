@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+from sram_factory import factory
+import debug
+
+# A module type whose objects only keep their arguments
+test_module = '''
+class factory_test_cell():
+    def __init__(self, name, **kwargs):
+        self.name = name
+        self.kwargs = kwargs
+        self.is_library_cell = False
+'''
+
+class sram_factory_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+
+        f = open(OPTS.openram_temp + "factory_test_cell.py", "w")
+        f.write(test_module)
+        f.close()
+        sys.path.insert(0, OPTS.openram_temp)
+
+        factory.reset()
+        # Equal kwargs return the same object regardless of their order
+        a = factory.create(module_type="factory_test_cell", size=2, layers=("m1", "m2"), sizes={"a": 1, "b": [1, 2]})
+        b = factory.create(module_type="factory_test_cell", sizes={"b": [1, 2], "a": 1}, size=2, layers=("m1", "m2"))
+        self.assertIs(a, b)
+        self.assertEqual(a.name, "factory_test_cell")
+        # Different values or types are different objects
+        c = factory.create(module_type="factory_test_cell", size=3, layers=("m1", "m2"), sizes={"a": 1, "b": [1, 2]})
+        d = factory.create(module_type="factory_test_cell", size=2, layers=["m1", "m2"], sizes={"a": 1, "b": [1, 2]})
+        self.assertIsNot(c, a)
+        self.assertIsNot(d, a)
+        self.assertIsNot(d, c)
+        self.assertEqual([c.name, d.name], ["factory_test_cell_0", "factory_test_cell_1"])
+        self.assertEqual(factory.object_index["factory_test_cell"][factory.get_kwargs_key(a.kwargs)], a)
+
+        # Arguments that are not plain values are compared with the objects that had them
+        e = factory.create(module_type="factory_test_cell", size=2, cell=a)
+        self.assertIs(factory.create(module_type="factory_test_cell", cell=a, size=2), e)
+        g = factory.create(module_type="factory_test_cell", size=2, cell=c)
+        self.assertIsNot(g, e)
+        self.assertEqual(factory.get_kwargs_key(e.kwargs), None)
+        self.assertEqual(factory.unindexed_objects["factory_test_cell"], [(e.kwargs, e), (g.kwargs, g)])
+        self.assertEqual(factory.get_mods("factory_test_cell"), [a, c, d, e, g])
+
+        stats = factory.get_stats()
+        self.assertEqual(stats["creates"], 7)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["counts"], {"factory_test_cell": 5})
+        self.assertEqual(list(stats["times"].keys()), ["factory_test_cell"])
+
+        # A library module with the kwargs in a different order
+        p1 = factory.create(module_type="pinv", size=2, beta=3)
+        stats = factory.get_stats()
+        self.assertEqual(stats["creates"] - stats["hits"], sum(stats["counts"].values()))
+        p2 = factory.create(module_type="pinv", beta=3, size=2)
+        self.assertIs(p1, p2)
+        self.assertEqual(factory.get_stats()["creates"], stats["creates"] + 1)
+        self.assertEqual(factory.get_stats()["hits"], stats["hits"] + 1)
+        self.assertEqual(factory.get_stats()["counts"], stats["counts"])
+
+        factory.reset_stats()
+        self.assertEqual(factory.get_stats(), {"creates": 0, "hits": 0, "counts": {}, "times": {}})
+        self.assertIs(factory.create(module_type="pinv", size=2, beta=3), p1)
+        self.assertEqual(factory.get_stats()["hits"], 1)
+
+        self.assertRaises(ValueError, factory.create, module_type="factory_test_cell", module_name=a.name)
+
+        sys.path.remove(OPTS.openram_temp)
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+import debug
+
+class vector_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+        from vector import vector
+        from vector3d import vector3d
+        import copy
+        import pickle
+        import tech
+
+        grid = tech.drc["grid"]
+        a = vector(1, 2)
+        self.assertEqual((a.x, a.y), (1.0, 2.0))
+        self.assertEqual(vector([1, 2]), a)
+        self.assertEqual(vector(a), a)
+        self.assertEqual(hash(vector(1.0, 2.0)), hash(a))
+        self.assertEqual(a + vector(1, 1), vector(2, 3))
+        self.assertEqual(a - [1, 1], vector(0, 1))
+        self.assertEqual(a.scale(2, 3), vector(2, 6))
+        self.assertEqual(a.scale(a), vector(1, 4))
+        self.assertEqual(sum([a, a]), vector(2, 4))
+
+        # Vectors can't be changed
+        with self.assertRaises(AttributeError):
+            a.x = 3
+        with self.assertRaises(TypeError):
+            a[0] = 3
+        with self.assertRaises(AttributeError):
+            a.z = 3
+        b = vector(1 + 0.4 * grid, 2 - 0.4 * grid)
+        self.assertEqual(b.snap_to_grid(), a)
+        self.assertEqual(b, vector(1 + 0.4 * grid, 2 - 0.4 * grid))
+        self.assertIs(copy.copy(a), a)
+        self.assertIs(copy.deepcopy([a])[0], a)
+        self.assertEqual(pickle.loads(pickle.dumps(a)), a)
+        self.assertIs(type(pickle.loads(pickle.dumps(a))), vector)
+
+        # A vector is not a tuple to repeat
+        for product in [lambda: a * 2, lambda: 2 * a, lambda: a * a, lambda: a * 0.5]:
+            with self.assertRaises(TypeError):
+                product()
+
+        c = vector3d(1, 2, 0)
+        self.assertEqual((c.x, c.y, c.z), (1, 2, 0))
+        self.assertEqual(vector3d([1, 2, 0]), c)
+        self.assertEqual(c + vector3d(0, 0, 1), vector3d(1, 2, 1))
+        with self.assertRaises(AttributeError):
+            c.z = 1
+        with self.assertRaises(TypeError):
+            c[2] = 1
+        self.assertIs(copy.deepcopy(c), c)
+        self.assertEqual(pickle.loads(pickle.dumps(c)), c)
+        for product in [lambda: c * 2, lambda: 2 * c]:
+            with self.assertRaises(TypeError):
+                product()
+        # vector3d is ordered by x and then y
+        self.assertTrue(vector3d(1, 2, 1) < vector3d(1, 3, 0))
+        self.assertFalse(vector3d(1, 2, 0) < vector3d(1, 2, 1))
+        self.assertTrue(vector3d(2, 0, 0) > vector3d(1, 5, 0))
+
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
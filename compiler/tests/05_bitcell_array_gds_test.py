@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+from sram_factory import factory
+import debug
+
+class bitcell_array_gds_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+        import gdsMill
+        from tech import GDS
+
+        debug.info(2, "Testing the GDS array references of an 8x8 array")
+        a = factory.create(module_type="bitcell_array", cols=8, rows=8)
+        array_gds = OPTS.openram_temp + "array.gds"
+        a.gds_write(array_gds)
+        # The same array with a structure reference for every cell
+        inst_arrays = a.inst_arrays
+        a.inst_arrays = []
+        sref_gds = OPTS.openram_temp + "sref.gds"
+        a.gds_write(sref_gds)
+        a.inst_arrays = inst_arrays
+
+        array_layout = self.read_gds(array_gds)
+        sref_layout = self.read_gds(sref_gds)
+        array_struct = array_layout.structures[array_layout.rootStructureName]
+        sref_struct = sref_layout.structures[sref_layout.rootStructureName]
+        # The alternately mirrored rows are one array reference per orientation
+        self.assertEqual(len(array_struct.srefs), 0)
+        self.assertEqual(sorted((x.columns, x.rows, x.transFlags[0]) for x in array_struct.arefs),
+                         [(8, 4, False), (8, 4, True)])
+        self.assertEqual(len(sref_struct.srefs), 64)
+        self.assertEqual(len(sref_struct.arefs), 0)
+
+        # The arrayed cells have the shapes of the expanded references
+        lpps = self.get_lpps(sref_layout)
+        self.assertTrue(len(lpps) > 0)
+        for lpp in lpps:
+            self.assertEqual(sorted(array_layout.getAllShapes(lpp)), sorted(sref_layout.getAllShapes(lpp)))
+        self.assertTrue(len(array_layout.getAllShapes(lpps[0])) > 0)
+
+        # Write the read layout and read it again
+        rewrite_gds = OPTS.openram_temp + "rewrite.gds"
+        gdsMill.Gds2writer(array_layout).writeToFile(rewrite_gds)
+        rewrite_layout = self.read_gds(rewrite_gds)
+        self.assertEqual(self.get_elements(rewrite_layout), self.get_elements(array_layout))
+        second_gds = OPTS.openram_temp + "second.gds"
+        gdsMill.Gds2writer(rewrite_layout).writeToFile(second_gds)
+        self.assertEqual(self.read_bytes(second_gds), self.read_bytes(rewrite_gds))
+
+        # Only the named structure and the structures it references are read
+        cell_name = a.cell.name
+        cell_layout = self.read_gds(array_gds, cell_name)
+        self.assertEqual([x.rstrip("\x00") for x in cell_layout.structures], [cell_name])
+        cell_struct = array_layout.structures[array_layout.rootStructureName].arefs[0].aName
+        self.assertEqual(self.get_elements(cell_layout)[cell_struct],
+                         self.get_elements(array_layout)[cell_struct])
+        tree_layout = self.read_gds(array_gds, a.name)
+        self.assertEqual(self.get_elements(tree_layout), self.get_elements(array_layout))
+        self.assertRaises(KeyError, self.read_gds, array_gds, "missing_cell")
+
+        reader = gdsMill.Gds2reader(gdsMill.VlsiLayout(units=GDS["unit"]))
+        record = reader.findStruct(array_gds, cell_name)
+        self.assertEqual(record[0], 0)
+        self.assertEqual([vars(x) for x in record[1]],
+                         [vars(x) for x in array_layout.structures[cell_struct].boundaries])
+        self.assertEqual(reader.findStruct(array_gds, "missing_cell"), None)
+
+        globals.end_openram()
+
+    def read_gds(self, gds_file, struct_name=None):
+        """ Read a GDS file (or one structure of it) into a new layout. """
+        import gdsMill
+        from tech import GDS
+        layout = gdsMill.VlsiLayout(units=GDS["unit"])
+        gdsMill.Gds2reader(layout).loadFromFile(gds_file, struct_name)
+        return layout
+
+    def get_lpps(self, layout):
+        """ The layer purpose pairs of all boundaries in the layout. """
+        return sorted({(x.drawingLayer, x.purposeLayer)
+                       for structure in layout.structures.values()
+                       for x in structure.boundaries})
+
+    def get_elements(self, layout):
+        """ The fields of every element of every structure in the layout. """
+        elements = {}
+        for (name, structure) in layout.structures.items():
+            elements[name] = {key: [vars(x) for x in getattr(structure, key)]
+                              for key in ["boundaries", "paths", "srefs", "arefs", "texts", "nodes", "boxes"]}
+        return elements
+
+    def read_bytes(self, filename):
+        """ The contents of a binary file. """
+        f = open(filename, "rb")
+        contents = f.read()
+        f.close()
+        return contents
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
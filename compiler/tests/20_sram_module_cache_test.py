@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os,re,shutil
+import struct
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+from sram_factory import factory
+import debug
+
+class sram_module_cache_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+        from module_cache import cache
+        self.cache_path = OPTS.openram_temp + "module_cache"
+
+        # The cache is shared by separate runs of openram.py since the
+        # names of the modules depend on what was created before in a run
+        debug.info(1, "Building a 4bit, 16word SRAM with a cold and a warm module cache")
+        cold_stats = self.run_openram("cold", 16, True)
+        warm_stats = self.run_openram("warm", 16, True)
+        self.assertEqual(cold_stats[0], 0)
+        self.assertTrue(cold_stats[2] > 0)
+        # Only the library cells are not cached
+        self.assertTrue(warm_stats[0] > 0)
+        self.assertTrue(warm_stats[1] < cold_stats[1])
+        self.assertEqual(warm_stats[2], 0)
+        self.assertTrue(self.isdiff(self.get_filename("cold", "sp"), self.get_filename("warm", "sp")))
+        self.assertEqual(self.read_gds_records("cold"), self.read_gds_records("warm"))
+
+        debug.info(1, "Building a 4bit, 32word SRAM with and without the modules of the 16word SRAM")
+        partial_stats = self.run_openram("partial", 32, True)
+        self.run_openram("uncached", 32, False)
+        self.assertTrue(partial_stats[0] > 0)
+        self.assertTrue(partial_stats[2] > 0)
+        self.assertTrue(self.isdiff(self.get_filename("partial", "sp"), self.get_filename("uncached", "sp")))
+        self.assertEqual(self.read_gds_records("partial"), self.read_gds_records("uncached"))
+
+        debug.info(1, "Checking that the keyword arguments and options are part of the module cache key")
+        OPTS.module_cache_path = self.cache_path
+        factory.reset()
+        cache.reset_stats()
+        factory.create(module_type="pinv", size=3)
+        factory.flush_cache()
+        (hits, misses, stores) = cache.get_stats()
+        self.assertEqual(hits, 0)
+        self.assertTrue(misses > 0 and stores > 0)
+
+        # The same module is loaded from the cache
+        self.assertEqual(self.create_pinv(3), (1, 0))
+        # Other keyword arguments or options are a miss of the inverter
+        self.assertEqual(self.create_pinv(5)[1], 1)
+        OPTS.route_supplies = not OPTS.route_supplies
+        self.assertEqual(self.create_pinv(3)[1], 1)
+        OPTS.route_supplies = not OPTS.route_supplies
+        self.assertEqual(self.create_pinv(3), (1, 0))
+        # Options that do not change the modules are ignored
+        OPTS.num_threads += 1
+        self.assertEqual(self.create_pinv(3), (1, 0))
+
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+        globals.end_openram()
+
+    def create_pinv(self, size):
+        """
+        Create an inverter with a new factory and return the module cache
+        (hits, misses) of the inverter itself.
+        """
+        from module_cache import cache
+        factory.reset()
+        key = cache.get_key("pinv", factory.get_kwargs_key({"size": size}))
+        cached = os.path.isfile(cache.get_entry_path(key))
+        cache.reset_stats()
+        factory.create(module_type="pinv", size=size)
+        self.assertTrue(cache.get_stats()[0] + cache.get_stats()[1] > 0)
+        return (int(cached), int(not cached))
+
+    def get_filename(self, name, extension):
+        return "{0}{1}/sram.{2}".format(OPTS.openram_temp, name, extension)
+
+    def run_openram(self, name, num_words, use_cache):
+        """ Build an SRAM with openram.py and return the (hits, misses, stores) of the module cache. """
+        out_path = OPTS.openram_temp + name
+        os.makedirs(out_path, exist_ok=True)
+        config_name = "{0}/config_{1}.py".format(out_path, name)
+        config = open(config_name, "w")
+        config.write("word_size = 4\n")
+        config.write("num_words = {}\n".format(num_words))
+        config.write("words_per_row = {}\n".format(num_words // 16))
+        config.write("tech_name = \"{}\"\n".format(OPTS.tech_name))
+        config.write("nominal_corner_only = True\n")
+        config.write("route_supplies = True\n")
+        if use_cache:
+            config.write("module_cache_path = \"{}\"\n".format(self.cache_path))
+        config.close()
+
+        cmd = "{0}/openram.py -n -o sram -p {1} {2} > {1}/output.log 2>&1".format(os.getenv("OPENRAM_HOME"),
+                                                                                   out_path,
+                                                                                   config_name)
+        debug.info(1, cmd)
+        os.system(cmd)
+        self.assertTrue(os.path.exists(self.get_filename(name, "gds")))
+
+        output = open("{0}/output.log".format(out_path), "r").read()
+        match = re.search(r"Module cache: (\d+) hits, (\d+) misses .*, (\d+) stored", output)
+        if not match:
+            return (0, 0, 0)
+        return tuple(int(x) for x in match.groups())
+
+    def read_gds_records(self, name):
+        """ The GDS records except for the modification dates of the library and structures. """
+        data = open(self.get_filename(name, "gds"), "rb").read()
+        records = []
+        i = 0
+        while i < len(data):
+            (size, record_type) = struct.unpack(">HH", data[i:i + 4])
+            if size < 4:
+                break
+            # BGNLIB and BGNSTR
+            if record_type not in [0x0102, 0x0502]:
+                records.append(data[i:i + size])
+            i += size
+        return records
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+import debug
+
+class min_period_search_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+
+        from characterizer import delay
+        from characterizer.charutils import relative_compare
+
+        class threshold_delay(delay):
+            """ A delay whose simulations pass at or above a known minimum period. """
+
+            def __init__(self, threshold):
+                self.threshold = threshold
+                self.read_ports = [0]
+                self.write_ports = [0]
+                self.period = None
+                self.rounds = 0
+
+            def try_periods(self, periods, feasible_delays):
+                self.rounds += 1
+                return super().try_periods(periods, feasible_delays)
+
+            def try_period(self, feasible_delays):
+                return self.period >= self.threshold
+
+        def binary_search(threshold, lb_period, ub_period, target_period):
+            """ The single candidate search which was used before the parallel rounds. """
+            while True:
+                if target_period >= threshold:
+                    ub_period = target_period
+                else:
+                    lb_period = target_period
+                if relative_compare(ub_period, lb_period, error_tolerance=0.05):
+                    return ub_period
+                target_period = 0.5 * (ub_period + lb_period)
+
+        # (threshold, lb_period, ub_period, target_period)
+        searches = [(3.7, 0.0, 10.0, None),
+                    (3.7, 0.0, 10.0, 3.0),
+                    (3.7, 0.0, 10.0, 12.0),
+                    (0.42, 0.0, 8.0, 0.4),
+                    (7.9, 2.5, 8.0, 5.0),
+                    # every candidate fails
+                    (12.0, 0.0, 10.0, None),
+                    (12.0, 0.0, 10.0, 9.0),
+                    # every candidate passes
+                    (0.0, 2.0, 10.0, None),
+                    (0.0, 2.0, 10.0, 2.5)]
+        for (threshold, lb_period, ub_period, target_period) in searches:
+            if target_period == None or not (lb_period <= target_period < ub_period):
+                old_target = 0.5 * (ub_period + lb_period)
+            else:
+                old_target = target_period
+            old_period = binary_search(threshold, lb_period, ub_period, old_target)
+            rounds = {}
+            for num_threads in [1, 3]:
+                OPTS.num_threads = num_threads
+                d = threshold_delay(threshold)
+                period = d.find_min_period_one_port({}, 0, lb_period, ub_period, target_period)
+                rounds[num_threads] = d.rounds
+                debug.info(1, "Threshold {0} threads {1}: {2}ns in {3} rounds (binary search {4}ns)".format(threshold,
+                                                                                                             num_threads,
+                                                                                                             period,
+                                                                                                             d.rounds,
+                                                                                                             old_period))
+                self.assertEqual(d.targ_read_ports, [0])
+                self.assertEqual(d.targ_write_ports, [0])
+                self.assertEqual(d.period, period)
+                if threshold > ub_period:
+                    # the upper bound is assumed to be feasible
+                    self.assertEqual(period, ub_period)
+                else:
+                    self.assertGreaterEqual(period, max(threshold, lb_period))
+                    self.assertTrue(relative_compare(period, max(threshold, lb_period), error_tolerance=0.05))
+                if num_threads == 1:
+                    self.assertEqual(period, old_period)
+                else:
+                    self.assertTrue(relative_compare(period, old_period, error_tolerance=0.05))
+            self.assertLessEqual(rounds[3], rounds[1])
+
+        # The candidates of one round are returned in order
+        OPTS.num_threads = 3
+        d = threshold_delay(2.0)
+        self.assertEqual(d.try_periods([3.0, 1.0, 2.0, 1.5], {}), [True, False, True, False])
+
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
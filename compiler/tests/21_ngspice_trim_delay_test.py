@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+from sram_factory import factory
+import debug
+
+class timing_trim_sram_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+        OPTS.spice_name="ngspice"
+        OPTS.analytical_delay = False
+        OPTS.netlist_only = True
+
+        # This is a hack to reload the characterizer __init__ with the spice version
+        from importlib import reload
+        import characterizer
+        reload(characterizer)
+        from characterizer import delay
+        from sram_config import sram_config
+        c = sram_config(word_size=4,
+                        num_words=32,
+                        num_banks=1)
+        c.words_per_row=2
+        c.recompute_sizes()
+        debug.info(1, "Testing trimmed timing for sample 4bit, 32words SRAM with 1 bank")
+        s = factory.create(module_type="sram", sram_config=c)
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+
+        probe_address = "1" * s.s.addr_size
+        probe_data = s.s.word_size - 1
+        debug.info(1, "Probe address {0} probe data bit {1}".format(probe_address, probe_data))
+
+        corner = (OPTS.process_corners[0], OPTS.supply_voltages[0], OPTS.temperatures[0])
+        import tech
+        loads = [tech.spice["dff_in_cap"]*4]
+        slews = [tech.spice["rise_time"]*2]
+
+        # The delays of the trimmed netlist must match the full netlist
+        results = {}
+        for trim_netlist in [False, True]:
+            OPTS.trim_netlist = trim_netlist
+            d = delay(s.s, tempspice, corner)
+            data, port_data = d.analyze(probe_address, probe_data, slews, loads)
+            results[trim_netlist] = {k: port_data[0][k] for k in ["delay_lh", "delay_hl", "slew_lh", "slew_hl"]}
+        debug.info(1, "Full {0} trimmed {1}".format(results[False], results[True]))
+
+        self.assertTrue(self.check_golden_data(results[True], results[False], 0.1))
+
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+import debug
+
+def write_scratch_file(index):
+    """ Write a file to the scratch directory and return what the job saw. """
+    f = open(OPTS.openram_temp + "job.txt", "w")
+    f.write(str(index))
+    f.close()
+    return (index, OPTS.openram_temp, os.getpid())
+
+def run_nested_jobs(index):
+    """ Run jobs from a worker and return them with the pid of the worker. """
+    from characterizer.charutils import parallel_map
+    return (os.getpid(), parallel_map(write_scratch_file, [(i,) for i in range(3)], "nested"))
+
+class parallel_map_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+
+        from characterizer.charutils import parallel_map
+        parent_temp = OPTS.openram_temp
+        args_list = [(i,) for i in range(7)]
+
+        for num_threads in [1, 3]:
+            OPTS.num_threads = num_threads
+            results = parallel_map(write_scratch_file, args_list, "job{}_".format(num_threads))
+            self.assertEqual(OPTS.openram_temp, parent_temp)
+            # The results are in the order of the jobs and each job had its own directory
+            self.assertEqual([index for (index, scratch_dir, pid) in results], list(range(7)))
+            for (index, scratch_dir, pid) in results:
+                self.assertEqual(scratch_dir, "{0}job{1}_{2}/".format(parent_temp, num_threads, index))
+                f = open(scratch_dir + "job.txt", "r")
+                self.assertEqual(f.read(), str(index))
+                f.close()
+            pids = {pid for (index, scratch_dir, pid) in results}
+            if num_threads == 1:
+                self.assertEqual(pids, {os.getpid()})
+            else:
+                self.assertNotIn(os.getpid(), pids)
+                self.assertLessEqual(len(pids), num_threads)
+
+        # Jobs started by a worker run serially in the worker in nested scratch directories
+        results = parallel_map(run_nested_jobs, [(i,) for i in range(3)], "outer")
+        for (outer_index, (worker_pid, nested_results)) in enumerate(results):
+            self.assertNotEqual(worker_pid, os.getpid())
+            self.assertEqual([index for (index, scratch_dir, pid) in nested_results], list(range(3)))
+            for (index, scratch_dir, pid) in nested_results:
+                self.assertEqual(pid, worker_pid)
+                self.assertEqual(scratch_dir, "{0}outer{1}/nested{2}/".format(parent_temp, outer_index, index))
+
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+import debug
+
+# ngspice output of a swept simulation where the second sweep point failed a measurement
+ngspice_output = """
+Circuit: ** stim.sp
+
+delay_lh            =  1.234500e-09 targ=  3.234500e-09 trig=  2.000000e-09
+delay_hl            =  2.500000e-09 targ=  4.500000e-09 trig=  2.000000e-09
+sweep_point_end
+delay_lh            =  1.300000e-09 targ=  3.300000e-09 trig=  2.000000e-09
+Error: measure  delay_hl  trig :  out of interval
+sweep_point_end
+delay_lh            =  1.400000e-09 targ=  3.400000e-09 trig=  2.000000e-09
+delay_hl            =  2.700000e-09 targ=  4.700000e-09 trig=  2.000000e-09
+sweep_point_end
+"""
+
+# hspice output of a simulation with an .ALTER sweep point
+hspice_output = """
+ ******  transient analysis tnom=  25.000 temp=  25.000 *****
+   delay_lh=  1.2345E-09  targ=  3.2345E-09   trig=  2.0000E-09
+   delay_hl=  failed
+   leakage_power=  4.8097E-06
+ ***** job concluded
+ ******  HSPICE -- stim.sp
+ * sweep1
+ ******  transient analysis tnom=  25.000 temp=  25.000 *****
+   delay_lh=  1.3000E-09  targ=  3.3000E-09   trig=  2.0000E-09
+   delay_hl=  2.6000E-09  targ=  4.6000E-09   trig=  2.0000E-09
+   leakage_power=  4.9000E-06
+ ***** job concluded
+"""
+
+# xa output with unit suffixes
+xa_output = """
+delay_lh = 1.2345n
+delay_hl = 2500p
+"""
+
+class spice_measurements_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+
+        from characterizer.charutils import parse_spice_list, clear_spice_output, get_spice_output_filename
+
+        OPTS.spice_name = "ngspice"
+        self.write_output(ngspice_output)
+        self.assertEqual(parse_spice_list("timing", "delay_lh"), 1.2345e-09)
+        self.assertEqual(parse_spice_list("timing", "DELAY_HL"), 2.5e-09)
+        self.assertEqual(parse_spice_list("timing", "delay_lh", 1), 1.3e-09)
+        self.assertEqual(parse_spice_list("timing", "delay_hl", 1), "Failed")
+        self.assertEqual(parse_spice_list("timing", "delay_hl", 2), 2.7e-09)
+        self.assertEqual(parse_spice_list("timing", "delay_lh", 3), "Failed")
+        self.assertEqual(parse_spice_list("timing", "leakage_power"), "Failed")
+
+        # A new simulation output with the same size and modification time
+        # is read again once it is cleared
+        filename = get_spice_output_filename("timing")
+        stat = os.stat(filename)
+        self.write_output(ngspice_output.replace("1.234500e-09", "1.534500e-09"))
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        clear_spice_output(filename)
+        self.assertEqual(parse_spice_list("timing", "delay_lh"), 1.5345e-09)
+
+        OPTS.spice_name = "hspice"
+        clear_spice_output(filename)
+        self.write_output(hspice_output)
+        self.assertEqual(parse_spice_list("timing", "delay_lh"), 1.2345e-09)
+        self.assertEqual(parse_spice_list("timing", "delay_hl"), "Failed")
+        self.assertEqual(parse_spice_list("timing", "leakage_power"), 4.8097e-06)
+        self.assertEqual(parse_spice_list("timing", "delay_lh", 1), 1.3e-09)
+        self.assertEqual(parse_spice_list("timing", "delay_hl", 1), 2.6e-09)
+        self.assertEqual(parse_spice_list("timing", "leakage_power", 1), 4.9e-06)
+
+        OPTS.spice_name = "xa"
+        self.write_output(xa_output)
+        self.assertTrue(self.isclose("delay_lh", parse_spice_list("timing", "delay_lh"), 1.2345e-09))
+        self.assertTrue(self.isclose("delay_hl", parse_spice_list("timing", "delay_hl"), 2.5e-09))
+
+        globals.end_openram()
+
+    def write_output(self, contents):
+        """ Write a simulator output file for the current simulator. """
+        from characterizer.charutils import get_spice_output_filename
+        f = open(get_spice_output_filename("timing"), "w")
+        f.write(contents)
+        f.close()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+import debug
+
+# ngspice output of a three point sweep where the later points failed measurements
+ngspice_output = """
+Circuit: ** stim.sp
+
+clk2q_delay         =  1.100000e-10 targ=  2.011000e-08 trig=  2.000000e-08
+setup_hold_time     = -2.000000e-10 targ=  1.980000e-08 trig=  2.000000e-08
+sweep_point_end
+Error: measure  clk2q_delay  trig :  out of interval
+setup_hold_time     = -1.000000e-10 targ=  1.990000e-08 trig=  2.000000e-08
+sweep_point_end
+Error: measure  clk2q_delay  trig :  out of interval
+Error: measure  setup_hold_time  trig :  out of interval
+sweep_point_end
+"""
+
+# hspice output of the same sweep with a job for the deck and each .ALTER
+hspice_output = """
+ ******  HSPICE -- stim.sp
+ ******  transient analysis tnom=  25.000 temp=  25.000 *****
+   clk2q_delay=  1.1000E-10  targ=  2.0110E-08   trig=  2.0000E-08
+   setup_hold_time= -2.0000E-10  targ=  1.9800E-08   trig=  2.0000E-08
+ ***** job concluded
+ * sweep1
+ ******  transient analysis tnom=  25.000 temp=  25.000 *****
+   clk2q_delay=  failed
+   setup_hold_time= -1.0000E-10  targ=  1.9900E-08   trig=  2.0000E-08
+ ***** job concluded
+ * sweep2
+ ******  transient analysis tnom=  25.000 temp=  25.000 *****
+   clk2q_delay=  failed
+   setup_hold_time=  failed
+ ***** job concluded
+"""
+
+class sweep_deck_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+
+        from characterizer import setup_hold
+        from characterizer.charutils import parse_spice_measurements, clear_spice_output, get_spice_output_filename
+        import tech
+
+        corner = (OPTS.process_corners[0], OPTS.supply_voltages[0], OPTS.temperatures[0])
+        sh = setup_hold(corner)
+        sh.constrained_input_slew = sh.related_input_slew = tech.spice["rise_time"]
+        target_times = [1.5, 1.75, 2.0]
+
+        for spice_name in ["ngspice", "hspice"]:
+            OPTS.spice_name = spice_name
+
+            # A single target time is the unswept deck
+            sh.write_stimulus(mode="SETUP", target_times=target_times[:1], correct_value=1)
+            lines = self.read_stimulus()
+            self.assertNotIn(".param target_time=1.5", lines)
+            self.assertEqual(len([x for x in lines if x.startswith(".TRAN ")]), 1)
+            self.assertNotIn(".control", lines)
+            self.assertEqual([x for x in lines if x.startswith(".ALTER")], [])
+            self.assertEqual(lines[-1], ".end")
+
+            sh.write_stimulus(mode="SETUP", target_times=target_times, correct_value=1)
+            lines = self.read_stimulus()
+            self.assertEqual(lines[-1], ".end")
+            # The first point is the parameter value of the deck
+            param_index = lines.index(".param target_time=1.5")
+            data_line = [x for x in lines if x.startswith("Vdata ")][0]
+            self.assertLess(param_index, lines.index(data_line))
+            self.assertIn("target_time-", data_line)
+            if spice_name == "ngspice":
+                # The transient is only run by the control loop
+                self.assertEqual([x for x in lines if x.startswith(".TRAN ")], [])
+                self.assertEqual([x for x in lines if x.startswith(".ALTER")], [])
+                self.assertIn("{(target_time-", data_line)
+                control_index = lines.index(".control")
+                self.assertEqual(lines[control_index:-1],
+                                 [".control",
+                                  "foreach sweep_value 1.5 1.75 2.0",
+                                  "alterparam target_time = $sweep_value",
+                                  "reset",
+                                  "tran 10p {}n uic".format(4 * sh.period),
+                                  "echo sweep_point_end",
+                                  "end",
+                                  ".endc"])
+            else:
+                self.assertEqual(len([x for x in lines if x.startswith(".TRAN ")]), 1)
+                self.assertNotIn(".control", lines)
+                self.assertIn("'(target_time-", data_line)
+                # One .ALTER for each of the other points after the measurements
+                alter_index = lines.index(".ALTER sweep1")
+                self.assertLess(max(i for (i, x) in enumerate(lines) if x.startswith(".meas")), alter_index)
+                self.assertEqual(lines[alter_index:-1],
+                                 [".ALTER sweep1",
+                                  ".param target_time=1.75",
+                                  ".ALTER sweep2",
+                                  ".param target_time=2.0"])
+
+        # The simulator outputs are split into the results of each sweep point
+        for (spice_name, output) in [("ngspice", ngspice_output), ("hspice", hspice_output)]:
+            OPTS.spice_name = spice_name
+            filename = get_spice_output_filename("timing")
+            clear_spice_output(filename)
+            f = open(filename, "w")
+            f.write(output)
+            f.close()
+            measurements = [self.get_measurements(parse_spice_measurements("timing", i)) for i in range(4)]
+            self.assertEqual(measurements, [(1.1e-10, -2e-10),
+                                            ("Failed", -1e-10),
+                                            ("Failed", "Failed"),
+                                            ("Failed", "Failed")])
+            self.assertEqual(parse_spice_measurements("timing"), parse_spice_measurements("timing", 0))
+
+        globals.end_openram()
+
+    def get_measurements(self, measurements):
+        """ Return the clk-to-q and setup/hold measurements of a sweep point. """
+        return (measurements.get("clk2q_delay", "Failed"), measurements.get("setup_hold_time", "Failed"))
+
+    def read_stimulus(self):
+        """ Return the non-empty lines of the stimulus file. """
+        f = open(OPTS.openram_temp + "stim.sp", "r")
+        lines = [x.strip() for x in f.read().splitlines() if x.strip()]
+        f.close()
+        return lines
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+from sram_factory import factory
+import debug
+
+class trim_spice_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+        OPTS.netlist_only = True
+
+        from characterizer import trim_spice
+        from sram_config import sram_config
+        c = sram_config(word_size=4,
+                        num_words=32,
+                        num_banks=1)
+        c.words_per_row=2
+        c.recompute_sizes()
+        debug.info(1, "Trimming a 4bit, 32words SRAM netlist with 1 bank and 2 way column mux")
+        s = factory.create(module_type="sram", sram_config=c)
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        reduced_spice = OPTS.openram_temp + "reduced.sp"
+        s.sp_write(tempspice)
+
+        # Row 15 and column 1 of data bit 3 (bitline 7) plus the inverse address in row 0
+        probe_address = "1" * s.s.addr_size
+        probe_data = s.s.word_size - 1
+        trimsp = trim_spice(tempspice, reduced_spice)
+        trimsp.set_configuration(s.s.num_banks,
+                                 s.s.num_rows,
+                                 s.s.num_cols,
+                                 s.s.word_size,
+                                 s.s.num_spare_rows,
+                                 (s.s.bitcell.width, s.s.bitcell.height))
+        trimsp.trim(probe_address, probe_data, ["0" * s.s.addr_size])
+
+        subckts = self.read_subckts(reduced_spice)
+
+        # The bitcells on the probed wordlines and bitline pair
+        insts = self.get_insts(subckts["bitcell_array"])
+        kept_cells = ["Xbit_r{}_c{}".format(row, col) for row in [0, 15] for col in range(s.s.num_cols)]
+        kept_cells += ["Xbit_r{}_c7".format(row) for row in range(1, 15)]
+        self.assertEqual(sorted(insts), sorted(kept_cells))
+
+        # The precharge of bitline 7 (column 0 of the precharge array is the replica bitline)
+        insts = self.get_insts(subckts["precharge_array"])
+        self.assertEqual(sorted(insts), ["Xpre_column_0", "Xpre_column_8"])
+
+        # The column mux of bitline 7 and the sense amp and write driver of its data bit
+        insts = self.get_insts(subckts["single_level_column_mux_array"])
+        self.assertEqual(insts, ["XXMUX7"])
+        insts = self.get_insts(subckts["sense_amp_array"])
+        self.assertEqual(insts, ["Xsa_d3"])
+        # (the write drivers are numbered by their column)
+        insts = self.get_insts(subckts["write_driver_array"])
+        self.assertEqual(insts, ["Xwrite_driver6"])
+
+        # The replica column is not trimmed
+        insts = self.get_insts(subckts["replica_bitcell_array"])
+        self.assertTrue("Xreplica_col_0" in insts)
+
+        # The removed cells are lumped RC loads which hold the bitlines high and wordlines low
+        lines = subckts["bitcell_array"]
+        self.assertTrue(any(line.startswith("Rtrim_bl_0 bl_0 bl_0_trim ") for line in lines))
+        self.assertTrue(any(line.startswith("Ctrim_bl_0 bl_0_trim 0 ") for line in lines))
+        self.assertTrue("Rhold_bl_0 bl_0 vdd 1G" in lines)
+        self.assertTrue("Rhold_wl_1 wl_1 0 1G" in lines)
+        self.assertFalse("Rhold_bl_7 bl_7 0 1G" in lines)
+        lines = subckts["precharge_array"]
+        self.assertTrue("Rhold_bl_1 bl_1 vdd 1G" in lines)
+
+        globals.end_openram()
+
+    def read_subckts(self, filename):
+        """ The body lines of every subckt in a netlist. """
+        subckts = {}
+        lines = None
+        with open(filename, "r") as f:
+            for line in f:
+                tokens = line.split()
+                if len(tokens) > 1 and tokens[0].upper() == ".SUBCKT":
+                    lines = subckts[tokens[1]] = []
+                elif len(tokens) > 0 and tokens[0].upper() == ".ENDS":
+                    lines = None
+                elif lines != None:
+                    lines.append(line.strip())
+        return subckts
+
+    def get_insts(self, lines):
+        """ The names of the subckt instances. """
+        return [line.split()[0] for line in lines if line[:1] == "X"]
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
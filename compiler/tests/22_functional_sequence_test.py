@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+from sram_factory import factory
+import debug
+
+class functional_sequence_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+        OPTS.netlist_only = True
+        OPTS.trim_netlist = False
+
+        OPTS.bitcell = "pbitcell"
+        OPTS.replica_bitcell="replica_pbitcell"
+        OPTS.dummy_bitcell="dummy_pbitcell"
+
+        # The random sequences are checked with the behavioral model
+        # so no simulator is needed
+        from characterizer import functional
+        OPTS.analytical_delay = False
+        from sram_config import sram_config
+        import random
+
+        for (num_rw_ports, num_w_ports, num_r_ports, write_size) in [(1, 1, 0, None),
+                                                                     (1, 1, 0, 1),
+                                                                     (0, 1, 1, None)]:
+            OPTS.num_rw_ports = num_rw_ports
+            OPTS.num_w_ports = num_w_ports
+            OPTS.num_r_ports = num_r_ports
+            factory.reset()
+            c = sram_config(word_size=2,
+                            write_size=write_size,
+                            num_words=32,
+                            num_banks=1)
+            c.words_per_row=2
+            c.recompute_sizes()
+            debug.info(1, "Random sequences of {}rw,{}w,{}r psram with write size {}".format(num_rw_ports,
+                                                                                            num_w_ports,
+                                                                                            num_r_ports,
+                                                                                            write_size))
+            s = factory.create(module_type="sram", sram_config=c)
+            tempspice = OPTS.openram_temp + "sram.sp"
+            s.sp_write(tempspice)
+
+            corner = (OPTS.process_corners[0], OPTS.supply_voltages[0], OPTS.temperatures[0])
+            f = functional(s.s, tempspice, corner)
+            # The sequences have no simultaneous writes or a read and a write of the
+            # same address and the expected reads are the values of the model
+            for seed in range(200):
+                f.rng = random.Random(seed)
+                f.reset_sequence()
+                f.create_random_memory_sequence()
+                (success, error) = f.check_sequence()
+                self.assertTrue(success, "Seed {0}: {1}".format(seed, error))
+                # The simulation ends after the cycle that measures the last read check
+                if len(f.read_check) == 0:
+                    self.assertEqual(f.check_cycles, [])
+                    self.assertEqual(f.get_end_time(), f.cycle_times[-1] + f.period)
+                else:
+                    last_check = max(eo_period for (word, dout_port, eo_period, check) in f.read_check)
+                    self.assertEqual(f.get_end_time(), last_check + f.period)
+
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
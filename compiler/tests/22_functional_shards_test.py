@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+from sram_factory import factory
+import debug
+
+class functional_shards_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+        OPTS.netlist_only = True
+        OPTS.trim_netlist = False
+
+        # The shards are generated and checked with the behavioral model
+        # so no simulator is needed
+        from characterizer import functional, sram_model
+        OPTS.analytical_delay = False
+        from sram_config import sram_config
+        import random
+        c = sram_config(word_size=4,
+                        num_words=32,
+                        num_spare_cols=1,
+                        num_banks=1)
+        c.words_per_row=2
+        c.recompute_sizes()
+        debug.info(1, "Functional shards of a 4bit, 32word SRAM with 2 words per row and 1 spare column")
+        s = factory.create(module_type="sram", sram_config=c)
+        tempspice = OPTS.openram_temp + "sram.sp"
+        s.sp_write(tempspice)
+
+        corner = (OPTS.process_corners[0], OPTS.supply_voltages[0], OPTS.temperatures[0])
+        f = functional(s.s, tempspice, corner)
+        f.num_cycles = 14
+
+        # The shards split the cycles and do not use the global random numbers
+        random.seed(1)
+        state = random.getstate()
+        shard_list = f.get_shards(4)
+        self.assertEqual([num_cycles for (shard, seed, num_cycles) in shard_list], [4, 4, 3, 3])
+        for (shard, seed, num_cycles) in shard_list:
+            f.create_shard_sequence(seed, num_cycles)
+            self.assertEqual(random.getstate(), state)
+
+            # A shard is the same for the same seed
+            (preloaded_words, read_check) = (dict(f.preloaded_words), list(f.read_check))
+            f.create_shard_sequence(seed, num_cycles)
+            self.assertEqual(dict(f.preloaded_words), preloaded_words)
+            self.assertEqual(f.read_check, read_check)
+            self.assertTrue(0 < len(preloaded_words) <= num_cycles)
+
+            # The expected reads are the values of the model that starts from the preloaded words
+            model = sram_model(s.s)
+            for (addr, word) in preloaded_words.items():
+                model.preload(int(addr, 2), int(word, 2))
+            expected = []
+            for cycle in range(len(f.cycle_times)):
+                (douts, conflicts) = model.cycle(f.get_cycle_ops(cycle))
+                self.assertEqual(conflicts, [])
+                for port in sorted(douts.keys()):
+                    self.assertEqual(douts[port][1], model.word_mask)
+                    expected.append((douts[port][0], "{0}{1}".format(f.dout_name, port)))
+            self.assertEqual([(int(word, 2), dout_port) for (word, dout_port, eo_period, check) in read_check], expected)
+
+            # The preloaded words are initial conditions of the bitcells
+            f.check_sequence()
+            f.write_functional_stimulus()
+            ics = {}
+            for line in open("{0}/stim.sp".format(OPTS.openram_temp)):
+                if line.startswith(".IC"):
+                    (node, voltage) = line.split()[1].split("=")
+                    ics[node[2:-1]] = float(voltage)
+            # The words of a row share the spare column
+            rows = {int(addr, 2) // 2 for addr in preloaded_words.keys()}
+            self.assertEqual(len(ics), 2 * (4 * len(preloaded_words) + len(rows)))
+            for (addr, word) in preloaded_words.items():
+                (row, col_address) = (int(addr, 2) // 2, int(addr, 2) % 2)
+                # Four data columns that are muxed by the low address bit and a spare column
+                cols = [2 * bit + col_address for bit in range(4)] + [8]
+                for (bit, col) in enumerate(cols):
+                    (q_name, qbar_name) = f.get_bit_name(row, col)
+                    value = word[4 - bit] == "1"
+                    self.assertEqual(ics[q_name], f.vdd_voltage if value else f.gnd_voltage)
+                    self.assertEqual(ics[qbar_name], f.gnd_voltage if value else f.vdd_voltage)
+
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2019 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import unittest
+from testutils import *
+import sys,os
+sys.path.append(os.getenv("OPENRAM_HOME"))
+import globals
+from globals import OPTS
+import debug
+
+class sram_model_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        globals.init_openram(config_file)
+
+        from characterizer.sram_model import sram_model
+        from sram_config import sram_config
+        c = sram_config(word_size=8,
+                        num_words=16,
+                        write_size=4,
+                        num_spare_cols=1)
+        debug.info(1, "Testing the behavioral model of an 8bit, 16words SRAM with 2 write masks and 1 spare column")
+        # Ports 0 and 1 are read/write and port 2 is read only
+        model = sram_model(c, 2, 0, 1)
+
+        # Words are unknown until they are written or preloaded
+        self.assertEqual(model.read(3), (0, 0))
+        model.preload(3, 0x1a5)
+        self.assertEqual(model.read(3), (0x1a5, 0x1ff))
+
+        # Write masks only write their data bits and the spare column has its own enable
+        (douts, conflicts) = model.cycle({0: ("write", 3, 0x10f, 0b01, 0)})
+        self.assertEqual((douts, conflicts), ({}, []))
+        self.assertEqual(model.read(3), (0x1af, 0x1ff))
+
+        # A partial-word write to an unknown word only knows the written bits
+        model.cycle({0: ("write", 5, 0x1ab, 0b10, None)})
+        self.assertEqual(model.read(5), (0x1a0, 0x1f0))
+
+        # Reads return the contents before the writes of the cycle
+        results = model.run([{0: ("write", 3, 0x0, None, None), 2: ("read", 5)},
+                             {1: ("read", 3), 2: ("read", 5)}])
+        self.assertEqual(results[0], ({2: (0x1a0, 0x1f0)}, []))
+        self.assertEqual(results[1], ({1: (0x0, 0x1ff), 2: (0x1a0, 0x1f0)}, []))
+
+        # A read of an address that another port writes is unknown
+        (douts, conflicts) = model.cycle({0: ("write", 3, 0x1ff, None, None), 2: ("read", 3)})
+        self.assertEqual(douts, {2: (0x0, 0)})
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(model.read(3), (0x1ff, 0x1ff))
+
+        # The bits that two ports write at the same time are unknown
+        model.preload(7, 0x0)
+        (douts, conflicts) = model.cycle({0: ("write", 7, 0x0ff, 0b01, 0),
+                                          1: ("write", 7, 0x1c3, 0b11, 1)})
+        self.assertEqual(len(conflicts), 1)
+        (value, known) = model.read(7)
+        self.assertEqual(known, 0x1f0)
+        self.assertEqual(value & known, 0x1c0)
+        self.assertEqual(model.cycle_count, 6)
+
+        # Only the cycles with reads of known bits are worth simulating
+        results = model.run([{0: ("write", 9, 0x3, None, None)},
+                             {2: ("read", 11)},
+                             {1: ("read", 9)},
+                             {}])
+        self.assertEqual(model.get_check_cycles(results), [2])
+
+        globals.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())